@@ -7,5 +7,10 @@ from .anomaly_detector import AnomalyDetector
 from .theft_detector import TheftDetector
 from .queue_optimizer import QueueOptimizer
 from .inventory_tracker import InventoryTracker
+from .dispatcher import DetectorDispatcher, create_default_dispatcher
+from .window_view import WindowView
 
-__all__ = ['AnomalyDetector', 'TheftDetector', 'QueueOptimizer', 'InventoryTracker']
+__all__ = [
+    'AnomalyDetector', 'TheftDetector', 'QueueOptimizer', 'InventoryTracker',
+    'DetectorDispatcher', 'create_default_dispatcher', 'WindowView'
+]
@@ -4,93 +4,199 @@ Detects system crashes, errors, and unusual patterns
 """
 
 import logging
-from typing import Dict, List, Any
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from events.event import Event
+
+from .online_stats import MetricMonitor
+from .outage_tracker import Outage, OutageTracker
+from .window_view import WindowView
 
 
 class AnomalyDetector:
     """Detects anomalies and system issues"""
     
+    # Events depend only on each window's own station, so shards can run apart
+    PER_STATION = True
+    
+    # Per-station metrics watched for unusual patterns
+    METRICS = ('transactions_per_minute', 'read_error_rate', 'queue_length', 'dwell_time')
+    
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('sentinel.anomaly_detector')
+        self.monitors: Dict[str, Dict[str, MetricMonitor]] = defaultdict(dict)
+        self.outages = OutageTracker(config.OUTAGE_MERGE_GAP_SECONDS)
+        self.read_errors = OutageTracker(config.OUTAGE_MERGE_GAP_SECONDS, 'Read Error')
     
     def detect(self, synchronized_data: List[Dict]) -> List[Dict]:
         """Detect all types of anomalies"""
         events = []
         
         for window in synchronized_data:
-            # Detect system crashes
-            crash = self._detect_system_crash(window)
-            if crash:
-                events.append(crash)
-            
-            # Detect scanning errors
-            errors = self._detect_scanning_errors(window)
-            if errors:
-                events.append(errors)
-            
-            # Detect unusual patterns
-            patterns = self._detect_unusual_patterns(window)
-            if patterns:
-                events.append(patterns)
+            events.extend(self.update(window))
         
+        events.extend(self.flush())
         return events
     
+    def update(self, window: Dict, view: WindowView = None) -> List[Dict]:
+        """Detect anomalies in a single window as it arrives"""
+        events = []
+        view = view or WindowView(window)
+        
+        # Report system outages that ended with this window
+        events.extend(self._detect_system_crash(window, view))
+        
+        # Report runs of read errors that ended with this window
+        events.extend(self._detect_scanning_errors(window, view))
+        
+        # Detect unusual patterns
+        patterns = self._detect_unusual_patterns(window, view)
+        if patterns:
+            events.append(patterns)
+        
+        return events
+    
+    def flush(self) -> List[Dict]:
+        """Report the outages and read error runs still open at the end of the stream, at their start"""
+        events = [self._outage_event(outage, _isoformat(outage.start), ongoing=True)
+                  for outage in self.outages.close_all()]
+        events.extend(self._scanning_error_event(run, _isoformat(run.start), ongoing=True)
+                      for run in self.read_errors.close_all()
+                      if run.records >= self.config.SCANNING_ERROR_MIN_READINGS)
+        events.sort(key=lambda event: event['timestamp'])
+        return events
+    
+    def earliest_pending(self) -> Optional[int]:
+        """Earliest timestamp (epoch ns) flush() may still report an outage at"""
+        starts = [start for start in (self.outages.earliest_start(), self.read_errors.earliest_start())
+                  if start is not None]
+        return min(starts, default=None)
+    
+    def merge(self, other: 'AnomalyDetector'):
+        """Absorb the state of a detector that ran on another station shard"""
+        self.monitors.update(other.monitors)
+        self.outages.merge(other.outages)
+        self.read_errors.merge(other.read_errors)
+    
     # @algorithm System Crash Detection | Identifies system failures and crashes
-    def _detect_system_crash(self, window: Dict) -> Dict:
+    def _detect_system_crash(self, window: Dict, view: WindowView) -> List[Dict]:
         """
-        Detect system crashes in POS or recognition systems
+        Detect outages of the POS, recognition, RFID and queue systems
+        One event per outage, once the system has recovered
         """
-        pos_events = window.get('pos_events', [])
-        recognition_events = window.get('recognition_events', [])
-        
-        # Check for system crash status
-        for event in pos_events + recognition_events:
-            if event.get('status') == 'System Crash':
-                return {
-                    'event_type': 'SYSTEM_CRASH',
-                    'timestamp': window['timestamp'],
-                    'station_id': window['station_id'],
-                    'severity': 'CRITICAL',
-                    'details': {
-                        'system': 'POS' if event in pos_events else 'Recognition',
-                        'requires_attention': True
-                    }
-                }
-        
-        return None
+        return [self._outage_event(outage, window['timestamp']) for outage in self.outages.observe(window, view)]
     
-    # @algorithm Error Pattern Detection | Identifies recurring read errors
-    def _detect_scanning_errors(self, window: Dict) -> Dict:
+    def _outage_event(self, outage: Outage, timestamp: Any, ongoing: bool = False) -> Dict:
+        """SYSTEM_CRASH for one outage, `ongoing` when it was still open at the end"""
+        return Event(
+            event_type='SYSTEM_CRASH',
+            timestamp=timestamp,
+            station_id=outage.station,
+            severity='CRITICAL',
+            details={
+                'system': outage.system,
+                'start': _isoformat(outage.start),
+                'end': _isoformat(outage.end),
+                'duration_seconds': outage.duration_seconds,
+                'crash_readings': outage.records,
+                'ongoing': ongoing,
+                'requires_attention': True
+            }
+        )
+    
+    # @algorithm Error Pattern Detection | Read errors merged into runs like outages
+    def _detect_scanning_errors(self, window: Dict, view: WindowView) -> List[Dict]:
         """
-        Detect read errors across different systems
+        Detect sustained read errors of the POS, recognition, RFID and queue systems
+        One event per run of at least SCANNING_ERROR_MIN_READINGS errors,
+        once the system reads normally again
         """
-        all_events = (
-            window.get('rfid_events', []) +
-            window.get('queue_events', []) +
-            window.get('pos_events', []) +
-            window.get('recognition_events', [])
+        return [self._scanning_error_event(run, window['timestamp'])
+                for run in self.read_errors.observe(window, view)
+                if run.records >= self.config.SCANNING_ERROR_MIN_READINGS]
+    
+    def _scanning_error_event(self, run: Outage, timestamp: Any, ongoing: bool = False) -> Dict:
+        """SCANNING_ERROR for one run of read errors, `ongoing` when it was still open at the end"""
+        return Event(
+            event_type='SCANNING_ERROR',
+            timestamp=timestamp,
+            station_id=run.station,
+            severity='MEDIUM',
+            details={
+                'system': run.system,
+                'start': _isoformat(run.start),
+                'end': _isoformat(run.end),
+                'duration_seconds': run.duration_seconds,
+                'error_count': run.records,
+                'ongoing': ongoing
+            }
         )
+    
+    # @algorithm Streaming Baseline Deviation | Welford, EWMA and P² quantiles per station and metric
+    def _detect_unusual_patterns(self, window: Dict, view: WindowView) -> Dict:
+        """
+        Detect metrics that deviate from the station's own running baseline
+        Each station keeps one MetricMonitor per metric, so memory stays
+        constant however long the stream runs
+        """
+        config = self.config
+        monitors = self.monitors[window['station_id']]
+        deviations = {}
+        for metric, value in self._window_metrics(window, view).items():
+            monitor = monitors.get(metric)
+            if monitor is None:
+                monitor = monitors[metric] = MetricMonitor(
+                    config.ANOMALY_EWMA_ALPHA, config.ANOMALY_QUANTILES, config.ANOMALY_QUANTILE_SPAN
+                )
+            deviation = monitor.observe(value, config.ANOMALY_Z_THRESHOLD, config.ANOMALY_WARMUP_WINDOWS)
+            if deviation:
+                deviations[metric] = deviation
         
-        error_count = sum(1 for event in all_events if event.get('status') == 'Read Error')
+        if not deviations:
+            return None
         
-        if error_count >= 2:  # Multiple errors in same window
-            return {
-                'event_type': 'SCANNING_ERROR',
-                'timestamp': window['timestamp'],
-                'station_id': window['station_id'],
-                'severity': 'MEDIUM',
-                'details': {
-                    'error_count': error_count,
-                    'total_events': len(all_events)
-                }
-            }
+        strongest = max(abs(deviation['z_score']) for deviation in deviations.values())
+        return Event(
+            event_type='UNUSUAL_PATTERN',
+            timestamp=window['timestamp'],
+            station_id=window['station_id'],
+            severity='MEDIUM' if strongest >= 2 * config.ANOMALY_Z_THRESHOLD else 'LOW',
+            details={'metrics': deviations}
+        )
+    
+    def _window_metrics(self, window: Dict, view: WindowView) -> Dict[str, float]:
+        """Values of the watched metrics that the window can measure"""
+        metrics = {
+            'transactions_per_minute': len(view.active['pos_events']) * 60 / self._window_seconds(window)
+        }
+        
+        total = view.total_events()
+        if total:
+            metrics['read_error_rate'] = view.count_status('Read Error') / total
+        
+        for metric, field in (('queue_length', 'customer_count'), ('dwell_time', 'average_dwell_time')):
+            values = [
+                event['data'][field] for event in view.active['queue_events']
+                if isinstance(event['data'].get(field), (int, float))
+            ]
+            if values:
+                metrics[metric] = sum(values) / len(values)
         
-        return None
+        return metrics
     
-    def _detect_unusual_patterns(self, window: Dict) -> Dict:
-        """
-        Detect unusual activity patterns
-        """
-        # This can be expanded based on specific pattern requirements
-        return None
+    def _window_seconds(self, window: Dict) -> float:
+        """Length of the window, or the configured length when it has none"""
+        try:
+            seconds = (datetime.fromisoformat(window.get('window_end'))
+                       - datetime.fromisoformat(window.get('window_start'))).total_seconds()
+        except (TypeError, ValueError):
+            seconds = 0
+        return seconds if seconds > 0 else self.config.TIME_WINDOW_SECONDS
+
+
+def _isoformat(timestamp: Any) -> Any:
+    """ISO string of a record timestamp, which may already be one"""
+    return timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp
@@ -0,0 +1,237 @@
+"""
+Detector Dispatcher Module
+Runs every registered detector over the synchronized windows in a single pass
+"""
+
+import heapq
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from data_processing.catalog import CatalogService
+from data_processing.window_table import WindowTable, epoch_ns
+
+from .anomaly_detector import AnomalyDetector
+from .inventory_tracker import InventoryTracker
+from .queue_optimizer import QueueOptimizer
+from .theft_detector import TheftDetector
+from .window_view import WindowView
+
+
+class DetectorDispatcher:
+    """
+    Registry of detectors fed from one walk over the windows
+    Each detector exposes update(window, view) and flush(); detectors that
+    also expose detect_batch(windows) get the whole list at once in run()
+    """
+    
+    def __init__(self):
+        self.detectors = []
+        self.logger = logging.getLogger('sentinel.dispatcher')
+    
+    def register(self, name: str, detector: Any):
+        """Register a detector; events are reported in registration order"""
+        self.detectors.append((name, detector))
+    
+    @property
+    def names(self) -> List[str]:
+        """Registered detector names in registration order"""
+        return [name for name, _ in self.detectors]
+    
+    def dispatch(self, window: Dict) -> Dict[str, List[Dict]]:
+        """Classify one window and feed it to every detector"""
+        view = WindowView(window)
+        return {name: detector.update(window, view) for name, detector in self.detectors}
+    
+    def flush(self) -> Dict[str, List[Dict]]:
+        """Collect end-of-stream events from every detector"""
+        return {name: detector.flush() for name, detector in self.detectors}
+    
+    def run(self, synchronized_data: Iterable[Dict], workers: int = 1,
+            table: WindowTable = None) -> Dict[str, List[Dict]]:
+        """
+        Run all detectors over the windows in one pass
+        `table` is the synchronizer's columnar view of the same windows, if any
+        """
+        if workers > 1:
+            return self.run_parallel(list(synchronized_data), workers)
+        
+        results = {name: [] for name in self.names}
+        
+        for name, items in self.collect(list(synchronized_data), table).items():
+            for _, events in items:
+                results[name].extend(events)
+        
+        for name, events in self.flush().items():
+            results[name].extend(events)
+        
+        return results
+    
+    def collect(self, windows: List[Dict], table: WindowTable = None) -> Dict[str, List[Tuple[int, List[Dict]]]]:
+        """
+        Events of every detector as (window position, events) pairs in window order
+        
+        Detectors with a vectorized detect_batch() see all windows in one
+        call (on `table` when given); the rest are fed window by window
+        through a shared WindowView.
+        """
+        batched = [(name, d) for name, d in self.detectors if hasattr(d, 'detect_batch')]
+        walked = [(name, d) for name, d in self.detectors if not hasattr(d, 'detect_batch')]
+        
+        collected = {name: [] for name in self.names}
+        for name, detector in batched:
+            collected[name] = sorted(detector.detect_batch(windows, table).items(), key=lambda item: item[0])
+        
+        if walked:
+            for position, window in enumerate(windows):
+                view = WindowView(window)
+                for name, detector in walked:
+                    found = detector.update(window, view)
+                    if found:
+                        collected[name].append((position, found))
+        
+        return collected
+    
+    def run_parallel(self, synchronized_data: List[Dict], workers: int) -> Dict[str, List[Dict]]:
+        """
+        Run per-station detectors on a process pool, sharded by station_id
+        
+        Each shard reports its events keyed by the window's position in the
+        input, so merging restores the exact single-process order. Detectors
+        that need the whole store (PER_STATION = False) run in this process,
+        and shard state is merged back before flush().
+        """
+        sharded = [(name, d) for name, d in self.detectors if getattr(d, 'PER_STATION', False)]
+        local = [(name, d) for name, d in self.detectors if not getattr(d, 'PER_STATION', False)]
+        
+        shards = self._shard_by_station(synchronized_data, workers)
+        if len(shards) < 2 or not sharded:
+            return self.run(synchronized_data)
+        
+        self.logger.info(f"Running {len(sharded)} detectors on {len(shards)} station shards")
+        keyed = {name: [] for name, _ in sharded}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_shard, sharded, shard) for shard in shards]
+            for future in futures:
+                shard_events, shard_detectors = future.result()
+                for name, items in shard_events.items():
+                    keyed[name].extend(items)
+                for (name, detector), (_, shard_detector) in zip(sharded, shard_detectors):
+                    detector.merge(shard_detector)
+        
+        results = {name: [] for name in self.names}
+        for name, items in keyed.items():
+            items.sort(key=lambda item: item[0])
+            for _, events in items:
+                results[name].extend(events)
+        
+        if local:
+            local_dispatcher = DetectorDispatcher()
+            for name, detector in local:
+                local_dispatcher.register(name, detector)
+            for window in synchronized_data:
+                for name, events in local_dispatcher.dispatch(window).items():
+                    results[name].extend(events)
+        
+        for name, events in self.flush().items():
+            results[name].extend(events)
+        
+        return results
+    
+    def _shard_by_station(self, synchronized_data: List[Dict], workers: int) -> List[List[Tuple[int, Dict]]]:
+        """Split (position, window) pairs into up to `workers` station shards"""
+        by_station = {}
+        for position, window in enumerate(synchronized_data):
+            by_station.setdefault(window.get('station_id'), []).append((position, window))
+        
+        shards = [[] for _ in range(min(workers, len(by_station)))]
+        for i, station in enumerate(sorted(by_station, key=str)):
+            shards[i % len(shards)].extend(by_station[station])
+        return shards
+    
+    def stream(self, windows: Iterable[Dict], counts: Dict[str, int]) -> Iterator[Dict]:
+        """
+        Feed windows to every detector as they arrive and yield their events
+        
+        Windows arrive in start order, but a detector's flush() may stamp
+        an event earlier than the current window (an item still in the
+        scan area is reported at its last read). Events are therefore held
+        in a heap and released once they are older than both the current
+        window and every detector's earliest_pending(), in timestamp order
+        and then registration order, so the output order matches run()
+        while only the events that could still be preceded are kept.
+        """
+        held = []
+        untimed = []
+        sequence = count()
+        
+        def hold(index: int, name: str, events: List[Dict]):
+            for event in events:
+                timestamp = event.get('timestamp')
+                item = (timestamp, index, next(sequence), epoch_ns(timestamp), name, event)
+                if timestamp:
+                    heapq.heappush(held, item)
+                else:
+                    untimed.append(item)
+        
+        def release(before_ns: Optional[int]) -> Iterator[Dict]:
+            while held and (before_ns is None or held[0][3] < before_ns):
+                _, _, _, _, name, event = heapq.heappop(held)
+                counts[name] = counts.get(name, 0) + 1
+                yield event
+        
+        for window in windows:
+            for index, (name, events) in enumerate(self.dispatch(window).items()):
+                hold(index, name, events)
+            yield from release(min([epoch_ns(window['timestamp'])] + self._earliest_pending()))
+        
+        for index, (name, events) in enumerate(self.flush().items()):
+            hold(index, name, events)
+        yield from release(None)
+        
+        # Untimed (summary) events go last, in registration order
+        untimed.sort(key=lambda item: item[1:3])
+        for _, _, _, _, name, event in untimed:
+            counts[name] = counts.get(name, 0) + 1
+            yield event
+    
+    def _earliest_pending(self) -> List[int]:
+        """Earliest timestamps (epoch ns) detectors may still stamp a flushed event with"""
+        pending = []
+        for _, detector in self.detectors:
+            earliest = getattr(detector, 'earliest_pending', None)
+            time_ns = earliest() if earliest is not None else None
+            if time_ns is not None:
+                pending.append(time_ns)
+        return pending
+
+
+def _run_shard(detectors: List[Tuple[str, Any]],
+               shard: List[Tuple[int, Dict]]) -> Tuple[Dict[str, List], List[Tuple[str, Any]]]:
+    """Process pool task: run detectors over one station shard"""
+    dispatcher = DetectorDispatcher()
+    for name, detector in detectors:
+        dispatcher.register(name, detector)
+    
+    positions = [position for position, _ in shard]
+    collected = dispatcher.collect([window for _, window in shard])
+    events = {
+        name: [(positions[index], found) for index, found in items]
+        for name, items in collected.items()
+    }
+    
+    return events, dispatcher.detectors
+
+
+def create_default_dispatcher(config, catalog: CatalogService = None) -> DetectorDispatcher:
+    """
+    Build a dispatcher with the standard Sentinel detectors
+    The product catalog, when given, enables weight and price verification
+    """
+    dispatcher = DetectorDispatcher()
+    dispatcher.register('theft', TheftDetector(config, catalog))
+    dispatcher.register('anomaly', AnomalyDetector(config))
+    dispatcher.register('queue', QueueOptimizer(config))
+    dispatcher.register('inventory', InventoryTracker(config))
+    return dispatcher
@@ -0,0 +1,157 @@
+"""
+EPC Tracker Module
+Per-station state of the RFID tags in the scan area, one entry per physical item
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_processing.window_table import epoch_ns
+
+
+def tag_key(data: Dict) -> Any:
+    """Identity of the item behind a read: its EPC, or its SKU for untagged reads"""
+    epc = data.get('epc')
+    return epc if epc is not None else data.get('sku')
+
+
+class TagVisit:
+    """One stay of a tag in a station's scan area"""
+    
+    __slots__ = ('epc', 'sku', 'entered', 'entered_ns', 'last_seen', 'last_seen_ns', 'matched')
+    
+    def __init__(self, epc: Any, sku: Any, entered: Any, entered_ns: int):
+        self.epc = epc
+        self.sku = sku
+        self.entered = entered
+        self.entered_ns = entered_ns
+        self.last_seen = entered
+        self.last_seen_ns = entered_ns
+        # Set once a POS line for the SKU falls within the visit
+        self.matched = False
+    
+    def sort_key(self) -> Tuple:
+        """Order of closed visits: by last read, then entry, then tag"""
+        return (self.last_seen_ns, self.entered_ns, str(self.epc), str(self.sku))
+
+
+class EpcTracker:
+    """
+    Hash map of the tags each station's reader sees in the scan area
+    
+    Readers report a tag many times while it sits in the scan area. A read
+    extends the tag's current visit; a read more than the TTL after the
+    previous one closes it and starts a new visit (the item left and came
+    back). A POS line for the tag's SKU within the TTL of the visit marks
+    it matched. Visits unseen for longer than the TTL are closed as the
+    station's clock moves on, so state scales with the items in the area
+    rather than with raw reads, and every visit is handed back exactly once
+    when it closes.
+    """
+    
+    def __init__(self, ttl_seconds: float):
+        self.ttl_ns = int(ttl_seconds * 1_000_000_000)
+        self.tags: Dict[str, Dict[Any, TagVisit]] = defaultdict(dict)
+        self.newest: Dict[str, int] = {}
+        # Latest POS scan time of each SKU per station, kept for one TTL
+        self.scans: Dict[str, Dict[Any, int]] = defaultdict(dict)
+        self.exited = 0
+    
+    # @algorithm TTL Tag Tracking | Reads extend a visit until the tag goes quiet for the TTL
+    def observe(self, station: str, reads: List[Dict], scans: List[Tuple[int, Any]] = ()) -> List[TagVisit]:
+        """
+        Feed a window's scan-area reads and (time ns, SKU) POS lines for a station
+        Returns the visits closed because their tag came back after the TTL
+        
+        Reads older than the newest one already seen at the station were
+        applied with an earlier window (overlapping windows repeat them).
+        The rest are applied in time order together with the POS lines,
+        a line before a read at the same instant; re-applying either is
+        harmless.
+        """
+        newest = self.newest.get(station)
+        fresh = []
+        for read in reads:
+            time_ns = epoch_ns(read.get('timestamp'))
+            if time_ns is not None and (newest is None or time_ns >= newest):
+                fresh.append((time_ns, 1, read))
+        if not fresh and not scans:
+            return []
+        
+        tags = self.tags[station]
+        latest = self.scans[station]
+        closed = []
+        for time_ns, kind, item in sorted(fresh + [(time_ns, 0, sku) for time_ns, sku in scans],
+                                          key=lambda entry: entry[:2]):
+            if kind == 0:
+                self._scanned(tags, latest, time_ns, item)
+                continue
+            data = item['data']
+            key = tag_key(data)
+            visit = tags.get(key)
+            if visit is None or time_ns - visit.last_seen_ns > self.ttl_ns:
+                if visit is not None:
+                    closed.append(visit)
+                visit = tags[key] = TagVisit(data.get('epc'), data.get('sku'), item.get('timestamp'), time_ns)
+                # The item may have been scanned just before the reader saw it
+                scanned_ns = latest.get(visit.sku)
+                visit.matched = scanned_ns is not None and time_ns - scanned_ns <= self.ttl_ns
+            elif time_ns > visit.last_seen_ns:
+                visit.last_seen, visit.last_seen_ns = item.get('timestamp'), time_ns
+        
+        if fresh:
+            self.newest[station] = max(entry[0] for entry in fresh)
+        self.exited += len(closed)
+        return closed
+    
+    def expire(self, station: str, now_ns: int) -> List[TagVisit]:
+        """
+        Close the station's visits not read within the TTL before `now_ns`
+        Records still to come are no older than `now_ns` (the start of the
+        window being processed), so nothing can extend or match these visits
+        """
+        cutoff = now_ns - self.ttl_ns
+        tags = self.tags[station]
+        stale = [key for key, visit in tags.items() if visit.last_seen_ns < cutoff]
+        closed = [tags.pop(key) for key in stale]
+        
+        scans = self.scans[station]
+        for sku in [sku for sku, time_ns in scans.items() if time_ns < cutoff]:
+            del scans[sku]
+        
+        self.exited += len(closed)
+        return sorted(closed, key=TagVisit.sort_key)
+    
+    def close_all(self) -> List[Tuple[str, TagVisit]]:
+        """Close every visit still open, over all stations, as (station, visit) pairs"""
+        closed = [(station, visit) for station, tags in self.tags.items() for visit in tags.values()]
+        self.tags = defaultdict(dict)
+        self.exited += len(closed)
+        return sorted(closed, key=lambda item: (item[1].sort_key(), str(item[0])))
+    
+    def earliest_seen(self) -> Optional[int]:
+        """Earliest last read (epoch ns) of the visits still open, over all stations"""
+        return min((visit.last_seen_ns for tags in self.tags.values() for visit in tags.values()), default=None)
+    
+    def active_count(self) -> int:
+        """Number of tags currently in a scan area, over all stations"""
+        return sum(len(tags) for tags in self.tags.values())
+    
+    def merge(self, other: 'EpcTracker'):
+        """Absorb the stations tracked by another shard"""
+        for station, tags in other.tags.items():
+            self.tags[station].update(tags)
+        for station, scans in other.scans.items():
+            self.scans[station].update(scans)
+        for station, newest in other.newest.items():
+            if station not in self.newest or newest > self.newest[station]:
+                self.newest[station] = newest
+        self.exited += other.exited
+    
+    def _scanned(self, tags: Dict[Any, TagVisit], latest: Dict[Any, int], time_ns: int, sku: Any):
+        """Match a POS line to the open visits of its SKU it falls within the TTL of"""
+        if time_ns > latest.get(sku, time_ns - 1):
+            latest[sku] = time_ns
+        for visit in tags.values():
+            if visit.sku == sku and visit.entered_ns - self.ttl_ns <= time_ns <= visit.last_seen_ns + self.ttl_ns:
+                visit.matched = True
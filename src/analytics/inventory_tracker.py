@@ -7,21 +7,62 @@ import logging
 from typing import Dict, List, Any
 from collections import defaultdict
 
+from events.event import Event
+
+from .window_view import HighWaterMark, WindowView
+
 
 class InventoryTracker:
     """Tracks inventory and detects discrepancies"""
     
+    # Inventory is store-wide and must see every station's windows
+    PER_STATION = False
+    
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('sentinel.inventory_tracker')
         self.shrinkage_threshold = 0.02  # 2% threshold
+        self.inventory = self._new_inventory_state()
+        self._sales_seen = HighWaterMark()
+        self._snapshot_key = None
     
     def track(self, synchronized_data: List[Dict]) -> List[Dict]:
         """Track inventory and detect issues"""
-        events = []
+        for window in synchronized_data:
+            self.update(window)
         
-        # Build expected vs actual inventory
-        inventory_state = self._build_inventory_state(synchronized_data)
+        return self.flush()
+    
+    # @algorithm Inventory Reconciliation | Compares expected vs actual inventory
+    def update(self, window: Dict, view: WindowView = None) -> List[Dict]:
+        """
+        Apply a single window to the running inventory state
+        Each sale is counted once and each snapshot applied once, so the
+        cost does not depend on how much history has been seen
+        """
+        view = view or WindowView(window)
+        station = window['station_id']
+        self._apply_sales(self.inventory, window, self._sales_seen.fresh(station, view.active['pos_events']))
+        
+        # Windows share their snapshot until a newer one is taken
+        snapshot = window.get('inventory_snapshot', {})
+        snapshot_key = snapshot.get('timestamp') if snapshot else None
+        if snapshot and (snapshot_key is None or snapshot_key != self._snapshot_key):
+            self._snapshot_key = snapshot_key
+            self._apply_snapshot(self.inventory, snapshot)
+        return []
+    
+    def flush(self) -> List[Dict]:
+        """Detect issues in the accumulated inventory state and reset it"""
+        inventory_state = dict(self.inventory)
+        self.inventory = self._new_inventory_state()
+        self._sales_seen = HighWaterMark()
+        self._snapshot_key = None
+        return self._detect_issues(inventory_state)
+    
+    def _detect_issues(self, inventory_state: Dict) -> List[Dict]:
+        """Detect discrepancies and shrinkage in an inventory state"""
+        events = []
         
         # Detect discrepancies
         discrepancies = self._detect_discrepancies(inventory_state)
@@ -33,34 +74,27 @@ class InventoryTracker:
         
         return events
     
-    # @algorithm Inventory Reconciliation | Compares expected vs actual inventory
-    def _build_inventory_state(self, synchronized_data: List[Dict]) -> Dict:
-        """
-        Build inventory state by tracking all transactions and snapshots
-        """
-        inventory = defaultdict(lambda: {'expected': 0, 'actual': 0, 'transactions': []})
-        
-        for window in synchronized_data:
-            # Process POS transactions (items sold)
-            pos_events = window.get('pos_events', [])
-            for event in pos_events:
-                if event.get('status') == 'Active' and event.get('data'):
-                    sku = event['data'].get('sku')
-                    if sku:
-                        inventory[sku]['transactions'].append({
-                            'timestamp': window['timestamp'],
-                            'type': 'sale',
-                            'station': window['station_id']
-                        })
-            
-            # Process inventory snapshots
-            snapshot = window.get('inventory_snapshot', {})
-            if snapshot and snapshot.get('data'):
-                for sku, quantity in snapshot['data'].items():
-                    if isinstance(quantity, (int, float)):
-                        inventory[sku]['actual'] = quantity
-        
-        return dict(inventory)
+    def _new_inventory_state(self) -> Dict:
+        """Create an empty per-SKU inventory state"""
+        return defaultdict(lambda: {'expected': 0, 'actual': 0, 'sold': 0, 'last_sale': None})
+    
+    def _apply_sales(self, inventory: Dict, window: Dict, pos_events: List[Dict]):
+        """Count POS transactions (items sold) into the per-SKU totals"""
+        for event in pos_events:
+            sku = event['data'].get('sku')
+            if sku:
+                inventory[sku]['sold'] += 1
+                inventory[sku]['last_sale'] = {
+                    'timestamp': window['timestamp'],
+                    'station': window['station_id']
+                }
+    
+    def _apply_snapshot(self, inventory: Dict, snapshot: Dict):
+        """Take actual quantities from an inventory snapshot"""
+        if snapshot and snapshot.get('data'):
+            for sku, quantity in snapshot['data'].items():
+                if isinstance(quantity, (int, float)):
+                    inventory[sku]['actual'] = quantity
     
     # @algorithm Discrepancy Detection | Identifies inventory mismatches
     def _detect_discrepancies(self, inventory_state: Dict) -> List[Dict]:
@@ -78,19 +112,19 @@ class InventoryTracker:
                 discrepancy_rate = abs(expected - actual) / expected
                 
                 if discrepancy_rate > self.shrinkage_threshold:
-                    events.append({
-                        'event_type': 'INVENTORY_DISCREPANCY',
-                        'timestamp': None,  # Summary event
-                        'station_id': 'ALL',
-                        'severity': 'MEDIUM',
-                        'details': {
+                    events.append(Event(
+                        event_type='INVENTORY_DISCREPANCY',
+                        timestamp=None,  # Summary event
+                        station_id='ALL',
+                        severity='MEDIUM',
+                        details={
                             'sku': sku,
                             'expected': expected,
                             'actual': actual,
                             'difference': expected - actual,
                             'discrepancy_rate': discrepancy_rate
                         }
-                    })
+                    ))
         
         return events
     
@@ -113,16 +147,16 @@ class InventoryTracker:
                 items_with_shrinkage += 1
         
         if items_with_shrinkage > 5:  # Threshold for pattern
-            events.append({
-                'event_type': 'INVENTORY_SHRINKAGE',
-                'timestamp': None,
-                'station_id': 'ALL',
-                'severity': 'HIGH',
-                'details': {
+            events.append(Event(
+                event_type='INVENTORY_SHRINKAGE',
+                timestamp=None,
+                station_id='ALL',
+                severity='HIGH',
+                details={
                     'affected_items': items_with_shrinkage,
                     'total_units_lost': total_discrepancy,
                     'pattern': 'Widespread shrinkage detected'
                 }
-            })
+            ))
         
         return events
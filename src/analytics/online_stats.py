@@ -0,0 +1,190 @@
+"""
+Online Statistics Module
+Constant-memory running statistics for detectors that never hold history
+"""
+
+import bisect
+import math
+from typing import Dict, List, Optional
+
+
+class Welford:
+    """Running count, mean and variance in one pass (Welford's method)"""
+    
+    __slots__ = ('count', 'mean', 'm2')
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    # @algorithm Welford Variance | Numerically stable single-pass mean and variance
+    def add(self, value: float):
+        """Fold one observation into the running moments"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    def std(self) -> float:
+        """Sample standard deviation, 0 until there are two observations"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class Ewma:
+    """Exponentially weighted moving average, the recent level of a metric"""
+    
+    __slots__ = ('alpha', 'value')
+    
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+    
+    def add(self, value: float):
+        """Move the level towards a new observation"""
+        self.value = value if self.value is None else self.alpha * value + (1 - self.alpha) * self.value
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile from five markers (the P² algorithm)
+    
+    The markers track the minimum, the maximum, the quantile itself and the
+    two midpoints around it. Every observation nudges the inner markers
+    towards their ideal positions along a piecewise-parabolic fit, so the
+    estimate costs O(1) time and memory however long the stream runs.
+    """
+    
+    __slots__ = ('p', 'count', 'heights', 'positions', 'increments')
+    
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        # Desired positions of the inner markers grow linearly with the
+        # count, so they are computed from it instead of being stored
+        self.increments = (p / 2, p, (1 + p) / 2)
+    
+    # @algorithm P-Square Quantile | Jain & Chlamtac five-marker quantile estimator
+    def add(self, value: float):
+        """Fold one observation into the markers"""
+        self.count += 1
+        heights = self.heights
+        if len(heights) < 5:
+            bisect.insort(heights, value)
+            return
+        
+        positions = self.positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = bisect.bisect_right(heights, value) - 1
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        
+        extra = self.count - 1
+        for i in (1, 2, 3):
+            offset = 1 + extra * self.increments[i - 1] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+    
+    def value(self) -> Optional[float]:
+        """Current estimate, exact while fewer than five values were seen"""
+        if not self.heights:
+            return None
+        if self.count < 5:
+            return self.heights[min(int(self.p * len(self.heights)), len(self.heights) - 1)]
+        return self.heights[2]
+    
+    def _parabolic(self, i: int, step: int) -> float:
+        """Piecewise-parabolic prediction of marker i moved by one position"""
+        h, n = self.heights, self.positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+
+class RollingQuantile:
+    """
+    Quantile over roughly the last `span` to 2 * `span` observations
+    
+    Two P² sketches take turns: the current one fills while the previous,
+    complete one answers queries, and every `span` observations the current
+    sketch becomes the previous one. Old behaviour ages out with bounded
+    memory.
+    """
+    
+    __slots__ = ('p', 'span', 'current', 'previous')
+    
+    def __init__(self, p: float, span: int):
+        self.p = p
+        self.span = span
+        self.current = P2Quantile(p)
+        self.previous: Optional[P2Quantile] = None
+    
+    def add(self, value: float):
+        """Fold one observation into the current sketch, rotating when it is full"""
+        self.current.add(value)
+        if self.current.count >= self.span:
+            self.previous = self.current
+            self.current = P2Quantile(self.p)
+    
+    def value(self) -> Optional[float]:
+        """Estimate from the last complete sketch, or the filling one before that"""
+        return (self.previous or self.current).value()
+
+
+class MetricMonitor:
+    """
+    Online baseline of one metric and the test for deviations from it
+    
+    Welford moments give the metric's spread, an EWMA its recent level and
+    a pair of rolling quantiles its usual band. A value deviates when it is
+    `z_threshold` standard deviations from the recent level and also
+    outside the band, once `warmup` values have been seen.
+    """
+    
+    __slots__ = ('moments', 'level', 'low', 'high')
+    
+    def __init__(self, alpha: float, quantiles: tuple, span: int):
+        self.moments = Welford()
+        self.level = Ewma(alpha)
+        self.low = RollingQuantile(quantiles[0], span)
+        self.high = RollingQuantile(quantiles[1], span)
+    
+    def observe(self, value: float, z_threshold: float, warmup: int) -> Optional[Dict]:
+        """
+        Test a value against the baseline so far, then fold it in
+        Returns the deviation details, or None when the value is usual
+        """
+        deviation = None
+        std = self.moments.std()
+        if self.moments.count >= warmup and std > 0:
+            z_score = (value - self.level.value) / std
+            if abs(z_score) >= z_threshold:
+                low, high = self.low.value(), self.high.value()
+                if value < low or value > high:
+                    deviation = {
+                        'value': round(value, 3),
+                        'expected': round(self.level.value, 3),
+                        'z_score': round(z_score, 2),
+                        'band': [round(low, 3), round(high, 3)]
+                    }
+        
+        self.moments.add(value)
+        self.level.add(value)
+        self.low.add(value)
+        self.high.add(value)
+        return deviation
@@ -0,0 +1,127 @@
+"""
+Outage Tracker Module
+Crash readings merged into one outage interval per station and system
+"""
+
+from typing import Any, Dict, List, Optional
+
+from data_processing.window_table import epoch_ns
+
+from .window_view import HighWaterMark, WindowView
+
+
+# Window sources and the system each one reports on
+SYSTEMS = (
+    ('pos_events', 'POS'),
+    ('recognition_events', 'Recognition'),
+    ('rfid_events', 'RFID'),
+    ('queue_events', 'Queue'),
+)
+
+
+class Outage:
+    """One run of crash (or read error) readings from a station's system"""
+    
+    __slots__ = ('station', 'system', 'start', 'end', 'start_ns', 'end_ns', 'records')
+    
+    def __init__(self, station: str, system: str, start: Any, start_ns: int):
+        self.station = station
+        self.system = system
+        self.start = start
+        self.end = start
+        self.start_ns = start_ns
+        self.end_ns = start_ns
+        self.records = 1
+    
+    @property
+    def duration_seconds(self) -> float:
+        """Time from the first to the last reading of the run"""
+        return (self.end_ns - self.start_ns) / 1_000_000_000
+
+
+class OutageTracker:
+    """
+    Open outages per station and system, closed as the systems recover
+    
+    A reading with the tracked status (a crash by default) opens an outage
+    or extends the open one. The outage closes when the system reports
+    any other status, or when no such reading follows within the merge
+    gap. Readings repeated by overlapping windows are applied once, so a
+    long outage becomes a single interval however many windows it spans.
+    """
+    
+    def __init__(self, gap_seconds: float, status: str = 'System Crash'):
+        self.gap_ns = int(gap_seconds * 1_000_000_000)
+        self.status = status
+        self.open: Dict[str, Dict[str, Outage]] = {}
+        self._seen = {source: HighWaterMark() for source, _ in SYSTEMS}
+    
+    # @algorithm Interval Merging | Consecutive readings of the tracked status extend one outage
+    def observe(self, window: Dict, view: WindowView) -> List[Outage]:
+        """Apply a window's readings and return the outages that closed"""
+        station = window['station_id']
+        opened = self.open.get(station, {})
+        closed = []
+        
+        for source, system in SYSTEMS:
+            # Sources without the status only matter while their system is down
+            if system not in opened and not view.with_status(source, self.status):
+                continue
+            
+            # Untimed readings are placed at the window's own timestamp
+            readings = []
+            for record in self._seen[source].fresh(station, view.events[source]):
+                timestamp = record.get('timestamp')
+                time_ns = epoch_ns(timestamp)
+                if time_ns is None:
+                    timestamp, time_ns = window['timestamp'], epoch_ns(window['timestamp'])
+                if time_ns is not None:
+                    readings.append((time_ns, timestamp, record.get('status')))
+            readings.sort(key=lambda reading: reading[0])
+            
+            for time_ns, timestamp, status in readings:
+                outage = opened.get(system)
+                if status != self.status:
+                    if outage is not None:
+                        closed.append(opened.pop(system))
+                elif outage is not None and time_ns - outage.end_ns <= self.gap_ns:
+                    if time_ns >= outage.end_ns:
+                        outage.end, outage.end_ns = timestamp, time_ns
+                    outage.records += 1
+                else:
+                    if outage is not None:
+                        closed.append(opened.pop(system))
+                    opened[system] = Outage(station, system, timestamp, time_ns)
+        
+        # Systems that went quiet for longer than the gap are not down any more
+        window_ns = epoch_ns(window['timestamp']) if opened else None
+        if window_ns is not None:
+            for system in [system for system, outage in opened.items()
+                           if window_ns - outage.end_ns > self.gap_ns]:
+                closed.append(opened.pop(system))
+        
+        if opened:
+            self.open[station] = opened
+        else:
+            self.open.pop(station, None)
+        return closed
+    
+    def close_all(self) -> List[Outage]:
+        """Close every outage still open, earliest first"""
+        outages = [outage for opened in self.open.values() for outage in opened.values()]
+        self.open = {}
+        return sorted(outages, key=lambda outage: (outage.start_ns, str(outage.station), outage.system))
+    
+    def merge(self, other: 'OutageTracker'):
+        """Absorb the stations tracked by another shard"""
+        self.open.update(other.open)
+        for source, seen in other._seen.items():
+            self._seen[source].merge(seen)
+    
+    def earliest_start(self) -> Optional[int]:
+        """Start (epoch ns) of the earliest outage still open, over all stations"""
+        return min((outage.start_ns for opened in self.open.values() for outage in opened.values()), default=None)
+    
+    def open_count(self) -> int:
+        """Number of outages currently open, over all stations"""
+        return sum(len(opened) for opened in self.open.values())
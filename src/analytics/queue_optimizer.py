@@ -7,86 +7,129 @@ import logging
 from typing import Dict, List, Any
 from collections import defaultdict
 
+from events.event import Event
+
+from .window_view import HighWaterMark, WindowView
+
 
 class QueueOptimizer:
     """Optimizes queue management and resource allocation"""
     
+    # Events depend only on each window's own station, so shards can run apart
+    PER_STATION = True
+    
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('sentinel.queue_optimizer')
         self.max_dwell_time = 180  # 3 minutes
         self.target_customers_per_station = 6
+        self.queue_summary = self._new_queue_summary()
+        self._readings_seen = HighWaterMark()
     
     def analyze(self, synchronized_data: List[Dict]) -> List[Dict]:
         """Analyze queue data and generate optimization insights"""
         events = []
         
-        # Aggregate queue data by timestamp
-        queue_summary = self._aggregate_queue_data(synchronized_data)
-        
         for window in synchronized_data:
-            # Detect long wait times
-            wait_time_event = self._detect_long_wait_times(window)
-            if wait_time_event:
-                events.append(wait_time_event)
-            
-            # Check station allocation
-            allocation_event = self._check_station_allocation(window, queue_summary)
-            if allocation_event:
-                events.append(allocation_event)
+            events.extend(self.update(window))
         
         # Generate staffing recommendations
-        staffing_events = self._generate_staffing_recommendations(queue_summary)
-        events.extend(staffing_events)
+        events.extend(self.flush())
+        
+        return events
+    
+    def update(self, window: Dict, view: WindowView = None) -> List[Dict]:
+        """Analyze a single window and add it to the running queue summary"""
+        events = []
+        view = view or WindowView(window)
+        
+        # Fold new readings into the running per-station summary
+        station = window['station_id']
+        for event in self._readings_seen.fresh(station, view.active['queue_events']):
+            self._add_reading(self.queue_summary[station], event['data'])
+        
+        # Detect long wait times
+        wait_time_event = self._detect_long_wait_times(window, view)
+        if wait_time_event:
+            events.append(wait_time_event)
+        
+        # Check station allocation
+        allocation_event = self._check_station_allocation(window, self.queue_summary, view)
+        if allocation_event:
+            events.append(allocation_event)
         
         return events
     
+    def flush(self) -> List[Dict]:
+        """Generate staffing recommendations and reset the running summary"""
+        queue_summary = dict(self.queue_summary)
+        self.queue_summary = self._new_queue_summary()
+        self._readings_seen = HighWaterMark()
+        return self._generate_staffing_recommendations(queue_summary)
+    
+    def merge(self, other: 'QueueOptimizer'):
+        """Absorb the queue summary of an optimizer that ran on another station shard"""
+        for station, stats in other.queue_summary.items():
+            totals = self.queue_summary[station]
+            totals['readings'] += stats['readings']
+            totals['total_customers'] += stats['total_customers']
+            totals['total_dwell_time'] += stats['total_dwell_time']
+            totals['max_customers'] = max(totals['max_customers'], stats['max_customers'])
+        self._readings_seen.merge(other._readings_seen)
+    
+    def _new_queue_summary(self) -> Dict:
+        """Create an empty per-station queue summary"""
+        # A module-level factory keeps the summary picklable for process shards
+        return defaultdict(_new_station_stats)
+    
+    def _add_reading(self, stats: Dict, data: Dict):
+        """Add one queue camera reading to a station's running totals"""
+        customers = data.get('customer_count', 0)
+        stats['readings'] += 1
+        stats['total_customers'] += customers
+        stats['total_dwell_time'] += data.get('average_dwell_time', 0)
+        stats['max_customers'] = max(stats['max_customers'], customers)
+    
     # @algorithm Queue Length Analysis | Monitors and flags excessive queue lengths
-    def _detect_long_wait_times(self, window: Dict) -> Dict:
+    def _detect_long_wait_times(self, window: Dict, view: WindowView) -> Dict:
         """
         Detect situations with excessively long customer wait times
         """
-        queue_events = window.get('queue_events', [])
-        
-        for event in queue_events:
-            if event.get('status') == 'Active' and event.get('data'):
-                data = event['data']
-                dwell_time = data.get('average_dwell_time', 0)
-                customer_count = data.get('customer_count', 0)
-                
-                if dwell_time > self.max_dwell_time:
-                    return {
-                        'event_type': 'LONG_WAIT_TIME',
-                        'timestamp': window['timestamp'],
-                        'station_id': window['station_id'],
-                        'severity': 'HIGH',
-                        'details': {
-                            'average_dwell_time': dwell_time,
-                            'customer_count': customer_count,
-                            'threshold': self.max_dwell_time
-                        }
+        for event in view.active['queue_events']:
+            data = event['data']
+            dwell_time = data.get('average_dwell_time', 0)
+            customer_count = data.get('customer_count', 0)
+            
+            if dwell_time > self.max_dwell_time:
+                return Event(
+                    event_type='LONG_WAIT_TIME',
+                    timestamp=window['timestamp'],
+                    station_id=window['station_id'],
+                    severity='HIGH',
+                    details={
+                        'average_dwell_time': dwell_time,
+                        'customer_count': customer_count,
+                        'threshold': self.max_dwell_time
                     }
+                )
         
         return None
     
     # @algorithm Dynamic Station Allocation | Optimizes active checkout stations
-    def _check_station_allocation(self, window: Dict, queue_summary: Dict) -> Dict:
+    def _check_station_allocation(self, window: Dict, queue_summary: Dict, view: WindowView) -> Dict:
         """
         Check if current station allocation is optimal
         Recommends opening/closing stations based on customer flow
         """
-        queue_events = window.get('queue_events', [])
-        
-        if not queue_events:
+        if not view.events['queue_events']:
             return None
         
         total_customers = 0
-        for event in queue_events:
-            if event.get('status') == 'Active' and event.get('data'):
-                total_customers += event['data'].get('customer_count', 0)
+        for event in view.active['queue_events']:
+            total_customers += event['data'].get('customer_count', 0)
         
         # Count active stations
-        active_stations = len([e for e in queue_events if e.get('status') == 'Active'])
+        active_stations = len(view.with_status('queue_events', 'Active'))
         
         if active_stations == 0:
             return None
@@ -95,33 +138,33 @@ class QueueOptimizer:
         
         # Recommend changes if ratio is off
         if customers_per_station > self.target_customers_per_station * 1.5:
-            return {
-                'event_type': 'STATION_ALLOCATION',
-                'timestamp': window['timestamp'],
-                'station_id': window['station_id'],
-                'severity': 'MEDIUM',
-                'details': {
+            return Event(
+                event_type='STATION_ALLOCATION',
+                timestamp=window['timestamp'],
+                station_id=window['station_id'],
+                severity='MEDIUM',
+                details={
                     'action': 'OPEN_STATION',
                     'current_stations': active_stations,
                     'total_customers': total_customers,
                     'customers_per_station': customers_per_station,
                     'target_ratio': self.target_customers_per_station
                 }
-            }
+            )
         elif customers_per_station < self.target_customers_per_station * 0.5 and active_stations > 1:
-            return {
-                'event_type': 'STATION_ALLOCATION',
-                'timestamp': window['timestamp'],
-                'station_id': window['station_id'],
-                'severity': 'LOW',
-                'details': {
+            return Event(
+                event_type='STATION_ALLOCATION',
+                timestamp=window['timestamp'],
+                station_id=window['station_id'],
+                severity='LOW',
+                details={
                     'action': 'CLOSE_STATION',
                     'current_stations': active_stations,
                     'total_customers': total_customers,
                     'customers_per_station': customers_per_station,
                     'target_ratio': self.target_customers_per_station
                 }
-            }
+            )
         
         return None
     
@@ -136,15 +179,8 @@ class QueueOptimizer:
         # This is a simplified version - can be enhanced with ML
         
         return events
-    
-    def _aggregate_queue_data(self, synchronized_data: List[Dict]) -> Dict:
-        """Aggregate queue data for analysis"""
-        summary = defaultdict(list)
-        
-        for window in synchronized_data:
-            queue_events = window.get('queue_events', [])
-            for event in queue_events:
-                if event.get('status') == 'Active' and event.get('data'):
-                    summary[window['timestamp']].append(event['data'])
-        
-        return dict(summary)
+
+
+def _new_station_stats() -> Dict:
+    """Empty running queue totals for one station"""
+    return {'readings': 0, 'total_customers': 0, 'total_dwell_time': 0.0, 'max_customers': 0}
@@ -1,153 +1,414 @@
 """
 Theft Detection Module
-Detects scan avoidance, barcode switching, and weight discrepancies
+Detects scan avoidance, barcode switching, and weight and price discrepancies
 """
 
 import logging
-from typing import Dict, List, Any
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data_processing.catalog import CatalogService
+from data_processing.window_table import WindowTable, epoch_ns
+from events.event import Event
+
+from .epc_tracker import EpcTracker, TagVisit, tag_key
+from .window_view import WindowView
 
 
 class TheftDetector:
     """Detects potential theft incidents at self-checkout"""
     
-    def __init__(self, config):
+    # Events depend only on each window's own station, so shards can run apart
+    PER_STATION = True
+    
+    # Sources read by the vectorized detect_batch()
+    BATCH_SOURCES = ('rfid_events', 'pos_events', 'recognition_events')
+    
+    def __init__(self, config, catalog: CatalogService = None):
         self.config = config
         self.logger = logging.getLogger('sentinel.theft_detector')
-        self.weight_tolerance = 0.05  # 5% tolerance
+        # Without a catalog only zero weights can be flagged
+        self.catalog = catalog if catalog is not None else CatalogService()
+        self.weight_tolerance = config.WEIGHT_TOLERANCE
+        self.price_tolerance = config.PRICE_TOLERANCE
+        self.confidence_threshold = config.RECOGNITION_CONFIDENCE_THRESHOLD
+        self.tags = EpcTracker(config.RFID_TAG_TTL_SECONDS)
     
     def detect(self, synchronized_data: List[Dict]) -> List[Dict]:
         """Detect all types of theft incidents"""
         events = []
         
         for window in synchronized_data:
-            # Detect scan avoidance
-            scan_avoidance = self._detect_scan_avoidance(window)
-            if scan_avoidance:
-                events.append(scan_avoidance)
-            
-            # Detect barcode switching
-            barcode_switch = self._detect_barcode_switching(window)
-            if barcode_switch:
-                events.append(barcode_switch)
-            
-            # Detect weight discrepancies
-            weight_issues = self._detect_weight_discrepancy(window)
-            if weight_issues:
-                events.append(weight_issues)
+            events.extend(self.update(window))
         
+        events.extend(self.flush())
         return events
     
+    def update(self, window: Dict, view: WindowView = None) -> List[Dict]:
+        """Detect theft incidents in a single window as it arrives"""
+        events = []
+        view = view or WindowView(window)
+        
+        # Detect scan avoidance, one event per unscanned item
+        events.extend(self._detect_scan_avoidance(window, view))
+        
+        # Detect barcode switching
+        barcode_switch = self._detect_barcode_switching(window, view)
+        if barcode_switch:
+            events.append(barcode_switch)
+        
+        # Detect weight discrepancies
+        weight_issues = self._detect_weight_discrepancy(window, view)
+        if weight_issues:
+            events.append(weight_issues)
+        
+        # Detect prices that differ from the catalog
+        price_issues = self._detect_price_discrepancy(window, view)
+        if price_issues:
+            events.append(price_issues)
+        
+        return events
+    
+    def detect_batch(self, windows: Sequence[Dict], table: WindowTable = None) -> Dict[int, List[Dict]]:
+        """
+        Vectorized update() over a whole list of windows
+        
+        Works on the synchronizer's columnar WindowTable when given one and
+        builds it from the windows otherwise. Returns the events of every
+        window that has any, keyed by the window's position and in the same
+        order update() would emit them.
+        """
+        if table is None:
+            table = WindowTable.from_windows(windows, self.BATCH_SOURCES)
+        rfid = np.flatnonzero(table.active('rfid_events'))
+        pos = np.flatnonzero(table.active('pos_events'))
+        recognition = np.flatnonzero(table.active('recognition_events'))
+        
+        # One integer code per SKU across all systems, so (window, SKU)
+        # pairs become single int64 keys that NumPy can join
+        codes, skus = pd.factorize(np.concatenate([
+            table.column('rfid_events', 'sku')[rfid],
+            table.column('pos_events', 'sku')[pos],
+            table.column('recognition_events', 'predicted_product')[recognition],
+        ]), use_na_sentinel=False)
+        width = max(len(skus), 1)
+        rfid_keys, pos_keys, recognition_keys = np.split(
+            np.concatenate([table.window_ids('rfid_events')[rfid], table.window_ids('pos_events')[pos],
+                            table.window_ids('recognition_events')[recognition]]) * width + codes,
+            [len(rfid), len(rfid) + len(pos)]
+        )
+        
+        found = defaultdict(list)
+        self._scan_avoidance_batch(windows, table, rfid, pos, found)
+        
+        accuracy = pd.to_numeric(table.column('recognition_events', 'accuracy')[recognition], errors='coerce')
+        confident = accuracy > self.confidence_threshold
+        self._barcode_switching_batch(windows, table, recognition_keys[confident], pos_keys,
+                                      width, skus, found)
+        
+        self._catalog_check_batch(windows, table, pos, found)
+        return dict(found)
+    
+    def flush(self) -> List[Dict]:
+        """Report the unscanned items still in a scan area at the end of the stream, at their last read"""
+        return [
+            self._scan_avoidance_event(visit.last_seen, station, visit.epc, visit.sku,
+                                       visit.entered, visit.last_seen)
+            for station, visit in self.tags.close_all() if not visit.matched
+        ]
+    
+    def earliest_pending(self) -> Optional[int]:
+        """Earliest timestamp (epoch ns) flush() may still report an item at"""
+        return self.tags.earliest_seen()
+    
+    def merge(self, other: 'TheftDetector'):
+        """Absorb the state of a detector that ran on another station shard"""
+        self.tags.merge(other.tags)
+    
     # @algorithm Scan Avoidance Detection | Detects items in scan area not scanned at POS
-    def _detect_scan_avoidance(self, window: Dict) -> Dict:
+    def _detect_scan_avoidance(self, window: Dict, view: WindowView) -> List[Dict]:
         """
         Detect scan avoidance by comparing RFID readings with POS transactions
         If RFID detects items in scan area but no POS transaction occurs
         """
-        rfid_events = window.get('rfid_events', [])
-        pos_events = window.get('pos_events', [])
-        
-        # Get SKUs detected by RFID in scan area
-        rfid_skus = set()
-        for event in rfid_events:
-            if event.get('status') == 'Active' and event.get('data'):
-                if event['data'].get('location') == 'IN_SCAN_AREA':
-                    rfid_skus.add(event['data'].get('sku'))
-        
-        # Get SKUs scanned at POS
-        pos_skus = set()
-        for event in pos_events:
-            if event.get('status') == 'Active' and event.get('data'):
-                pos_skus.add(event['data'].get('sku'))
-        
-        # Find items in scan area but not scanned
-        unscanned = rfid_skus - pos_skus
-        
-        if unscanned:
-            return {
-                'event_type': 'SCAN_AVOIDANCE',
-                'timestamp': window['timestamp'],
-                'station_id': window['station_id'],
-                'severity': 'HIGH',
-                'details': {
-                    'unscanned_skus': list(unscanned),
-                    'rfid_count': len(rfid_skus),
-                    'pos_count': len(pos_skus)
-                }
-            }
+        in_area = [
+            event for event in view.active['rfid_events']
+            if event['data'].get('location') == 'IN_SCAN_AREA'
+        ]
+        return self._scan_avoidance_step(window, in_area, view.active['pos_events'])
+    
+    def _scan_avoidance_step(self, window: Dict, in_area: List[Dict], scans: List[Dict]) -> List[Dict]:
+        """
+        Scan avoidance for one window's scan-area reads and POS lines
         
-        return None
+        Each physical item (tag visit) is reported once, when its visit
+        closes without a POS line for its SKU having fallen within it, so a
+        scan in another window of the same visit clears the item. Untimed
+        reads cannot be matched to a visit and are reported once per window
+        when the window itself has no POS line for their SKU.
+        """
+        station = window['station_id']
+        now_ns = epoch_ns(window['timestamp'])
+        # Untimed POS lines are placed at the window's own timestamp
+        scan_times = [(epoch_ns(event.get('timestamp')), event['data'].get('sku')) for event in scans]
+        closed = self.tags.observe(station, in_area, [
+            (now_ns if time_ns is None else time_ns, sku)
+            for time_ns, sku in scan_times if time_ns is not None or now_ns is not None
+        ])
+        if now_ns is not None:
+            closed.extend(self.tags.expire(station, now_ns))
+        
+        events = [
+            self._scan_avoidance_event(window['timestamp'], station, visit.epc, visit.sku,
+                                       visit.entered, visit.last_seen)
+            for visit in sorted(closed, key=TagVisit.sort_key) if not visit.matched
+        ]
+        
+        pos_skus = {event['data'].get('sku') for event in scans}
+        untimed = set()
+        for event in in_area:
+            data = event['data']
+            key = tag_key(data)
+            if epoch_ns(event.get('timestamp')) is None and data.get('sku') not in pos_skus and key not in untimed:
+                untimed.add(key)
+                events.append(self._scan_avoidance_event(window['timestamp'], station, data.get('epc'),
+                                                         data.get('sku'), None, None))
+        
+        return events
+    
+    def _scan_avoidance_event(self, timestamp: Any, station: str, epc: Any, sku: Any,
+                              first_seen: Any, last_seen: Any) -> Event:
+        """SCAN_AVOIDANCE for one unscanned item"""
+        return Event(
+            event_type='SCAN_AVOIDANCE',
+            timestamp=_isoformat(timestamp),
+            station_id=station,
+            severity='HIGH',
+            details={
+                'epc': epc,
+                'unscanned_skus': [sku],
+                'first_seen': _isoformat(first_seen),
+                'last_seen': _isoformat(last_seen)
+            }
+        )
     
     # @algorithm Barcode Switching Detection | Detects mismatched SKUs between systems
-    def _detect_barcode_switching(self, window: Dict) -> Dict:
+    def _detect_barcode_switching(self, window: Dict, view: WindowView) -> Dict:
         """
         Detect barcode switching by comparing product recognition with POS data
         If recognized product doesn't match scanned product
         """
-        recognition_events = window.get('recognition_events', [])
-        pos_events = window.get('pos_events', [])
-        
-        if not recognition_events or not pos_events:
+        if not view.events['recognition_events'] or not view.events['pos_events']:
             return None
         
         # Get recognized products
         recognized_skus = []
-        for event in recognition_events:
-            if event.get('status') == 'Active' and event.get('data'):
-                if event['data'].get('accuracy', 0) > 0.8:  # High confidence only
-                    recognized_skus.append(event['data'].get('predicted_product'))
+        for event in view.active['recognition_events']:
+            if event['data'].get('accuracy', 0) > self.confidence_threshold:  # High confidence only
+                recognized_skus.append(event['data'].get('predicted_product'))
         
         # Get scanned products
-        scanned_skus = []
-        for event in pos_events:
-            if event.get('status') == 'Active' and event.get('data'):
-                scanned_skus.append(event['data'].get('sku'))
+        scanned_skus = [event['data'].get('sku') for event in view.active['pos_events']]
         
         # Check for mismatches
         if recognized_skus and scanned_skus:
             mismatches = set(recognized_skus) - set(scanned_skus)
             if mismatches:
-                return {
-                    'event_type': 'BARCODE_SWITCHING',
-                    'timestamp': window['timestamp'],
-                    'station_id': window['station_id'],
-                    'severity': 'HIGH',
-                    'details': {
+                return Event(
+                    event_type='BARCODE_SWITCHING',
+                    timestamp=window['timestamp'],
+                    station_id=window['station_id'],
+                    severity='HIGH',
+                    details={
                         'recognized_skus': recognized_skus,
                         'scanned_skus': scanned_skus,
-                        'potential_switches': list(mismatches)
+                        'potential_switches': sorted(mismatches, key=str)
                     }
-                }
+                )
+        
+        return None
+    
+    # @algorithm Weight Discrepancy Detection | Compares scanned weight vs catalog weight
+    def _detect_weight_discrepancy(self, window: Dict, view: WindowView) -> Dict:
+        """
+        Detect scanned items whose weight is zero or differs from the
+        catalog weight of the product by more than the tolerance
+        """
+        for event in view.active['pos_events']:
+            data = event['data']
+            issue = self._weight_event(window, data, self._product_id(data))
+            if issue:
+                return issue
         
         return None
     
-    # @algorithm Weight Discrepancy Detection | Compares expected vs actual weight
-    def _detect_weight_discrepancy(self, window: Dict) -> Dict:
+    def _detect_price_discrepancy(self, window: Dict, view: WindowView) -> Dict:
         """
-        Detect weight discrepancies between scanned items and scale readings
+        Detect scanned items charged a price that differs from the catalog
+        price of the product by more than the tolerance
         """
-        pos_events = window.get('pos_events', [])
+        for event in view.active['pos_events']:
+            data = event['data']
+            issue = self._price_event(window, data, self._product_id(data))
+            if issue:
+                return issue
         
-        if not pos_events:
+        return None
+    
+    def _product_id(self, data: Dict) -> int:
+        """Catalog ID of a scanned item, by SKU and else by barcode"""
+        return self.catalog.product_id(data.get('sku'), data.get('barcode'))
+    
+    def _weight_event(self, window: Dict, data: Dict, product: int) -> Optional[Event]:
+        """WEIGHT_DISCREPANCY for one POS line, or None when its weight checks out"""
+        weight = data.get('weight_g', 0)
+        expected = self.catalog.weights[product]
+        if weight == 0:
+            issue = 'Zero weight detected'
+        elif _outside(weight, expected, self.weight_tolerance):
+            issue = 'Weight outside tolerance'
+        else:
             return None
         
-        for event in pos_events:
-            if event.get('status') == 'Active' and event.get('data'):
-                data = event['data']
-                expected_weight = data.get('weight_g', 0)
-                
-                # In real scenario, we'd compare with scale reading
-                # For now, we'll flag if weight seems suspicious
-                if expected_weight == 0:
-                    return {
-                        'event_type': 'WEIGHT_DISCREPANCY',
-                        'timestamp': window['timestamp'],
-                        'station_id': window['station_id'],
-                        'severity': 'MEDIUM',
-                        'details': {
-                            'sku': data.get('sku'),
-                            'expected_weight': expected_weight,
-                            'issue': 'Zero weight detected'
-                        }
-                    }
+        return Event(
+            event_type='WEIGHT_DISCREPANCY',
+            timestamp=window['timestamp'],
+            station_id=window['station_id'],
+            severity='MEDIUM',
+            details={
+                'sku': data.get('sku'),
+                'expected_weight': self._reference(product, 'weight'),
+                'actual_weight': weight,
+                'issue': issue
+            }
+        )
+    
+    def _price_event(self, window: Dict, data: Dict, product: int) -> Optional[Event]:
+        """PRICE_DISCREPANCY for one POS line, or None when its price checks out"""
+        price = data.get('price')
+        if not _outside(price, self.catalog.prices[product], self.price_tolerance):
+            return None
         
-        return None
+        return Event(
+            event_type='PRICE_DISCREPANCY',
+            timestamp=window['timestamp'],
+            station_id=window['station_id'],
+            severity='MEDIUM',
+            details={
+                'sku': data.get('sku'),
+                'expected_price': self._reference(product, 'price'),
+                'actual_price': price,
+                'issue': 'Price outside tolerance'
+            }
+        )
+    
+    def _reference(self, product: int, column: str) -> Any:
+        """Catalog value of a product as written in the catalog, None when unknown"""
+        if product < 0:
+            return None
+        value = self.catalog.products[product].get(column)
+        return None if pd.isna(value) else value
+    
+    def _scan_avoidance_batch(self, windows: Sequence[Dict], table: WindowTable,
+                              rfid: np.ndarray, pos: np.ndarray, found: Dict[int, List]):
+        """
+        Scan avoidance over all windows, fed from the table
+        Visits span windows and close as the station's clock moves on, so
+        the windows are stepped through in order like update() does
+        """
+        in_area = rfid[table.column('rfid_events', 'location')[rfid] == 'IN_SCAN_AREA']
+        reads = WindowTable.group_lists(table.window_ids('rfid_events')[in_area],
+                                        [table.record('rfid_events', pair) for pair in in_area.tolist()])
+        scans = WindowTable.group_lists(table.window_ids('pos_events')[pos],
+                                        [table.record('pos_events', pair) for pair in pos.tolist()])
+        for position, window in enumerate(windows):
+            events = self._scan_avoidance_step(window, reads.get(position, []), scans.get(position, []))
+            if events:
+                found[position].extend(events)
+    
+    # @algorithm Grouped Mismatch | Barcode switching over all windows at once
+    def _barcode_switching_batch(self, windows: Sequence[Dict], table: WindowTable,
+                                 recognition_keys: np.ndarray, pos_keys: np.ndarray,
+                                 width: int, skus: np.ndarray, found: Dict[int, List]):
+        """High-confidence recognitions whose SKU was never scanned in the same window"""
+        # Mismatches only count in windows with active scans, which also
+        # means both systems saw something there
+        scanned_windows = np.zeros(len(windows), dtype=bool)
+        scanned_windows[pos_keys // width] = True
+        candidates = np.unique(recognition_keys[scanned_windows[recognition_keys // width]])
+        mismatched = candidates[~np.isin(candidates, pos_keys)]
+        if not len(mismatched):
+            return
+        
+        positions = np.unique(mismatched // width)
+        recognized = recognition_keys[np.isin(recognition_keys // width, positions)]
+        scanned = pos_keys[np.isin(pos_keys // width, positions)]
+        recognized_lists = WindowTable.group_lists(recognized // width, skus[recognized % width])
+        scanned_lists = WindowTable.group_lists(scanned // width, skus[scanned % width])
+        switches = WindowTable.group_lists(mismatched // width, skus[mismatched % width])
+        for position, potential_switches in switches.items():
+            window = windows[position]
+            found[position].append(Event(
+                event_type='BARCODE_SWITCHING',
+                timestamp=window['timestamp'],
+                station_id=window['station_id'],
+                severity='HIGH',
+                details={
+                    'recognized_skus': recognized_lists[position],
+                    'scanned_skus': scanned_lists[position],
+                    'potential_switches': sorted(potential_switches, key=str)
+                }
+            ))
+    
+    # @algorithm Catalog Lookup Join | Weight and price checks through arrays keyed by product ID
+    def _catalog_check_batch(self, windows: Sequence[Dict], table: WindowTable,
+                             pos: np.ndarray, found: Dict[int, List]):
+        """First POS line of every window failing the weight check, then the price check"""
+        products = self.catalog.product_ids(table.column('pos_events', 'sku')[pos],
+                                            table.column('pos_events', 'barcode')[pos])
+        weights = table.column('pos_events', 'weight_g')[pos]
+        # Missing weights read as None here but default to 0 in the record;
+        # the masks only select candidates, which are confirmed line by line
+        checks = (
+            ((weights == 0) | pd.isna(weights)
+             | _outside_batch(weights, self.catalog.weights[products], self.weight_tolerance),
+             self._weight_event),
+            (_outside_batch(table.column('pos_events', 'price')[pos], self.catalog.prices[products],
+                            self.price_tolerance),
+             self._price_event),
+        )
+        
+        window_ids = table.window_ids('pos_events')
+        for candidates, check in checks:
+            flagged = set()
+            for pair, product in zip(pos[candidates].tolist(), products[candidates].tolist()):
+                position = int(window_ids[pair])
+                if position in flagged:
+                    continue
+                event = check(windows[position], table.record('pos_events', pair)['data'], product)
+                if event:
+                    flagged.add(position)
+                    found[position].append(event)
+
+
+def _outside(value: Any, expected: float, tolerance: float) -> bool:
+    """Whether a numeric value differs from a known reference by more than the relative tolerance"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return False
+    return abs(value - expected) > tolerance * expected
+
+
+def _outside_batch(values: np.ndarray, expected: np.ndarray, tolerance: float) -> np.ndarray:
+    """Vectorized _outside(); unknown references and non-numeric values never count"""
+    values = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return np.abs(values - expected) > tolerance * expected
+
+
+def _isoformat(timestamp: Any) -> Any:
+    """ISO string of a record timestamp, which may already be one"""
+    return timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp
@@ -0,0 +1,89 @@
+"""
+Window View Module
+Pre-classified view of a synchronized window shared by all detectors
+"""
+
+from typing import Dict, List
+
+
+SOURCES = ['rfid_events', 'queue_events', 'pos_events', 'recognition_events']
+
+
+class WindowView:
+    """
+    Events of one window classified by source and status a single time,
+    shared by every detector that looks at the window
+    """
+    
+    def __init__(self, window: Dict):
+        self.window = window
+        self.events = {}
+        self.by_status = {}
+        self.active = {}
+        
+        for source in SOURCES:
+            events = window.get(source, [])
+            by_status = {}
+            active = []
+            for event in events:
+                status = event.get('status')
+                by_status.setdefault(status, []).append(event)
+                if status == 'Active' and event.get('data'):
+                    active.append(event)
+            
+            self.events[source] = events
+            self.by_status[source] = by_status
+            self.active[source] = active
+    
+    def with_status(self, source: str, status: str) -> List[Dict]:
+        """Events of a source that carry the given status"""
+        return self.by_status[source].get(status, [])
+    
+    def count_status(self, status: str) -> int:
+        """Number of events with the given status across all sources"""
+        return sum(len(self.with_status(source, status)) for source in SOURCES)
+    
+    def total_events(self) -> int:
+        """Number of events across all sources"""
+        return sum(len(events) for events in self.events.values())
+
+
+class HighWaterMark:
+    """
+    Latest record timestamp seen per station
+    
+    Batch windows overlap (one starts at every distinct timestamp), so the
+    same reading reaches a detector through several windows. Keeping only
+    the newest timestamp per station lets running totals count each
+    reading once with O(1) state per station.
+    """
+    
+    def __init__(self):
+        self.latest: Dict[str, object] = {}
+    
+    def fresh(self, station: str, events: List[Dict]) -> List[Dict]:
+        """Events newer than anything already seen at the station"""
+        latest = self.latest.get(station)
+        newest = latest
+        fresh = []
+        
+        for event in events:
+            timestamp = event.get('timestamp')
+            if timestamp is None:
+                # Untimed readings cannot be matched up, so always count them
+                fresh.append(event)
+            elif latest is None or timestamp > latest:
+                fresh.append(event)
+                if newest is None or timestamp > newest:
+                    newest = timestamp
+        
+        if newest is not None:
+            self.latest[station] = newest
+        return fresh
+    
+    def merge(self, other: 'HighWaterMark'):
+        """Take the newer mark of each station from another tracker"""
+        for station, timestamp in other.latest.items():
+            current = self.latest.get(station)
+            if current is None or timestamp > current:
+                self.latest[station] = timestamp
@@ -0,0 +1,9 @@
+"""
+Benchmarks Package
+Synthetic store-day data generation and pipeline stage timing
+"""
+
+from .synthetic_data import SyntheticStoreGenerator
+from .runner import BenchmarkRunner
+
+__all__ = ['SyntheticStoreGenerator', 'BenchmarkRunner']
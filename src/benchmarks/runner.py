@@ -0,0 +1,223 @@
+"""
+Benchmark Runner Module
+Times each stage of the Sentinel pipeline and reports throughput and peak RSS
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Allow running as a script from the repository root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analytics.dispatcher import DetectorDispatcher, create_default_dispatcher
+from data_processing.catalog import CatalogService
+from data_processing.data_loader import DataLoader
+from data_processing.data_synchronizer import DataSynchronizer
+from events.event_coalescer import EventCoalescer
+from events.event_generator import EventGenerator
+from utils.config import Config
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class TimedDetector:
+    """Wraps a detector and accumulates the time spent in it"""
+    
+    def __init__(self, detector: Any):
+        self.detector = detector
+        self.seconds = 0.0
+        self.PER_STATION = getattr(detector, 'PER_STATION', False)
+        if hasattr(detector, 'detect_batch'):
+            self.detect_batch = self._timed_batch
+    
+    def update(self, window: Dict, view=None) -> List[Dict]:
+        """Timed pass-through of the detector's update()"""
+        started = time.perf_counter()
+        try:
+            return self.detector.update(window, view)
+        finally:
+            self.seconds += time.perf_counter() - started
+    
+    def _timed_batch(self, windows: List[Dict], table=None) -> Dict[int, List[Dict]]:
+        """Timed pass-through of the detector's detect_batch()"""
+        started = time.perf_counter()
+        try:
+            return self.detector.detect_batch(windows, table)
+        finally:
+            self.seconds += time.perf_counter() - started
+    
+    def flush(self) -> List[Dict]:
+        """Timed pass-through of the detector's flush()"""
+        started = time.perf_counter()
+        try:
+            return self.detector.flush()
+        finally:
+            self.seconds += time.perf_counter() - started
+    
+    def merge(self, other: 'TimedDetector'):
+        """Merge shard state and shard timings"""
+        self.detector.merge(other.detector)
+        self.seconds += other.seconds
+
+
+class BenchmarkRunner:
+    """Runs the batch pipeline over a data folder, timing every stage"""
+    
+    def __init__(self, data_path: str, output_path: str, workers: int = 1,
+                 cache_dir: str = None, window_policy: str = None, coalesce: bool = True):
+        """`coalesce` times the stage that merges repeated events, as main.py runs it"""
+        self.data_path = data_path
+        self.output_path = output_path
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.window_policy = window_policy or Config.WINDOW_POLICY
+        self.coalesce = coalesce
+        self.logger = logging.getLogger('sentinel.benchmarks.runner')
+    
+    def run(self) -> Dict:
+        """Run all stages and return the benchmark report"""
+        stages = {}
+        config = Config()
+        
+        started = time.perf_counter()
+        loader = DataLoader(self.data_path, cache_dir=self.cache_dir)
+        raw_data = loader.load_all(columnar=True)
+        records = sum(len(raw_data[source]) for source in
+                      ['rfid', 'queue', 'pos', 'product_recognition', 'inventory'])
+        stages['load'] = self._stage(started, records)
+        
+        started = time.perf_counter()
+        synchronizer = DataSynchronizer(
+            config.TIME_WINDOW_SECONDS,
+            policy=self.window_policy,
+            stride_seconds=config.WINDOW_STRIDE_SECONDS,
+            gap_seconds=config.SESSION_GAP_SECONDS
+        )
+        windows = synchronizer.process(raw_data)
+        stages['synchronize'] = self._stage(started, records)
+        
+        catalog = CatalogService(raw_data['products'], raw_data['customers'])
+        default = create_default_dispatcher(config, catalog)
+        dispatcher = DetectorDispatcher()
+        for name, detector in default.detectors:
+            dispatcher.register(name, TimedDetector(detector))
+        
+        started = time.perf_counter()
+        results = dispatcher.run(windows, workers=self.workers, table=synchronizer.table)
+        stages['detect_total'] = self._stage(started, len(windows))
+        for name, detector in dispatcher.detectors:
+            stages[f"detect_{name}"] = {
+                'seconds': round(detector.seconds, 6),
+                'windows_per_second': self._rate(len(windows), detector.seconds),
+                'events': len(results[name]),
+            }
+        
+        streams = [results[name] for name in dispatcher.names]
+        events = [event for found in streams for event in found]
+        detected = len(events)
+        merged = 0
+        if self.coalesce and config.COALESCE_HORIZON_SECONDS > 0:
+            coalescer = EventCoalescer(
+                config.COALESCE_HORIZON_SECONDS,
+                config.COALESCE_MAX_KEYS,
+                config.COALESCE_KEY_FIELDS
+            )
+            started = time.perf_counter()
+            events = coalescer.coalesce(events)
+            streams = [events]
+            stages['coalesce'] = self._stage(started, detected)
+            merged = coalescer.merged
+        
+        started = time.perf_counter()
+        EventGenerator(self.output_path).generate_sorted(streams)
+        stages['output'] = self._stage(started, len(events))
+        
+        return {
+            'records': records,
+            'windows': len(windows),
+            'events': len(events),
+            'merged_events': merged,
+            'workers': self.workers,
+            'window_policy': self.window_policy,
+            'stages': stages,
+            'total_seconds': round(sum(stages[name]['seconds'] for name in
+                                       ['load', 'synchronize', 'detect_total', 'coalesce', 'output']
+                                       if name in stages), 6),
+            'peak_rss_mb': self._peak_rss_mb(),
+        }
+    
+    def _stage(self, started: float, items: int) -> Dict:
+        """Timing entry for a stage that processed `items` items"""
+        seconds = time.perf_counter() - started
+        return {'seconds': round(seconds, 6), 'items_per_second': self._rate(items, seconds)}
+    
+    def _rate(self, items: int, seconds: float) -> float:
+        """Throughput, guarding against zero durations"""
+        return round(items / seconds, 1) if seconds > 0 else None
+    
+    def _peak_rss_mb(self) -> float:
+        """Peak resident set size of this process in megabytes"""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return round(peak / divisor, 1)
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Project Sentinel - Pipeline Benchmark')
+    parser.add_argument('--records', type=int, default=10000,
+                        help='Number of synthetic sensor records to generate (1k to 10M)')
+    parser.add_argument('--stations', type=int, default=5, help='Number of checkout stations')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generator')
+    parser.add_argument('--data', type=str, default=None,
+                        help='Existing data folder to benchmark instead of generating one')
+    parser.add_argument('--workers', type=int, default=1, help='Processes for per-station analytics')
+    parser.add_argument('--window-policy', type=str, default=None,
+                        choices=['tumbling', 'hopping', 'session', 'timestamp'],
+                        help='Window policy to benchmark (default: Config.WINDOW_POLICY)')
+    parser.add_argument('--no-coalesce', action='store_true',
+                        help='Skip the stage that merges repeated events, as main.py --no-coalesce does')
+    parser.add_argument('--report', type=str, default=None, help='Write the JSON report to this file')
+    return parser.parse_args()
+
+
+def main():
+    """Generate data if needed, run the benchmark and print the JSON report"""
+    from benchmarks.synthetic_data import SyntheticStoreGenerator
+    
+    args = parse_arguments()
+    logging.basicConfig(level=logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = args.data
+        if data_path is None:
+            data_path = str(Path(workdir) / 'data')
+            SyntheticStoreGenerator(seed=args.seed, stations=args.stations).generate(data_path, args.records)
+        
+        report = BenchmarkRunner(data_path, str(Path(workdir) / 'output'), workers=args.workers,
+                                 window_policy=args.window_policy, coalesce=not args.no_coalesce).run()
+        report['generator'] = None if args.data else {
+            'records': args.records, 'stations': args.stations, 'seed': args.seed
+        }
+    
+    output = json.dumps(report, indent=2)
+    if args.report:
+        Path(args.report).write_text(output + '\n', encoding='utf-8')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Synthetic Data Module
+Seeded generator of realistic store-day sensor data at configurable sizes
+"""
+
+import csv
+import json
+import logging
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+
+class SyntheticStoreGenerator:
+    """
+    Generates time-ordered sensor JSONL files plus matching product and
+    customer CSVs
+    
+    Each station serves customers one item at a time: the item's RFID tag is
+    read in the scan area, then it is scanned at the POS and seen by the
+    product recognition camera a second later. A small share of items are
+    never scanned (scan avoidance) or recognized as a different product
+    (barcode switching), and sensors occasionally report read errors or
+    crashes. Queue readings arrive every 5 seconds per station and inventory
+    snapshots every 10 minutes.
+    """
+    
+    SOURCE_FILES = {
+        'rfid': 'rfid_readings.jsonl',
+        'pos': 'pos_transactions.jsonl',
+        'product_recognition': 'product_recognition.jsonl',
+        'queue': 'queue_monitoring.jsonl',
+        'inventory': 'inventory_snapshots.jsonl',
+    }
+    
+    CATEGORIES = ['F', 'B', 'A', 'S', 'V', 'T']
+    TAGS_PER_PRODUCT = 1000
+    
+    def __init__(self, seed: int = 42, stations: int = 5, products: int = 60,
+                 customers: int = 200, start_time: str = '2025-08-13T08:00:00'):
+        self.seed = seed
+        self.stations = [f"SCC{i + 1}" for i in range(max(stations - 1, 1))]
+        if stations > 1:
+            self.stations.append('RC1')
+        self.start_time = datetime.fromisoformat(start_time)
+        self.products = self._build_products(products)
+        self.customers = [f"C{i + 1:03d}" for i in range(customers)]
+        
+        # Behaviour rates
+        self.scan_avoidance_rate = 0.03
+        self.barcode_switch_rate = 0.02
+        self.read_error_rate = 0.01
+        self.crash_rate = 0.001
+        
+        self.logger = logging.getLogger('sentinel.benchmarks.generator')
+    
+    def generate(self, output_dir: str, records: int) -> Dict[str, int]:
+        """
+        Write about `records` sensor records (across all five JSONL sources)
+        and the catalog CSVs to output_dir; returns per-source counts
+        """
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+        self.write_catalog(output)
+        
+        rng = random.Random(self.seed)
+        counts = {source: 0 for source in self.SOURCE_FILES}
+        files = {
+            source: open(output / filename, 'w', encoding='utf-8', buffering=1024 * 1024)
+            for source, filename in self.SOURCE_FILES.items()
+        }
+        
+        try:
+            pending = defaultdict(list)
+            next_item = {station: rng.randint(0, 5) for station in self.stations}
+            customer = {station: rng.choice(self.customers) for station in self.stations}
+            stock = {product['SKU']: product['quantity'] for product in self.products}
+            
+            second = 0
+            while sum(counts.values()) < records:
+                now = self.start_time + timedelta(seconds=second)
+                timestamp = now.isoformat()
+                
+                if second % 600 == 0:
+                    pending[second].append(('inventory', {'timestamp': timestamp, 'data': dict(stock)}))
+                
+                for station in self.stations:
+                    if second % 5 == 0:
+                        pending[second].append(('queue', self._queue_record(rng, timestamp, station)))
+                    
+                    if second >= next_item[station]:
+                        product = rng.choice(self.products)
+                        stock[product['SKU']] = max(stock[product['SKU']] - 1, 0)
+                        self._item_records(rng, pending, second, station, customer[station], product)
+                        next_item[station] = second + rng.randint(2, 8)
+                        if rng.random() < 0.2:
+                            customer[station] = rng.choice(self.customers)
+                
+                for source, record in pending.pop(second, []):
+                    files[source].write(json.dumps(record) + '\n')
+                    counts[source] += 1
+                
+                second += 1
+        finally:
+            for f in files.values():
+                f.close()
+        
+        self.logger.info(f"Generated {sum(counts.values())} records over {second} seconds in {output}")
+        return counts
+    
+    def write_catalog(self, output: Path):
+        """Write products_list.csv and customer_data.csv"""
+        with open(output / 'products_list.csv', 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['SKU', 'product_name', 'quantity', 'EPC_range',
+                                                   'barcode', 'weight', 'price'])
+            writer.writeheader()
+            for product in self.products:
+                writer.writerow({key: product[key] for key in writer.fieldnames})
+        
+        with open(output / 'customer_data.csv', 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Customer_ID', 'Name', 'Age', 'Address', 'TP'])
+            for i, customer_id in enumerate(self.customers):
+                writer.writerow([customer_id, f"Customer {i + 1}", 20 + i % 50,
+                                 f"{i + 1} Main Street, Colombo", f"+9477{i:07d}"])
+    
+    def _build_products(self, count: int) -> List[Dict]:
+        """Deterministic product catalog with contiguous EPC ranges"""
+        rng = random.Random(self.seed + 1)
+        products = []
+        for i in range(count):
+            category = self.CATEGORIES[i % len(self.CATEGORIES)]
+            first_tag = i * self.TAGS_PER_PRODUCT + 1
+            weight = rng.choice([100, 150, 200, 250, 400, 500, 1000])
+            products.append({
+                'SKU': f"PRD_{category}_{i // len(self.CATEGORIES) + 1:02d}",
+                'product_name': f"Product {category}{i + 1} ({weight}g)",
+                'quantity': rng.randint(40, 200),
+                'EPC_range': f"{self._epc(first_tag)}-{self._epc(first_tag + self.TAGS_PER_PRODUCT - 1)}",
+                'first_tag': first_tag,
+                'barcode': f"479{rng.randint(10 ** 9, 10 ** 10 - 1)}",
+                'weight': weight,
+                'price': float(rng.randint(50, 2000)),
+            })
+        return products
+    
+    def _epc(self, tag: int) -> str:
+        """EPC string in the format of the sample data"""
+        return f"E28011606{tag:016d}"
+    
+    def _status(self, rng: random.Random) -> str:
+        """Sensor status with occasional errors"""
+        roll = rng.random()
+        if roll < self.crash_rate:
+            return 'System Crash'
+        if roll < self.crash_rate + self.read_error_rate:
+            return 'Read Error'
+        return 'Active'
+    
+    def _queue_record(self, rng: random.Random, timestamp: str, station: str) -> Dict:
+        """Queue camera reading"""
+        status = self._status(rng)
+        record = {'timestamp': timestamp, 'station_id': station, 'status': status}
+        if status == 'Active':
+            record['data'] = {
+                'customer_count': rng.randint(0, 12),
+                'average_dwell_time': round(rng.uniform(10, 300), 1)
+            }
+        return record
+    
+    def _item_records(self, rng: random.Random, pending: Dict, second: int, station: str,
+                      customer_id: str, product: Dict):
+        """Schedule the RFID, POS and recognition records of one item"""
+        timestamp = (self.start_time + timedelta(seconds=second)).isoformat()
+        later = (self.start_time + timedelta(seconds=second + 1)).isoformat()
+        epc = self._epc(product['first_tag'] + rng.randrange(self.TAGS_PER_PRODUCT))
+        
+        for _ in range(rng.randint(1, 3)):
+            status = self._status(rng)
+            record = {'timestamp': timestamp, 'station_id': station, 'status': status}
+            if status == 'Active':
+                record['data'] = {'epc': epc, 'location': 'IN_SCAN_AREA', 'sku': product['SKU']}
+            pending[second].append(('rfid', record))
+        
+        if rng.random() >= self.scan_avoidance_rate:
+            status = self._status(rng)
+            record = {'timestamp': later, 'station_id': station, 'status': status}
+            if status == 'Active':
+                record['data'] = {
+                    'customer_id': customer_id,
+                    'sku': product['SKU'],
+                    'product_name': product['product_name'],
+                    'barcode': product['barcode'],
+                    'price': product['price'],
+                    'weight_g': float(product['weight'])
+                }
+            pending[second + 1].append(('pos', record))
+        
+        predicted = product
+        if rng.random() < self.barcode_switch_rate:
+            predicted = rng.choice(self.products)
+        status = self._status(rng)
+        record = {'timestamp': later, 'station_id': station, 'status': status}
+        if status == 'Active':
+            record['data'] = {
+                'predicted_product': predicted['SKU'],
+                'accuracy': round(rng.uniform(0.6, 0.99), 2)
+            }
+        pending[second + 1].append(('product_recognition', record))
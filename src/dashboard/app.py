@@ -3,19 +3,45 @@ Dashboard Application
 Flask-based real-time dashboard for retail analytics
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 from flask_cors import CORS
+import json
 import logging
-from typing import Dict, List, Any
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Any, Optional
+
+# Also importable when app.py is run directly from src/dashboard
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from events.event_broadcaster import EventBroadcaster, Subscription
+from events.event_store import FILTER_COLUMNS, EventStore
+from events.event_summary import EventSummary
 
 
 app = Flask(__name__)
 CORS(app)
 
 # Global state (in production, use proper state management)
-current_events = []
+event_store: Optional[EventStore] = None
 current_data = {}
 
+# Summary served before any events are stored
+EMPTY_SUMMARY = EventSummary()
+
+# ETag and serialized body of the last /api/summary response
+summary_body = (None, '')
+
+# Events a /api/stream client may fall behind by before the oldest are dropped
+STREAM_BACKLOG = 1000
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_KEEPALIVE_SECONDS = 15
+
+# New stored events, pushed to /api/stream clients
+broadcaster = EventBroadcaster(STREAM_BACKLOG)
+
 
 @app.route('/')
 def index():
@@ -25,18 +51,72 @@ def index():
 
 @app.route('/api/events')
 def get_events():
-    """API endpoint for events"""
+    """
+    API endpoint for events, one page at a time
+    Query parameters: limit, cursor (next_cursor of the previous page),
+    order (asc or desc), since/until (ISO timestamps) and comma-separated
+    station_id, event_type and severity filters
+    """
+    if event_store is None:
+        return jsonify({'events': [], 'count': 0, 'next_cursor': None})
+    
+    args = request.args
+    try:
+        events, next_cursor = event_store.query(
+            limit=args.get('limit', type=int),
+            cursor=args.get('cursor', type=int),
+            descending=args.get('order', 'asc') == 'desc',
+            since=args.get('since'),
+            until=args.get('until'),
+            **{column: args[column].split(',') for column in FILTER_COLUMNS if args.get(column)}
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     return jsonify({
-        'events': current_events,
-        'count': len(current_events)
+        'events': events,
+        'count': len(events),
+        'next_cursor': next_cursor
     })
 
 
+@app.route('/api/stream')
+def stream_events():
+    """
+    Server-sent events carrying new events as they are stored
+    Takes the station_id, event_type and severity filters of /api/events.
+    Each message is a JSON list of events whose id is the cursor of the
+    last one, so a client reconnecting with Last-Event-ID (or ?cursor=)
+    first receives what it missed. A client that falls STREAM_BACKLOG
+    events behind loses the oldest and gets a `dropped` message.
+    """
+    filters = {column: request.args[column].split(',') for column in FILTER_COLUMNS if request.args.get(column)}
+    cursor = request.headers.get('Last-Event-ID', type=int) or request.args.get('cursor', type=int)
+    # Subscribing before the replay means no event falls between the two
+    subscription = broadcaster.subscribe(**filters)
+    return app.response_class(
+        stream_messages(subscription, cursor, filters),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/summary')
 def get_summary():
-    """API endpoint for summary statistics"""
-    summary = generate_summary(current_events)
-    return jsonify(summary)
+    """
+    API endpoint for summary statistics
+    The body is serialized once per summary version and answered with
+    304 Not Modified while the client's ETag is still current
+    """
+    global summary_body
+    summary = event_store.summary if event_store else EMPTY_SUMMARY
+    etag = summary.etag
+    if summary_body[0] != etag:
+        summary_body = (etag, json.dumps(dashboard_summary(summary.to_dict())))
+    
+    response = app.response_class(summary_body[1], mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 
 @app.route('/api/stations')
@@ -46,27 +126,56 @@ def get_stations():
     return jsonify(stations)
 
 
-def generate_summary(events: List[Dict]) -> Dict:
-    """Generate summary statistics"""
-    summary = {
-        'total_events': len(events),
-        'critical': sum(1 for e in events if e.get('severity') == 'CRITICAL'),
-        'high': sum(1 for e in events if e.get('severity') == 'HIGH'),
-        'medium': sum(1 for e in events if e.get('severity') == 'MEDIUM'),
-        'low': sum(1 for e in events if e.get('severity') == 'LOW'),
-    }
-    
-    # Count by type
-    event_types = {}
-    for event in events:
-        event_type = event.get('event_type', 'UNKNOWN')
-        event_types[event_type] = event_types.get(event_type, 0) + 1
-    
-    summary['by_type'] = event_types
-    
+def dashboard_summary(summary: Dict) -> Dict:
+    """Event summary with the per-severity counts the dashboard cards show"""
+    by_severity = summary['by_severity']
+    summary.update({
+        'critical': by_severity.get('CRITICAL', 0),
+        'high': by_severity.get('HIGH', 0),
+        'medium': by_severity.get('MEDIUM', 0),
+        'low': by_severity.get('LOW', 0),
+    })
     return summary
 
 
+def stream_messages(subscription: Subscription, cursor: Optional[int], filters: Dict) -> Iterator[str]:
+    """SSE messages for one client: events stored after the cursor, then live ones"""
+    last_id = cursor or 0
+    try:
+        while cursor is not None and event_store is not None:
+            events, cursor = event_store.query(
+                limit=EventStore.MAX_LIMIT, cursor=last_id, with_ids=True, **filters
+            )
+            if events:
+                last_id = events[-1]['id']
+                yield sse_message(last_id, [{k: v for k, v in e.items() if k != 'id'} for e in events])
+        yield ': connected\n\n'
+        
+        while True:
+            items, dropped = subscription.take(STREAM_KEEPALIVE_SECONDS)
+            if dropped:
+                yield f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n"
+            # Live events already sent by the replay are skipped
+            items = [(event_id, event) for event_id, event in items if event_id > last_id]
+            if items:
+                last_id = items[-1][0]
+                yield sse_message(last_id, [event for _, event in items])
+            elif not dropped:
+                yield ': keep-alive\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+def sse_message(last_id: int, events: List[Dict]) -> str:
+    """One SSE message carrying a batch of events"""
+    return f"id: {last_id}\ndata: {json.dumps(events)}\n\n"
+
+
+def publish_events(events: List[Dict]):
+    """Store formatted events and push them to the stream clients they match"""
+    broadcaster.publish(zip(event_store.add(events), events))
+
+
 def analyze_stations(data: Dict) -> List[Dict]:
     """Analyze station status"""
     stations = []
@@ -81,16 +190,38 @@ def analyze_stations(data: Dict) -> List[Dict]:
     return stations
 
 
-def launch_dashboard(events: List[Dict], data: Dict):
-    """Launch the dashboard"""
-    global current_events, current_data
-    current_events = events
+def open_event_store(events: List[Dict], data: Dict, store_path: str):
+    """Serve events from a fresh store at store_path, starting with the given ones"""
+    global event_store, current_data
+    event_store = EventStore(store_path)
+    event_store.clear()
+    event_store.add(events)
     current_data = data
     
     logger = logging.getLogger('sentinel.dashboard')
+    logger.info(f"Stored {event_store.count()} events in {store_path}")
     logger.info("Starting dashboard on http://localhost:5000")
-    
-    app.run(host='0.0.0.0', port=5000, debug=False)
+
+
+def launch_dashboard(events: List[Dict], data: Dict, store_path: str):
+    """Launch the dashboard, serving events from a store at store_path"""
+    open_event_store(events, data, store_path)
+    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+
+
+def start_dashboard(store_path: str) -> Callable[[List[Dict]], None]:
+    """
+    Start the dashboard in the background for a pipeline that keeps running
+    Returns publish_events, through which the pipeline feeds it new events
+    """
+    open_event_store([], {}, store_path)
+    threading.Thread(
+        target=app.run,
+        kwargs={'host': '0.0.0.0', 'port': 5000, 'debug': False, 'threaded': True, 'use_reloader': False},
+        name='sentinel-dashboard',
+        daemon=True
+    ).start()
+    return publish_events
 
 
 if __name__ == '__main__':
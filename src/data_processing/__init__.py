@@ -6,5 +6,8 @@ Handles data loading, synchronization, and preprocessing
 from .data_loader import DataLoader
 from .data_synchronizer import DataSynchronizer
 from .data_validator import DataValidator
+from .catalog import CatalogService
+from .records import SensorRecord, Window
+from .window_table import WindowTable
 
-__all__ = ['DataLoader', 'DataSynchronizer', 'DataValidator']
+__all__ = ['DataLoader', 'DataSynchronizer', 'DataValidator', 'CatalogService', 'SensorRecord', 'Window', 'WindowTable']
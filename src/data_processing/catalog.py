@@ -0,0 +1,158 @@
+"""
+Catalog Module
+Indexed product and customer lookups built once from the reference CSVs
+"""
+
+import bisect
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+
+class CatalogService:
+    """
+    Product and customer catalog with O(1) lookups by SKU, barcode and
+    customer ID, and O(log n) resolution of RFID tags through an interval
+    index over the products' EPC ranges
+    
+    Products are also interned: a product's ID is its position in
+    `products`, and `weights` and `prices` hold the reference values by ID
+    for bulk checks. Those arrays carry one trailing NaN, so the unknown
+    ID -1 reads as a missing value.
+    
+    Returned records are shared; treat them as read-only.
+    """
+    
+    def __init__(self, products_df: pd.DataFrame = None, customers_df: pd.DataFrame = None):
+        self.logger = logging.getLogger('sentinel.catalog')
+        
+        self.products: List[Dict] = []
+        self._by_sku: Dict[str, int] = {}
+        self._by_barcode: Dict[str, int] = {}
+        self._epc_starts: List[int] = []
+        self._epc_ends: List[int] = []
+        self._epc_products: List[int] = []
+        self._customers: Dict[str, Dict] = {}
+        self._sku_index = pd.Index([], dtype=object)
+        self._sku_ids = np.full(1, -1, dtype=np.int64)
+        self.weights = np.full(1, np.nan)
+        self.prices = np.full(1, np.nan)
+        
+        if products_df is not None and not products_df.empty:
+            self._index_products(products_df)
+        if customers_df is not None and not customers_df.empty:
+            self._index_customers(customers_df)
+    
+    def get_product(self, sku: str) -> Optional[Dict]:
+        """Product record for a SKU"""
+        position = self._by_sku.get(sku)
+        return self.products[position] if position is not None else None
+    
+    def get_product_by_barcode(self, barcode) -> Optional[Dict]:
+        """Product record for a barcode (string or number)"""
+        position = self._by_barcode.get(self._barcode_key(barcode))
+        return self.products[position] if position is not None else None
+    
+    def get_product_by_epc(self, epc: str) -> Optional[Dict]:
+        """Product record whose EPC range contains the given RFID tag"""
+        value = self._epc_value(epc)
+        if value is None:
+            return None
+        
+        i = bisect.bisect_right(self._epc_starts, value) - 1
+        if i >= 0 and value <= self._epc_ends[i]:
+            return self.products[self._epc_products[i]]
+        return None
+    
+    def sku_for_epc(self, epc: str) -> Optional[str]:
+        """Resolve an RFID tag to its SKU"""
+        product = self.get_product_by_epc(epc)
+        return product.get('SKU') if product else None
+    
+    def product_id(self, sku: str, barcode=None) -> int:
+        """Interned ID of a product by SKU, else by barcode; -1 when unknown"""
+        position = self._by_sku.get(sku)
+        if position is None and barcode is not None:
+            position = self._by_barcode.get(self._barcode_key(barcode))
+        return -1 if position is None else position
+    
+    def product_ids(self, skus: Sequence, barcodes: Sequence = None) -> np.ndarray:
+        """product_id() of every SKU (and barcode) in parallel sequences"""
+        ids = self._sku_ids[self._sku_index.get_indexer(np.asarray(skus, dtype=object))]
+        if barcodes is not None:
+            for i in np.flatnonzero(ids < 0).tolist():
+                if barcodes[i] is not None:
+                    ids[i] = self._by_barcode.get(self._barcode_key(barcodes[i]), -1)
+        return ids
+    
+    def get_customer(self, customer_id: str) -> Optional[Dict]:
+        """Customer record for a customer ID"""
+        return self._customers.get(customer_id)
+    
+    def _index_products(self, products_df: pd.DataFrame):
+        """Build SKU, barcode and EPC range indexes"""
+        self.products = products_df.to_dict('records')
+        
+        ranges = []
+        for position, product in enumerate(self.products):
+            sku = product.get('SKU')
+            if isinstance(sku, str):
+                self._by_sku.setdefault(sku, position)
+            
+            barcode = self._barcode_key(product.get('barcode'))
+            if barcode is not None:
+                self._by_barcode.setdefault(barcode, position)
+            
+            epc_range = self._parse_epc_range(product.get('EPC_range'))
+            if epc_range:
+                ranges.append((epc_range[0], epc_range[1], position))
+        
+        ranges.sort()
+        self._epc_starts = [start for start, _, _ in ranges]
+        self._epc_ends = [end for _, end, _ in ranges]
+        self._epc_products = [position for _, _, position in ranges]
+        
+        self._sku_index = pd.Index(list(self._by_sku), dtype=object)
+        self._sku_ids = np.array(list(self._by_sku.values()) + [-1], dtype=np.int64)
+        self.weights = self._reference_values(products_df, 'weight')
+        self.prices = self._reference_values(products_df, 'price')
+        
+        self.logger.info(f"Indexed {len(self.products)} products and {len(ranges)} EPC ranges")
+    
+    def _index_customers(self, customers_df: pd.DataFrame):
+        """Build the customer ID index"""
+        for customer in customers_df.to_dict('records'):
+            self._customers.setdefault(customer.get('Customer_ID'), customer)
+    
+    def _reference_values(self, products_df: pd.DataFrame, column: str) -> np.ndarray:
+        """Numeric product column by product ID, plus the trailing NaN for ID -1"""
+        if column not in products_df.columns:
+            return np.full(len(products_df) + 1, np.nan)
+        values = pd.to_numeric(products_df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        return np.append(values, np.nan)
+    
+    def _barcode_key(self, barcode) -> Optional[str]:
+        """Normalize barcodes read as text or as numbers"""
+        if barcode is None or (isinstance(barcode, float) and barcode != barcode):
+            return None
+        if isinstance(barcode, float) and barcode.is_integer():
+            barcode = int(barcode)
+        return str(barcode).strip()
+    
+    def _parse_epc_range(self, epc_range) -> Optional[tuple]:
+        """Parse 'START-END' into integer bounds"""
+        if not isinstance(epc_range, str) or '-' not in epc_range:
+            return None
+        
+        start, end = (self._epc_value(part) for part in epc_range.split('-', 1))
+        if start is None or end is None:
+            return None
+        return (start, end) if start <= end else (end, start)
+    
+    def _epc_value(self, epc) -> Optional[int]:
+        """EPCs are hexadecimal tag identifiers"""
+        try:
+            return int(str(epc).strip(), 16)
+        except (TypeError, ValueError):
+            return None
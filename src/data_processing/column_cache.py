@@ -0,0 +1,161 @@
+"""
+Column Cache Module
+On-disk columnar cache of parsed sensor data, keyed by source file size and mtime
+"""
+
+import json
+import logging
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class ColumnCache:
+    """
+    Stores each parsed source as one .npy file per column
+    
+    Timestamps are kept as int64 epoch nanoseconds (plus the zone for
+    tz-aware ones) and numeric columns as native arrays, all memory-mapped
+    on load. String columns are stored as fixed-width unicode arrays;
+    nested values (such as the `data` dicts) are stored as JSON text in
+    one memory-mapped UTF-8 buffer with line offsets. Nothing is
+    unpickled, so reading a cache cannot run code.
+    """
+    
+    # Entries written by another format version are rebuilt
+    FORMAT_VERSION = 2
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.logger = logging.getLogger('sentinel.column_cache')
+    
+    def load(self, source_path: Path) -> Optional[pd.DataFrame]:
+        """Load a cached source, or None if missing or stale"""
+        entry = self._entry_dir(source_path)
+        meta = self._read_meta(entry)
+        if meta is None or meta['key'] != self._source_key(source_path):
+            return None
+        
+        columns = {}
+        for name, kind in meta['columns']:
+            columns[name] = self._load_column(entry, meta['files'][name], kind)
+        
+        self.logger.debug(f"Loaded {source_path.name} from cache")
+        return pd.DataFrame(columns, copy=False)
+    
+    def metadata(self, source_path: Path) -> Dict:
+        """Extra values stored alongside a cached source"""
+        meta = self._read_meta(self._entry_dir(source_path))
+        return meta.get('extra', {}) if meta else {}
+    
+    def store(self, source_path: Path, df: pd.DataFrame, extra: Dict = None):
+        """Write a parsed source to the cache, replacing any previous entry"""
+        entry = self._entry_dir(source_path)
+        staging = entry.with_name(entry.name + '.tmp')
+        
+        # A cache that cannot be written (read-only mount, a file in the
+        # way) only costs the next run a re-parse
+        try:
+            shutil.rmtree(staging, ignore_errors=True)
+            staging.mkdir(parents=True)
+            meta = {
+                'version': self.FORMAT_VERSION,
+                'key': self._source_key(source_path),
+                'columns': [],
+                'files': {},
+                'extra': extra or {},
+            }
+            for i, name in enumerate(df.columns):
+                stem = f"col{i}"
+                kind = self._store_column(staging, stem, name, df[name])
+                meta['columns'].append([name, kind])
+                meta['files'][name] = stem
+            
+            with open(staging / 'meta.json', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            
+            shutil.rmtree(entry, ignore_errors=True)
+            staging.rename(entry)
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            self.logger.warning(f"Could not cache {source_path.name}: {e}")
+    
+    def _entry_dir(self, source_path: Path) -> Path:
+        """Cache directory for one source file"""
+        return self.cache_dir / source_path.name
+    
+    def _source_key(self, source_path: Path) -> Dict:
+        """Identity of a source file version"""
+        stat = source_path.stat()
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': self.FORMAT_VERSION}
+    
+    def _read_meta(self, entry: Path) -> Optional[Dict]:
+        """Read an entry's metadata if present"""
+        meta_file = entry / 'meta.json'
+        if not meta_file.exists():
+            return None
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _store_column(self, entry: Path, stem: str, name: str, values: pd.Series) -> str:
+        """Write one column and return its storage kind"""
+        if name == 'timestamp' and not pd.api.types.is_datetime64_any_dtype(values):
+            parsed = pd.to_datetime(values, errors='coerce')
+            if parsed.notna().sum() == values.notna().sum():
+                values = parsed
+        
+        if pd.api.types.is_datetime64_any_dtype(values):
+            if values.dt.tz is not None:
+                # UTC nanoseconds plus the zone they are shown in
+                np.save(entry / f"{stem}.npy", values.dt.tz_convert('UTC').dt.tz_localize(None)
+                        .to_numpy(dtype='datetime64[ns]').view('int64'))
+                np.save(entry / f"{stem}.tz.npy", np.array(str(values.dt.tz)))
+                return 'datetime_tz'
+            np.save(entry / f"{stem}.npy", values.to_numpy(dtype='datetime64[ns]').view('int64'))
+            return 'datetime'
+        
+        if values.dtype.kind in 'biuf':
+            np.save(entry / f"{stem}.npy", values.to_numpy())
+            return 'numeric'
+        
+        objects = values.to_numpy(dtype=object)
+        missing = pd.isna(values).to_numpy()
+        present = objects[~missing]
+        if all(isinstance(value, str) for value in present):
+            strings = np.where(missing, '', objects).astype(str)
+            np.save(entry / f"{stem}.npy", strings)
+            np.save(entry / f"{stem}.mask.npy", missing)
+            return 'string'
+        
+        # One JSON document per row; missing values are JSON null
+        encoded = [json.dumps(None if gone else value, separators=(',', ':')).encode('utf-8')
+                   for value, gone in zip(objects.tolist(), missing.tolist())]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        np.save(entry / f"{stem}.npy", np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        np.save(entry / f"{stem}.offsets.npy", np.concatenate([[0], np.cumsum(lengths)]))
+        return 'json'
+    
+    def _load_column(self, entry: Path, stem: str, kind: str):
+        """Read one column, memory-mapping array files"""
+        values = np.load(entry / f"{stem}.npy", mmap_mode='r')
+        if kind == 'json':
+            offsets = np.load(entry / f"{stem}.offsets.npy", mmap_mode='r').tolist()
+            buffer = memoryview(values)
+            return [json.loads(bytes(buffer[start:end]))
+                    for start, end in zip(offsets[:-1], offsets[1:])]
+        if kind == 'datetime':
+            return values.view('datetime64[ns]')
+        if kind == 'datetime_tz':
+            zone = str(np.load(entry / f"{stem}.tz.npy"))
+            return pd.DatetimeIndex(values.view('datetime64[ns]')).tz_localize('UTC').tz_convert(zone)
+        if kind == 'string':
+            missing = np.load(entry / f"{stem}.mask.npy", mmap_mode='r')
+            strings = values.astype(object)
+            strings[missing] = None
+            return strings
+        return values
@@ -3,31 +3,70 @@ Data Loader Module
 Loads data from various sources (JSONL, CSV)
 """
 
+import hashlib
 import json
+import mmap
+import os
 import pandas as pd
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import logging
 
+from .catalog import CatalogService
+from .column_cache import ColumnCache
+from .line_index import LineIndex
+
+try:
+    import orjson
+except ImportError:  # Optional faster JSON backend
+    orjson = None
+
 
 class DataLoader:
     """Loads and parses data from multiple sources"""
     
-    def __init__(self, data_path: str):
+    # Bytes read per chunk by the bulk JSONL reader
+    CHUNK_SIZE = 8 * 1024 * 1024
+    
+    # Folder under the user cache dir that holds one cache per data folder
+    CACHE_DIR_NAME = 'sentinel'
+    
+    def __init__(self, data_path: str, cache_dir: Optional[str] = None):
         self.data_path = Path(data_path)
         self.logger = logging.getLogger('sentinel.data_loader')
+        self.skipped_lines: Dict[str, int] = {}
+        self.cache = ColumnCache(cache_dir) if cache_dir else None
+        self._catalogs: Dict[int, Tuple[pd.DataFrame, CatalogService]] = {}
+    
+    @classmethod
+    def default_cache_dir(cls, data_path: str) -> Path:
+        """
+        Cache folder for a data folder's derived files, outside the input tree
+        Under $XDG_CACHE_HOME (or ~/.cache), named after the folder and a
+        hash of its absolute path so different inputs never share entries
+        """
+        data_path = Path(data_path).resolve()
+        root = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+        digest = hashlib.sha1(str(data_path).encode('utf-8')).hexdigest()[:12]
+        return root / cls.CACHE_DIR_NAME / f"{data_path.name}-{digest}"
         
-    def load_all(self) -> Dict[str, Any]:
-        """Load all data sources"""
+    def load_all(self, columnar: bool = False) -> Dict[str, Any]:
+        """
+        Load all data sources
+        With columnar=True the JSONL sources are returned as DataFrames
+        built by the bulk reader instead of lists of records
+        """
         data = {}
+        load_jsonl = self.load_jsonl_columnar if columnar else self.load_jsonl
         
         try:
             # Load JSONL files
-            data['rfid'] = self.load_jsonl('rfid_readings.jsonl')
-            data['queue'] = self.load_jsonl('queue_monitoring.jsonl')
-            data['pos'] = self.load_jsonl('pos_transactions.jsonl')
-            data['product_recognition'] = self.load_jsonl('product_recognition.jsonl')
-            data['inventory'] = self.load_jsonl('inventory_snapshots.jsonl')
+            data['rfid'] = load_jsonl('rfid_readings.jsonl')
+            data['queue'] = load_jsonl('queue_monitoring.jsonl')
+            data['pos'] = load_jsonl('pos_transactions.jsonl')
+            data['product_recognition'] = load_jsonl('product_recognition.jsonl')
+            data['inventory'] = load_jsonl('inventory_snapshots.jsonl')
             
             # Load CSV files
             data['products'] = self.load_csv('products_list.csv')
@@ -40,26 +79,176 @@ class DataLoader:
             self.logger.error(f"Error loading data: {str(e)}")
             raise
     
-    def load_jsonl(self, filename: str) -> List[Dict]:
-        """Load JSONL file"""
+    def load_jsonl(self, filename: str, start: Any = None, end: Any = None) -> List[Dict]:
+        """
+        Load JSONL file
+        With start and/or end, only records with start <= timestamp < end are
+        decoded, located through a sidecar line index over a memory map
+        """
+        if start is not None or end is not None:
+            return self._load_jsonl_range(filename, start, end)
+        
+        records = list(self.iter_jsonl(filename))
+        self.logger.info(f"Loaded {len(records)} records from {filename}")
+        return records
+    
+    def _load_jsonl_range(self, filename: str, start: Any, end: Any) -> List[Dict]:
+        """Decode only the lines of a time range using the line index"""
         file_path = self.data_path / filename
         
         if not file_path.exists():
             self.logger.warning(f"File not found: {file_path}")
             return []
+        if file_path.stat().st_size == 0:
+            return []
+        
+        # Line indexes live with the column cache, outside the input folder
+        index_dir = self.cache.cache_dir if self.cache is not None else self.default_cache_dir(self.data_path)
+        index = LineIndex.for_file(file_path, index_dir)
+        start_ns = pd.Timestamp(start).value if start is not None else None
+        end_ns = pd.Timestamp(end).value if end is not None else None
         
         records = []
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for range_start, range_end in index.byte_ranges(start_ns, end_ns):
+                lines = mm[range_start:range_end].split(b'\n')
+                records.extend(self._decode_lines(filename, lines))
+        
+        self.logger.info(f"Loaded {len(records)} records from {filename} between {start} and {end}")
+        return records
+    
+    def iter_jsonl(self, filename: str) -> Iterator[Dict]:
+        """
+        Yield JSONL records one at a time without holding the file in memory
+        Invalid lines are skipped with a warning
+        """
+        file_path = self.data_path / filename
+        
+        if not file_path.exists():
+            self.logger.warning(f"File not found: {file_path}")
+            return
+        
         with open(file_path, 'r', encoding='utf-8') as f:
             for line in f:
                 if line.strip():
                     try:
-                        records.append(json.loads(line))
+                        yield json.loads(line)
                     except json.JSONDecodeError as e:
-                        self.logger.warning(f"Skipping invalid JSON line in {filename}: {e}")
+                        self._skip_line(filename, e)
+    
+    def load_jsonl_columnar(self, filename: str) -> pd.DataFrame:
+        """
+        Bulk-load a JSONL file straight into columns
         
-        self.logger.info(f"Loaded {len(records)} records from {filename}")
+        The file is read in large chunks and each chunk is decoded in one
+        call (orjson when installed, stdlib json otherwise). Nested `data`
+        fields are flattened into `data.<field>` columns next to the original
+        `data` column. Invalid lines are skipped and counted.
+        """
+        file_path = self.data_path / filename
+        
+        if not file_path.exists():
+            self.logger.warning(f"File not found: {file_path}")
+            return pd.DataFrame()
+        
+        cached = self._load_cached(file_path)
+        if cached is not None:
+            return cached
+        
+        columns: Dict[str, List] = {}
+        rows = 0
+        remainder = b''
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                lines = (remainder + chunk).split(b'\n')
+                remainder = lines.pop()
+                rows = self._append_records(columns, rows, self._decode_lines(filename, lines))
+        
+        rows = self._append_records(columns, rows, self._decode_lines(filename, [remainder]))
+        
+        self.logger.info(f"Loaded {rows} records from {filename}")
+        df = pd.DataFrame(columns)
+        self._store_cached(file_path, df)
+        return df
+    
+    def _decode_lines(self, filename: str, lines: List[bytes]) -> List[Dict]:
+        """Decode a batch of JSONL lines, skipping the invalid ones"""
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return []
+        
+        loads = orjson.loads if orjson is not None else json.loads
+        try:
+            # Decode the whole batch as one JSON array
+            records = loads(b'[' + b','.join(lines) + b']')
+            if len(records) == len(lines) and all(isinstance(r, dict) for r in records):
+                return records
+        except ValueError:
+            pass
+        
+        # Fall back to line by line to isolate the bad lines
+        records = []
+        for line in lines:
+            try:
+                record = loads(line)
+            except ValueError as e:
+                self._skip_line(filename, e)
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+            else:
+                self._skip_line(filename, 'not a JSON object')
         return records
     
+    def _append_records(self, columns: Dict[str, List], rows: int, records: List[Dict]) -> int:
+        """Append a batch of records to column lists, flattening nested data fields"""
+        if not records:
+            return rows
+        
+        # Column order follows first appearance, like pd.DataFrame(records)
+        keys = dict.fromkeys(chain.from_iterable(records))
+        batch = {key: [record.get(key) for record in records] for key in keys}
+        
+        if 'data' in batch:
+            nested = [value if isinstance(value, dict) else {} for value in batch['data']]
+            for field in dict.fromkeys(chain.from_iterable(nested)):
+                batch[f"data.{field}"] = [value.get(field) for value in nested]
+        
+        for name, values in batch.items():
+            self._column(columns, name, rows).extend(values)
+        for name, values in columns.items():
+            if name not in batch:
+                values.extend([None] * len(records))
+        
+        return rows + len(records)
+    
+    def _column(self, columns: Dict[str, List], name: str, rows: int) -> List:
+        """Get a column list, creating it padded to the current row count"""
+        if name not in columns:
+            columns[name] = [None] * rows
+        return columns[name]
+    
+    def _skip_line(self, filename: str, error: Any):
+        """Record an invalid JSONL line"""
+        self.skipped_lines[filename] = self.skipped_lines.get(filename, 0) + 1
+        self.logger.warning(f"Skipping invalid JSON line in {filename}: {error}")
+    
+    def stream_all(self) -> Dict[str, Iterator[Dict]]:
+        """
+        Open record iterators over all timestamped JSONL sources
+        Sources are read lazily as the consumer advances
+        """
+        return {
+            'rfid': self.iter_jsonl('rfid_readings.jsonl'),
+            'queue': self.iter_jsonl('queue_monitoring.jsonl'),
+            'pos': self.iter_jsonl('pos_transactions.jsonl'),
+            'product_recognition': self.iter_jsonl('product_recognition.jsonl'),
+            'inventory': self.iter_jsonl('inventory_snapshots.jsonl'),
+        }
+    
     def load_csv(self, filename: str) -> pd.DataFrame:
         """Load CSV file"""
         file_path = self.data_path / filename
@@ -68,20 +257,56 @@ class DataLoader:
             self.logger.warning(f"File not found: {file_path}")
             return pd.DataFrame()
         
+        cached = self._load_cached(file_path)
+        if cached is not None:
+            return cached
+        
         df = pd.read_csv(file_path)
         self.logger.info(f"Loaded {len(df)} rows from {filename}")
+        self._store_cached(file_path, df)
         return df
     
+    def _load_cached(self, file_path: Path) -> Optional[pd.DataFrame]:
+        """Load a source from the columnar cache if it is still current"""
+        if self.cache is None:
+            return None
+        
+        df = self.cache.load(file_path)
+        if df is not None:
+            skipped = self.cache.metadata(file_path).get('skipped_lines', 0)
+            if skipped:
+                self.skipped_lines[file_path.name] = skipped
+            self.logger.info(f"Loaded {len(df)} records from {file_path.name} (cached)")
+        return df
+    
+    def _store_cached(self, file_path: Path, df: pd.DataFrame):
+        """Save a parsed source to the columnar cache"""
+        if self.cache is not None and not df.empty:
+            extra = {'skipped_lines': self.skipped_lines.get(file_path.name, 0)}
+            self.cache.store(file_path, df, extra)
+    
+    def load_catalog(self) -> CatalogService:
+        """Build the indexed product and customer catalog"""
+        return CatalogService(
+            self.load_csv('products_list.csv'),
+            self.load_csv('customer_data.csv')
+        )
+    
     def get_product_info(self, sku: str, products_df: pd.DataFrame) -> Dict:
         """Get product information by SKU"""
-        product = products_df[products_df['SKU'] == sku]
-        if not product.empty:
-            return product.iloc[0].to_dict()
-        return {}
+        product = self._catalog_for(products_df, None).get_product(sku)
+        return dict(product) if product else {}
     
     def get_customer_info(self, customer_id: str, customers_df: pd.DataFrame) -> Dict:
         """Get customer information by ID"""
-        customer = customers_df[customers_df['Customer_ID'] == customer_id]
-        if not customer.empty:
-            return customer.iloc[0].to_dict()
-        return {}
+        customer = self._catalog_for(None, customers_df).get_customer(customer_id)
+        return dict(customer) if customer else {}
+    
+    def _catalog_for(self, products_df: pd.DataFrame, customers_df: pd.DataFrame) -> CatalogService:
+        """Index a DataFrame once and reuse the index while it is the same object"""
+        source = products_df if products_df is not None else customers_df
+        cached = self._catalogs.get(id(source))
+        if cached is None or cached[0] is not source:
+            cached = (source, CatalogService(products_df, customers_df))
+            self._catalogs[id(source)] = cached
+        return cached[1]
@@ -3,119 +3,387 @@ Data Synchronizer Module
 Synchronizes and correlates data from different sources based on timestamps
 """
 
+import bisect
+import heapq
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Any, Tuple
 import logging
 
+from .records import SensorRecord, Window
+from .window_index import SnapshotIndex, SourceIndex, to_epoch_ns
+from .window_table import WindowTable
+from .windowing import create_window_policy
+
 
 class DataSynchronizer:
     """Synchronizes timestamped data across different sources"""
     
-    def __init__(self, time_window_seconds: int = 5):
+    # (window key, raw_data key) for each correlated sensor source
+    SOURCES = [
+        ('rfid_events', 'rfid'),
+        ('queue_events', 'queue'),
+        ('pos_events', 'pos'),
+        ('recognition_events', 'product_recognition'),
+    ]
+    
+    def __init__(self, time_window_seconds: int = 5, policy: str = 'timestamp',
+                 stride_seconds: float = None, gap_seconds: float = None):
         self.time_window = timedelta(seconds=time_window_seconds)
+        # None keeps the original one-window-per-timestamp behaviour
+        self.policy = create_window_policy(policy, time_window_seconds, stride_seconds, gap_seconds)
+        # Columnar membership of the windows built by the last process() call
+        self.table: WindowTable = None
         self.logger = logging.getLogger('sentinel.synchronizer')
     
     # @algorithm Time-Window Correlation | Correlates events within time windows
-    def process(self, raw_data: Dict[str, Any]) -> List[Dict]:
+    def process(self, raw_data: Dict[str, Any]) -> List[Window]:
         """
         Synchronize and correlate data from all sources
         Groups events by time windows and station
+        
+        Each source is sorted once by (station_id, timestamp) and window
+        bounds are found with a binary search, so building all windows
+        costs O(N log N) instead of one full scan per window. The source
+        rows of every window are also kept in self.table for vectorized
+        detectors.
         """
         synchronized_events = []
+        self.table = None
         
         # Convert JSONL data to DataFrames for easier processing
-        rfid_df = self._to_dataframe(raw_data.get('rfid', []))
-        queue_df = self._to_dataframe(raw_data.get('queue', []))
-        pos_df = self._to_dataframe(raw_data.get('pos', []))
-        recognition_df = self._to_dataframe(raw_data.get('product_recognition', []))
-        inventory_df = self._to_dataframe(raw_data.get('inventory', []))
-        
-        # Get unique timestamps across all sources
-        all_timestamps = self._get_all_timestamps([
-            rfid_df, queue_df, pos_df, recognition_df
-        ])
-        
-        # Create time windows
-        for timestamp in sorted(all_timestamps):
-            window_start = timestamp
-            window_end = timestamp + self.time_window
-            
-            # Get all stations
-            stations = self._get_active_stations([rfid_df, queue_df, pos_df, recognition_df])
+        inventory = SnapshotIndex(self._to_dataframe(raw_data.get('inventory', [])))
+        indexes = {
+            key: SourceIndex(self._to_dataframe(raw_data.get(source, [])))
+            for key, source in self.SOURCES
+        }
+        
+        stations = sorted(set().union(*(index.stations for index in indexes.values())))
+        if self.policy is not None:
+            return self._process_with_policy(indexes, inventory, stations)
+        
+        timestamps, starts_ns = self._get_window_starts(list(indexes.values()))
+        width_ns = pd.Timedelta(self.time_window).value
+        
+        # Window bounds for every (source, station) pair in one vectorized pass
+        bounds = {
+            (key, station): indexes[key].bounds(station, starts_ns, width_ns)
+            for key in indexes
+            for station in stations
+        }
+        
+        # As-of join: windows share the snapshot dict instead of copying it
+        snapshot_positions = inventory.lookup(starts_ns)
+        
+        members = {key: [] for key in indexes}
+        for i, timestamp in enumerate(timestamps):
+            # Every station's window shares the same start and end strings
+            window_start = timestamp.isoformat()
+            window_end = (timestamp + self.time_window).isoformat()
+            inventory_snapshot = inventory.get(snapshot_positions[i])
             
             for station in stations:
-                window_data = {
-                    'timestamp': timestamp.isoformat(),
-                    'window_start': window_start.isoformat(),
-                    'window_end': window_end.isoformat(),
-                    'station_id': station,
-                    'rfid_events': self._filter_by_window(rfid_df, station, window_start, window_end),
-                    'queue_events': self._filter_by_window(queue_df, station, window_start, window_end),
-                    'pos_events': self._filter_by_window(pos_df, station, window_start, window_end),
-                    'recognition_events': self._filter_by_window(recognition_df, station, window_start, window_end),
-                    'inventory_snapshot': self._get_latest_inventory(inventory_df, timestamp)
-                }
+                window_data = Window(window_start, window_start, window_end, station,
+                                     inventory_snapshot=inventory_snapshot)
+                for key, index in indexes.items():
+                    lower, upper = bounds[(key, station)]
+                    rows = index.rows(station, lower[i], upper[i])
+                    window_data[key] = [index.records[row] for row in rows]
+                    members[key].append(rows)
                 
                 synchronized_events.append(window_data)
         
+        self.table = self._window_table(synchronized_events, indexes, members)
         self.logger.info(f"Created {len(synchronized_events)} synchronized time windows")
         return synchronized_events
     
-    def _to_dataframe(self, records: List[Dict]) -> pd.DataFrame:
-        """Convert JSONL records to DataFrame with parsed timestamps"""
-        if not records:
-            return pd.DataFrame()
+    def stream(self, sources: Dict[str, Iterable[Dict]]) -> Iterator[Window]:
+        """
+        Synchronize record streams and yield each window as soon as it closes
         
-        df = pd.DataFrame(records)
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        Every source must be in timestamp order (as the sensors append it).
+        A window [t, t + time_window) closes once a record at or after its
+        end arrives, so only the records of the open windows are buffered.
+        Windows are emitted for the stations observed so far.
+        """
+        width_ns = pd.Timedelta(self.time_window).value
+        merged = heapq.merge(
+            *(self._timed_records(sources.get(source, []), key) for key, source in self.SOURCES),
+            key=lambda item: item[0]
+        )
+        inventory = self._timed_records(sources.get('inventory', []), 'inventory')
+        if self.policy is not None:
+            yield from self._stream_with_policy(merged, inventory)
+            return
+        
+        next_snapshot = next(inventory, None)
+        current_snapshot = {}
+        
+        buffer = deque()
+        pending = deque()
+        stations = set()
+        
+        def close_window():
+            nonlocal next_snapshot, current_snapshot
+            start_ns, timestamp = pending.popleft()
+            while next_snapshot is not None and next_snapshot[0] <= start_ns:
+                current_snapshot = next_snapshot[3]
+                next_snapshot = next(inventory, None)
+            
+            # Drop records that no remaining window can contain
+            while buffer and buffer[0][0] < start_ns:
+                buffer.popleft()
+            
+            yield from self._build_stream_windows(
+                timestamp, start_ns + width_ns, buffer, sorted(stations), current_snapshot
+            )
+        
+        for time_ns, timestamp, key, record in merged:
+            while pending and pending[0][0] + width_ns <= time_ns:
+                yield from close_window()
+            
+            buffer.append((time_ns, timestamp, key, record))
+            if record.get('station_id') is not None:
+                stations.add(record['station_id'])
+            if not pending or pending[-1][0] != time_ns:
+                pending.append((time_ns, timestamp))
+        
+        while pending:
+            yield from close_window()
     
-    def _get_all_timestamps(self, dataframes: List[pd.DataFrame]) -> List[datetime]:
-        """Get all unique timestamps from multiple DataFrames"""
-        all_times = []
-        for df in dataframes:
-            if not df.empty and 'timestamp' in df.columns:
-                all_times.extend(df['timestamp'].tolist())
-        return list(set(all_times))
+    def _process_with_policy(self, indexes: Dict[str, SourceIndex], inventory: SnapshotIndex,
+                             stations: List[str]) -> List[Window]:
+        """
+        Build the windows of the configured policy for each active station
+        
+        Windows are derived from the station's own record times, so a
+        station gets no window where it has no data. They are ordered by
+        start time, then station, which is also the order stream() yields
+        them in, so every policy hands detectors windows in start order.
+        """
+        tz = next((index.timestamps.dt.tz for index in indexes.values() if len(index.timestamps)), None)
+        planned = []
+        for station in stations:
+            times_ns = np.sort(np.concatenate([index.station_times(station) for index in indexes.values()]))
+            starts_ns, ends_ns = self.policy.windows(times_ns)
+            bounds = {
+                key: index.bounds(station, starts_ns, ends_ns - starts_ns)
+                for key, index in indexes.items()
+            }
+            for i in range(len(starts_ns)):
+                planned.append((int(starts_ns[i]), str(station), int(ends_ns[i]), station, i, bounds))
+        planned.sort(key=lambda item: item[:3])
+        
+        snapshot_positions = inventory.lookup(np.array([item[0] for item in planned], dtype=np.int64))
+        
+        synchronized_events = []
+        members = {key: [] for key in indexes}
+        for (start_ns, _, end_ns, station, i, bounds), position in zip(planned, snapshot_positions):
+            events = {}
+            for key, index in indexes.items():
+                lower, upper = bounds[key]
+                rows = index.rows(station, lower[i], upper[i])
+                events[key] = [index.records[row] for row in rows]
+                members[key].append(rows)
+            synchronized_events.append(
+                self._policy_window(station, start_ns, end_ns, tz, events, inventory.get(position))
+            )
+        
+        self.table = self._window_table(synchronized_events, indexes, members)
+        self.logger.info(f"Created {len(synchronized_events)} {self.policy.name} windows")
+        return synchronized_events
     
-    def _get_active_stations(self, dataframes: List[pd.DataFrame]) -> List[str]:
-        """Get all unique station IDs"""
-        stations = set()
-        for df in dataframes:
-            if not df.empty and 'station_id' in df.columns:
-                stations.update(df['station_id'].unique())
-        return sorted(list(stations))
+    def _stream_with_policy(self, merged: Iterator[Tuple], inventory: Iterator[Tuple]) -> Iterator[Window]:
+        """
+        Streaming counterpart of _process_with_policy()
+        
+        Each station buffers its records until the policy's windows over
+        them close. A station is only re-examined once the stream reaches
+        the earliest time one of its windows can close, and records are
+        dropped as soon as no open window can contain them.
+        
+        Session windows close in end order, so a long session can close
+        after later-starting ones. Closed windows wait in a heap until no
+        window still open (nor any started by a later record) can start
+        before them, and are yielded in start order.
+        """
+        width_ns = pd.Timedelta(self.time_window).value
+        buffers = defaultdict(deque)
+        due = {}
+        emitted = {}
+        held = []
+        snapshot_times, snapshots = [], []
+        next_snapshot = next(inventory, None)
+        tz = None
+        
+        def close_windows(watermark):
+            nonlocal next_snapshot
+            while next_snapshot is not None and next_snapshot[0] <= watermark:
+                snapshot_times.append(next_snapshot[0])
+                snapshots.append(next_snapshot[3])
+                next_snapshot = next(inventory, None)
+            
+            ready = []
+            for station in [station for station, close_ns in due.items() if close_ns <= watermark]:
+                buffer = buffers[station]
+                times_ns = np.fromiter((item[0] for item in buffer), dtype=np.int64, count=len(buffer))
+                starts_ns, ends_ns = self.policy.windows(times_ns)
+                closed = ends_ns <= watermark
+                
+                for start_ns, end_ns in zip(starts_ns[closed].tolist(), ends_ns[closed].tolist()):
+                    if station in emitted and start_ns <= emitted[station]:
+                        continue
+                    lower = np.searchsorted(times_ns, start_ns, side='left')
+                    upper = np.searchsorted(times_ns, end_ns, side='left')
+                    ready.append((start_ns, str(station), end_ns, station,
+                                  [buffer[i] for i in range(lower, upper)]))
+                    emitted[station] = start_ns
+                
+                if closed.all():
+                    buffer.clear()
+                    del due[station]
+                else:
+                    keep_from = starts_ns[~closed].min()
+                    while buffer and buffer[0][0] < keep_from:
+                        buffer.popleft()
+                    due[station] = int(ends_ns[~closed].min())
+            
+            for start_ns, order, end_ns, station, records in ready:
+                events = {key: [] for key, _ in self.SOURCES}
+                for _, _, key, record in records:
+                    events[key].append(record)
+                position = bisect.bisect_right(snapshot_times, start_ns) - 1
+                snapshot = snapshots[position] if position >= 0 else {}
+                heapq.heappush(held, (start_ns, order, end_ns,
+                                      self._policy_window(station, start_ns, end_ns, tz, events, snapshot)))
+            
+            # Windows yet to close start at least a window width before the
+            # oldest buffered record or the next record to arrive
+            oldest = min((buffer[0][0] for buffer in buffers.values() if buffer), default=watermark)
+            while held and held[0][0] < min(oldest, watermark) - width_ns:
+                yield heapq.heappop(held)[3]
+            
+            # Keep the snapshots an open window may still start after
+            while len(snapshot_times) > 1 and snapshot_times[1] <= oldest - width_ns:
+                snapshot_times.pop(0)
+                snapshots.pop(0)
+        
+        watermark = None
+        for time_ns, timestamp, key, record in merged:
+            if watermark is None or time_ns > watermark:
+                watermark = time_ns
+                yield from close_windows(watermark)
+            if tz is None:
+                tz = timestamp.tz
+            
+            station = record.get('station_id')
+            if station is None:
+                continue
+            buffers[station].append((time_ns, timestamp, key, record))
+            close_ns = self.policy.first_close(time_ns)
+            due[station] = min(due.get(station, close_ns), close_ns)
+        
+        yield from close_windows(np.iinfo(np.int64).max)
+        while held:
+            yield heapq.heappop(held)[3]
     
-    def _filter_by_window(self, df: pd.DataFrame, station: str, 
-                          start: datetime, end: datetime) -> List[Dict]:
-        """Filter DataFrame by station and time window"""
-        if df.empty:
-            return []
-        
-        mask = (
-            (df['station_id'] == station) &
-            (df['timestamp'] >= start) &
-            (df['timestamp'] < end)
-        )
+    def _policy_window(self, station: str, start_ns: int, end_ns: int, tz, events: Dict[str, List],
+                       inventory_snapshot: Dict) -> Window:
+        """Window for one policy window"""
+        start = self._from_epoch_ns(start_ns, tz).isoformat()
+        window_data = Window(start, start, self._from_epoch_ns(end_ns, tz).isoformat(), station,
+                             inventory_snapshot=inventory_snapshot)
+        for key, _ in self.SOURCES:
+            window_data[key] = events.get(key, [])
+        return window_data
+    
+    def _window_table(self, windows: List[Window], indexes: Dict[str, SourceIndex],
+                      members: Dict[str, List[np.ndarray]]) -> WindowTable:
+        """Columnar membership of the built windows: source rows per window position"""
+        table = {}
+        for key, rows in members.items():
+            lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+            window_ids = np.repeat(np.arange(len(rows), dtype=np.int64), lengths)
+            table[key] = (indexes[key].columns, window_ids,
+                          np.concatenate(rows) if rows else np.array([], dtype=np.int64))
+        return WindowTable(windows, table)
+    
+    def _from_epoch_ns(self, value: int, tz) -> pd.Timestamp:
+        """Timestamp for epoch nanoseconds in the data's timezone"""
+        return pd.Timestamp(value, tz='UTC').tz_convert(tz) if tz is not None else pd.Timestamp(value)
+    
+    def _timed_records(self, records: Iterable[Dict], key: str) -> Iterator[Tuple]:
+        """
+        Attach parsed timestamps to raw records, skipping unparseable ones
+        Sensor readings become SensorRecords; inventory snapshots stay dicts
+        """
+        for record in records:
+            # pd.Timestamp skips the per-call format inference of pd.to_datetime
+            try:
+                timestamp = pd.Timestamp(record.get('timestamp'))
+            except (TypeError, ValueError):
+                timestamp = pd.NaT
+            if pd.isna(timestamp):
+                self.logger.warning(f"Skipping {key} record without a valid timestamp")
+                continue
+            if key == 'inventory':
+                record = dict(record, timestamp=timestamp)
+            else:
+                record = SensorRecord.from_dict(record, timestamp)
+            yield timestamp.value, timestamp, key, record
+    
+    def _build_stream_windows(self, timestamp: pd.Timestamp, end_ns: int, buffer: deque,
+                              stations: List[str], inventory_snapshot: Dict) -> Iterator[Window]:
+        """Build the per-station windows for one closed window start"""
+        grouped = defaultdict(list)
+        for time_ns, _, key, record in buffer:
+            if time_ns >= end_ns:
+                break
+            grouped[(key, record.get('station_id'))].append(record)
+        
+        window_start = timestamp.isoformat()
+        window_end = (timestamp + self.time_window).isoformat()
+        for station in stations:
+            window_data = Window(window_start, window_start, window_end, station,
+                                 inventory_snapshot=inventory_snapshot)
+            for key, _ in self.SOURCES:
+                window_data[key] = grouped.get((key, station), [])
+            yield window_data
+    
+    def _get_window_starts(self, indexes: List[SourceIndex]) -> Tuple[List[pd.Timestamp], np.ndarray]:
+        """
+        Get all unique timestamps across sources in ascending order
+        Returns the timestamps and their epoch nanoseconds
+        """
+        series = [index.timestamps.dropna() for index in indexes if len(index.timestamps)]
+        if not series:
+            return [], np.array([], dtype=np.int64)
+        
+        all_ns = np.concatenate([to_epoch_ns(s) for s in series])
+        starts_ns, first = np.unique(all_ns, return_index=True)
         
-        filtered = df[mask]
-        return filtered.to_dict('records') if not filtered.empty else []
+        # Keep the first Timestamp seen for each instant, matching the original set
+        offsets = np.cumsum([0] + [len(s) for s in series])
+        timestamps = []
+        for position in first:
+            source = np.searchsorted(offsets, position, side='right') - 1
+            timestamps.append(series[source].iloc[position - offsets[source]])
+        return timestamps, starts_ns
     
-    def _get_latest_inventory(self, inventory_df: pd.DataFrame, 
-                             timestamp: datetime) -> Dict:
-        """Get the most recent inventory snapshot before the given timestamp"""
-        if inventory_df.empty:
-            return {}
-        
-        # Filter inventory snapshots before or at the timestamp
-        mask = inventory_df['timestamp'] <= timestamp
-        recent = inventory_df[mask]
-        
-        if recent.empty:
-            return {}
-        
-        # Get the most recent one
-        latest = recent.sort_values('timestamp', ascending=False).iloc[0]
-        return latest.to_dict()
+    def _to_dataframe(self, records: Any) -> pd.DataFrame:
+        """
+        Convert JSONL records to DataFrame with parsed timestamps
+        Accepts a list of records or a DataFrame from the columnar loader
+        """
+        if isinstance(records, pd.DataFrame):
+            df = records.copy(deep=False)
+        elif not records:
+            return pd.DataFrame()
+        else:
+            df = pd.DataFrame(records)
+        
+        if 'timestamp' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
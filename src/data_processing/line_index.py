@@ -0,0 +1,115 @@
+"""
+Line Index Module
+Sidecar line-offset and timestamp index for time-range reads of JSONL files
+"""
+
+import logging
+import mmap
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+TIMESTAMP_PATTERN = re.compile(rb'"timestamp"\s*:\s*"([^"]*)"')
+
+
+class LineIndex:
+    """
+    Byte offsets of every JSONL line, ordered by the line's timestamp
+    
+    Built once with a single pass over a memory-mapped file (timestamps are
+    pulled out with a regex, not a full JSON decode) and saved as a sidecar
+    .npz keyed by the file's size and mtime.
+    """
+    
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, times_ns: np.ndarray):
+        # Lines are stored sorted by timestamp; lines without one are dropped
+        self.starts = starts
+        self.ends = ends
+        self.times_ns = times_ns
+        self.logger = logging.getLogger('sentinel.line_index')
+    
+    @classmethod
+    def for_file(cls, file_path: Path, index_dir: Optional[Path] = None) -> 'LineIndex':
+        """Load the sidecar index for a file, rebuilding it if stale"""
+        sidecar = (index_dir or file_path.parent) / f"{file_path.name}.idx.npz"
+        stat = file_path.stat()
+        key = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        
+        if sidecar.exists():
+            try:
+                with np.load(sidecar) as saved:
+                    if np.array_equal(saved['key'], key):
+                        return cls(saved['starts'], saved['ends'], saved['times_ns'])
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        index = cls.build(file_path)
+        
+        # As with the column cache, a sidecar that cannot be written only
+        # costs the next run a rebuild, and a partial one is never left behind
+        staging = sidecar.with_name(sidecar.name + '.tmp')
+        try:
+            sidecar.parent.mkdir(parents=True, exist_ok=True)
+            with open(staging, 'wb') as f:
+                np.savez(f, key=key, starts=index.starts, ends=index.ends, times_ns=index.times_ns)
+            staging.replace(sidecar)
+        except Exception as e:
+            try:
+                staging.unlink()
+            except OSError:
+                pass
+            index.logger.warning(f"Could not cache line index for {file_path.name}: {e}")
+        return index
+    
+    @classmethod
+    def build(cls, file_path: Path) -> 'LineIndex':
+        """Scan a JSONL file once and index its line offsets and timestamps"""
+        empty = np.array([], dtype=np.int64)
+        if file_path.stat().st_size == 0:
+            return cls(empty, empty, empty)
+        
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            newlines = np.flatnonzero(np.frombuffer(mm, dtype=np.uint8) == ord('\n'))
+            starts = np.concatenate([[0], newlines + 1])
+            ends = np.concatenate([newlines, [len(mm)]])
+            
+            timestamps = []
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                match = TIMESTAMP_PATTERN.search(mm, start, end)
+                timestamps.append(match.group(1).decode('utf-8') if match else None)
+        
+        times = pd.to_datetime(pd.Series(timestamps, dtype=object), errors='coerce')
+        valid = times.notna().to_numpy()
+        times_ns = times.to_numpy(dtype='datetime64[ns]').view('int64')[valid]
+        starts, ends = starts[valid], ends[valid]
+        
+        order = np.argsort(times_ns, kind='stable')
+        return cls(starts[order], ends[order], times_ns[order])
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def byte_ranges(self, start_ns: Optional[int], end_ns: Optional[int]) -> List[Tuple[int, int]]:
+        """
+        Byte ranges holding the lines with start <= timestamp < end, in file order
+        Adjacent lines are merged so a time-sorted file yields a single range
+        """
+        lower = 0 if start_ns is None else np.searchsorted(self.times_ns, start_ns, side='left')
+        upper = len(self) if end_ns is None else np.searchsorted(self.times_ns, end_ns, side='left')
+        if upper <= lower:
+            return []
+        
+        order = np.argsort(self.starts[lower:upper], kind='stable')
+        starts = self.starts[lower:upper][order].tolist()
+        ends = self.ends[lower:upper][order].tolist()
+        
+        ranges = [[starts[0], ends[0]]]
+        for start, end in zip(starts[1:], ends[1:]):
+            if start == ranges[-1][1] + 1:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return [tuple(r) for r in ranges]
@@ -0,0 +1,98 @@
+"""
+Records Module
+Compact sensor record and window types built by the synchronizer
+"""
+
+import pandas as pd
+from typing import Dict, List, Optional
+
+from utils.records import SlotRecord, intern_code
+
+
+def _missing_to_none(value):
+    """NaN/NaT placeholders from DataFrame columns become None"""
+    if value is pd.NaT or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
+class SensorRecord(SlotRecord):
+    """
+    One RFID, queue, POS or recognition reading
+    Station, status and product codes are interned so that repeated
+    values share a single string object
+    """
+    
+    __slots__ = ('timestamp', 'station_id', 'status', 'data')
+    
+    # Payload fields holding codes repeated across many readings
+    CODE_FIELDS = ('sku', 'predicted_product', 'location', 'customer_id')
+    
+    def __init__(self, timestamp, station_id: Optional[str], status: Optional[str], data: Optional[Dict]):
+        self.timestamp = timestamp
+        self.station_id = intern_code(station_id)
+        self.status = intern_code(status)
+        if data:
+            for field in self.CODE_FIELDS:
+                value = data.get(field)
+                if type(value) is str:
+                    data[field] = intern_code(value)
+        self.data = data
+    
+    @classmethod
+    def from_dict(cls, record: Dict, timestamp=None) -> 'SensorRecord':
+        """Record from a decoded JSONL line, optionally with a parsed timestamp"""
+        return cls(
+            record.get('timestamp') if timestamp is None else timestamp,
+            record.get('station_id'),
+            record.get('status'),
+            record.get('data')
+        )
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> List['SensorRecord']:
+        """Records for every row of a sensor DataFrame, built column-wise"""
+        def column(name: str) -> list:
+            if name not in df.columns:
+                return [None] * len(df)
+            return [_missing_to_none(value) for value in df[name].tolist()]
+        
+        return [
+            cls(timestamp, station_id, status, data)
+            for timestamp, station_id, status, data in zip(
+                column('timestamp'), column('station_id'), column('status'), column('data')
+            )
+        ]
+
+
+class Window(SlotRecord):
+    """The sensor records of one station over one time window"""
+    
+    __slots__ = ('timestamp', 'window_start', 'window_end', 'station_id', 'rfid_events',
+                 'queue_events', 'pos_events', 'recognition_events', 'inventory_snapshot')
+    
+    # Fields holding lists of SensorRecord
+    SOURCE_FIELDS = ('rfid_events', 'queue_events', 'pos_events', 'recognition_events')
+    
+    def __init__(self, timestamp: str, window_start: str, window_end: str, station_id: str,
+                 rfid_events: List = None, queue_events: List = None, pos_events: List = None,
+                 recognition_events: List = None, inventory_snapshot: Dict = None):
+        self.timestamp = timestamp
+        self.window_start = window_start
+        self.window_end = window_end
+        self.station_id = intern_code(station_id)
+        self.rfid_events = [] if rfid_events is None else rfid_events
+        self.queue_events = [] if queue_events is None else queue_events
+        self.pos_events = [] if pos_events is None else pos_events
+        self.recognition_events = [] if recognition_events is None else recognition_events
+        self.inventory_snapshot = {} if inventory_snapshot is None else inventory_snapshot
+    
+    def to_dict(self) -> Dict:
+        """Plain dict copy with the records converted too"""
+        window = super().to_dict()
+        for field in self.SOURCE_FIELDS:
+            window[field] = [
+                record.to_dict() if isinstance(record, SlotRecord) else record
+                for record in window[field]
+            ]
+        return window
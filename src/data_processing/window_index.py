@@ -0,0 +1,124 @@
+"""
+Window Index Module
+Sorted per-station views over sensor sources for fast time-window lookups
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+from .records import SensorRecord
+from .window_table import RecordColumns
+
+
+def to_epoch_ns(timestamps: pd.Series) -> np.ndarray:
+    """Convert a datetime Series to int64 epoch nanoseconds"""
+    return timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def to_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    Convert rows to record dicts as they appeared in the source
+    Flattened `data.<field>` columns from the columnar loader are left out
+    """
+    columns = [column for column in df.columns if not str(column).startswith('data.')]
+    return df[columns].to_dict('records')
+
+
+class SourceIndex:
+    """
+    Sorts one sensor source once by (station_id, timestamp) so that the
+    records of any station/time window can be found with a binary search
+    instead of a boolean scan over the whole DataFrame
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self.records: List[SensorRecord] = []
+        self.columns = RecordColumns(self.records)
+        self.timestamps = pd.Series(dtype='datetime64[ns]')
+        self._stations: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        
+        if df.empty or 'timestamp' not in df.columns or 'station_id' not in df.columns:
+            return
+        
+        self.records = SensorRecord.from_frame(df)
+        # Vectorized detectors read payload fields from the flattened columns
+        self.columns = RecordColumns(self.records, df)
+        self.timestamps = df['timestamp'].reset_index(drop=True)
+        
+        valid = self.timestamps.notna().to_numpy()
+        times_ns = to_epoch_ns(self.timestamps)
+        
+        stations = df['station_id'].reset_index(drop=True)
+        groups = stations.groupby(stations, sort=True).indices
+        for station, positions in groups.items():
+            positions = positions[valid[positions]]
+            if len(positions) == 0:
+                continue
+            # Stable sort keeps the original row order for equal timestamps
+            order = np.argsort(times_ns[positions], kind='stable')
+            positions = positions[order]
+            self._stations[station] = (times_ns[positions], positions)
+    
+    @property
+    def stations(self) -> List[str]:
+        """Stations present in this source"""
+        return list(self._stations.keys())
+    
+    def station_times(self, station: str) -> np.ndarray:
+        """Sorted epoch-ns timestamps of a station's rows"""
+        if station not in self._stations:
+            return np.array([], dtype=np.int64)
+        return self._stations[station][0]
+    
+    def bounds(self, station: str, starts_ns: np.ndarray,
+               width_ns) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Locate [start, start + width) for every window start at once
+        The width is a scalar or one width per window
+        Returns the lower and upper positions into the station's sorted rows
+        """
+        if station not in self._stations:
+            empty = np.zeros(len(starts_ns), dtype=np.int64)
+            return empty, empty
+        
+        times_ns, _ = self._stations[station]
+        lower = np.searchsorted(times_ns, starts_ns, side='left')
+        upper = np.searchsorted(times_ns, starts_ns + width_ns, side='left')
+        return lower, upper
+    
+    def rows(self, station: str, lower: int, upper: int) -> np.ndarray:
+        """Row numbers between two sorted positions, in original file order"""
+        if upper <= lower:
+            return np.array([], dtype=np.int64)
+        
+        _, positions = self._stations[station]
+        return np.sort(positions[lower:upper])
+
+
+class SnapshotIndex:
+    """
+    As-of index over inventory snapshots
+    Each snapshot dict is built once and shared by every window that sees it
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self.snapshots: List[Dict] = []
+        self._times_ns = np.array([], dtype=np.int64)
+        
+        if df.empty or 'timestamp' not in df.columns:
+            return
+        
+        df = df[df['timestamp'].notna()].sort_values('timestamp', kind='stable')
+        self.snapshots = to_records(df)
+        self._times_ns = to_epoch_ns(df['timestamp'])
+    
+    def lookup(self, times_ns: np.ndarray) -> np.ndarray:
+        """
+        Position of the latest snapshot at or before each time, or -1 if none
+        """
+        return np.searchsorted(self._times_ns, times_ns, side='right') - 1
+    
+    def get(self, position: int) -> Dict:
+        """Shared snapshot dict for a lookup position"""
+        return self.snapshots[position] if position >= 0 else {}
@@ -0,0 +1,188 @@
+"""
+Window Table Module
+Columnar membership of synchronized windows for vectorized detectors
+"""
+
+import numpy as np
+import pandas as pd
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.records import SlotRecord
+
+
+# Epoch-ns stand-in for a missing timestamp (the int64 value of NaT)
+NAT_NS = np.iinfo(np.int64).min
+
+
+def epoch_ns(value: Any) -> Optional[int]:
+    """Epoch nanoseconds of a record timestamp, or None when it has none"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.value
+    try:
+        timestamp = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    return None if timestamp is pd.NaT else timestamp.value
+
+
+class RecordColumns:
+    """
+    Column reads over one source's records, each computed once
+    
+    Payload fields come from the loader's flattened `data.<field>` columns
+    when a frame is given, and from the record dicts otherwise. Missing
+    values read as None.
+    """
+    
+    def __init__(self, records: Sequence, frame: Optional[pd.DataFrame] = None):
+        self.records = records
+        self.frame = frame
+        self._columns: Dict[str, np.ndarray] = {}
+    
+    def column(self, name: str) -> np.ndarray:
+        """Object array of one field for every record"""
+        if name not in self._columns:
+            self._columns[name] = self._read(name)
+        return self._columns[name]
+    
+    def _read(self, name: str) -> np.ndarray:
+        """Read a field for every record into an object array"""
+        if name == 'status':
+            values = _values(self.records, 'status')
+        elif name == 'has_data':
+            values = [bool(data) for data in _values(self.records, 'data')]
+        elif self.frame is not None and f"data.{name}" in self.frame.columns:
+            column = self.frame[f"data.{name}"]
+            values = column.astype(object).where(column.notna(), None).tolist()
+        else:
+            values = [data.get(name) if data else None for data in _values(self.records, 'data')]
+        
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    
+    def times_ns(self) -> np.ndarray:
+        """Epoch-ns timestamp of every record, NAT_NS where there is none"""
+        if 'timestamp_ns' not in self._columns:
+            self._columns['timestamp_ns'] = self._read_times()
+        return self._columns['timestamp_ns']
+    
+    def _read_times(self) -> np.ndarray:
+        """Parse the record timestamps in one vectorized call where possible"""
+        if self.frame is not None and 'timestamp' in self.frame.columns \
+                and pd.api.types.is_datetime64_any_dtype(self.frame['timestamp']):
+            return self.frame['timestamp'].to_numpy(dtype='datetime64[ns]').view('int64')
+        
+        values = _values(self.records, 'timestamp')
+        try:
+            times = pd.to_datetime(pd.Series(values, dtype=object))
+            return times.to_numpy(dtype='datetime64[ns]').view('int64')
+        except (ValueError, TypeError):
+            # Mixed formats: parse one at a time like epoch_ns() does
+            times = [epoch_ns(value) for value in values]
+            return np.array([NAT_NS if time is None else time for time in times], dtype=np.int64)
+
+
+class WindowTable:
+    """
+    Which records of every source belong to which window, as arrays
+    
+    For each source the table holds parallel `window` and `row` arrays: one
+    entry per (window, record) pair, in the order the records appear inside
+    the window, with `row` pointing into the source's RecordColumns.
+    """
+    
+    def __init__(self, windows: Sequence, members: Dict[str, Tuple[RecordColumns, np.ndarray, np.ndarray]]):
+        self.windows = windows
+        self.members = members
+        self._station_codes: Optional[np.ndarray] = None
+    
+    @classmethod
+    def from_windows(cls, windows: Sequence, sources: Sequence[str]) -> 'WindowTable':
+        """
+        Build the table by walking already-built windows
+        Records shared by overlapping windows are read once
+        """
+        members = {}
+        for source in sources:
+            per_window = [events or () for events in _values(windows, source)]
+            window_ids = np.repeat(np.arange(len(per_window), dtype=np.int64),
+                                   np.fromiter(map(len, per_window), dtype=np.int64, count=len(per_window)))
+            records = list(chain.from_iterable(per_window))
+            
+            # Codes of the record identities follow first appearance; the
+            # reversed scatter leaves each code pointing at its first row
+            ids = np.fromiter(map(id, records), dtype=np.int64, count=len(records))
+            rows, distinct = pd.factorize(ids)
+            first = np.empty(len(distinct), dtype=np.int64)
+            first[rows[::-1]] = np.arange(len(rows) - 1, -1, -1)
+            
+            unique = [records[i] for i in first.tolist()]
+            members[source] = (RecordColumns(unique), window_ids, rows.astype(np.int64))
+        return cls(windows, members)
+    
+    def window_ids(self, source: str) -> np.ndarray:
+        """Window position of every (window, record) pair"""
+        return self.members[source][1]
+    
+    def column(self, source: str, name: str) -> np.ndarray:
+        """A record field for every (window, record) pair"""
+        columns, _, rows = self.members[source]
+        return columns.column(name)[rows]
+    
+    def rows(self, source: str) -> np.ndarray:
+        """Source row of every (window, record) pair"""
+        return self.members[source][2]
+    
+    def times_ns(self, source: str) -> np.ndarray:
+        """Epoch-ns record timestamp of every (window, record) pair"""
+        columns, _, rows = self.members[source]
+        return columns.times_ns()[rows]
+    
+    def active(self, source: str) -> np.ndarray:
+        """Mask of pairs whose record is Active and carries data (WindowView.active)"""
+        return (self.column(source, 'status') == 'Active') & self.column(source, 'has_data').astype(bool)
+    
+    def record(self, source: str, pair: int):
+        """The record behind one (window, record) pair"""
+        columns, _, rows = self.members[source]
+        return columns.records[rows[pair]]
+    
+    def station_codes(self) -> np.ndarray:
+        """Integer code of every window's station, in window order"""
+        if self._station_codes is None:
+            codes, _ = pd.factorize(np.array(_values(self.windows, 'station_id'), dtype=object),
+                                    use_na_sentinel=False)
+            self._station_codes = codes.astype(np.int64)
+        return self._station_codes
+    
+    def counts(self, source: str) -> np.ndarray:
+        """Number of records (any status) of a source in every window"""
+        return np.bincount(self.window_ids(source), minlength=len(self.windows))
+    
+    @staticmethod
+    def group_lists(positions: Sequence[int], values: Sequence) -> Dict[int, list]:
+        """Values gathered per window position, in row order, positions ascending"""
+        positions = np.asarray(positions)
+        if not len(positions):
+            return {}
+        order = np.argsort(positions, kind='stable')
+        ordered = positions[order]
+        values = np.asarray(values, dtype=object)[order].tolist()
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        ends = np.r_[starts[1:], len(ordered)]
+        return {
+            position: values[start:end]
+            for position, start, end in zip(ordered[starts].tolist(), starts.tolist(), ends.tolist())
+        }
+
+
+def _values(records: Sequence, name: str) -> List[Any]:
+    """One field of every record, read straight from the slot when there is one"""
+    if records and isinstance(records[0], SlotRecord):
+        return list(map(attrgetter(name), records))
+    return [record.get(name) for record in records]
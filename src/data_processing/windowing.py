@@ -0,0 +1,109 @@
+"""
+Windowing Module
+Tumbling, hopping and session window policies over a station's record times
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+
+class WindowPolicy:
+    """
+    Maps one station's sorted record times (epoch ns) to the windows that
+    cover them; only windows holding at least one record are produced
+    """
+    
+    name = None
+    
+    def windows(self, times_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and (exclusive) end of every window, in start order"""
+        raise NotImplementedError
+    
+    def first_close(self, time_ns: int) -> int:
+        """Earliest end of a window that can contain a record at this time"""
+        raise NotImplementedError
+
+
+class TumblingWindows(WindowPolicy):
+    """Back-to-back windows of a fixed width; every record is in exactly one"""
+    
+    name = 'tumbling'
+    
+    def __init__(self, width_seconds: float):
+        self.width_ns = pd.Timedelta(seconds=width_seconds).value
+    
+    def windows(self, times_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        starts = np.unique(times_ns // self.width_ns) * self.width_ns
+        return starts, starts + self.width_ns
+    
+    def first_close(self, time_ns: int) -> int:
+        return time_ns // self.width_ns * self.width_ns + self.width_ns
+
+
+class HoppingWindows(WindowPolicy):
+    """
+    Fixed-width windows starting every `stride`; with a stride shorter than
+    the width each record is in about width / stride windows
+    """
+    
+    name = 'hopping'
+    
+    def __init__(self, width_seconds: float, stride_seconds: float):
+        self.width_ns = pd.Timedelta(seconds=width_seconds).value
+        self.stride_ns = pd.Timedelta(seconds=stride_seconds).value
+        if self.stride_ns <= 0:
+            raise ValueError("Hopping window stride must be positive")
+        self.per_record = -(-self.width_ns // self.stride_ns)
+    
+    def windows(self, times_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Window k covers [k * stride, k * stride + width)
+        last = times_ns // self.stride_ns
+        first = (times_ns - self.width_ns) // self.stride_ns + 1
+        candidates = last[:, None] - np.arange(self.per_record)[None, :]
+        starts = np.unique(candidates[candidates >= first[:, None]]) * self.stride_ns
+        return starts, starts + self.width_ns
+    
+    def first_close(self, time_ns: int) -> int:
+        return ((time_ns - self.width_ns) // self.stride_ns + 1) * self.stride_ns + self.width_ns
+
+
+class SessionWindows(WindowPolicy):
+    """
+    One window per burst of station activity, closed by a quiet gap
+    A window runs from its first record to `gap` after its last one
+    """
+    
+    name = 'session'
+    
+    def __init__(self, gap_seconds: float):
+        self.gap_ns = pd.Timedelta(seconds=gap_seconds).value
+    
+    def windows(self, times_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if len(times_ns) == 0:
+            return times_ns[:0], times_ns[:0]
+        
+        breaks = np.flatnonzero(np.diff(times_ns) >= self.gap_ns) + 1
+        starts = times_ns[np.concatenate([[0], breaks])]
+        lasts = times_ns[np.concatenate([breaks - 1, [len(times_ns) - 1]])]
+        return starts, lasts + self.gap_ns
+    
+    def first_close(self, time_ns: int) -> int:
+        return time_ns + self.gap_ns
+
+
+def create_window_policy(name: str, window_seconds: float, stride_seconds: Optional[float] = None,
+                         gap_seconds: Optional[float] = None) -> Optional[WindowPolicy]:
+    """
+    Build a window policy by name; 'timestamp' (one overlapping window per
+    distinct timestamp for every station) returns None
+    """
+    if name in (None, 'timestamp'):
+        return None
+    if name == 'tumbling':
+        return TumblingWindows(window_seconds)
+    if name == 'hopping':
+        return HoppingWindows(window_seconds, stride_seconds or window_seconds)
+    if name == 'session':
+        return SessionWindows(gap_seconds or window_seconds)
+    raise ValueError(f"Unknown window policy: {name}")
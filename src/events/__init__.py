@@ -3,6 +3,11 @@ Events Module
 Handles event detection, generation, and output
 """
 
-from .event_generator import EventGenerator
+from .event import Event
+from .event_broadcaster import EventBroadcaster
+from .event_coalescer import EventCoalescer
+from .event_generator import EventGenerator, EventWriter
+from .event_store import EventStore
+from .event_summary import EventSummary
 
-__all__ = ['EventGenerator']
+__all__ = ['Event', 'EventBroadcaster', 'EventCoalescer', 'EventGenerator', 'EventStore', 'EventSummary', 'EventWriter']
@@ -0,0 +1,22 @@
+"""
+Event Module
+Compact detector event type, converted to a dict only when written out
+"""
+
+from typing import Dict, Optional
+
+from utils.records import SlotRecord, intern_code
+
+
+class Event(SlotRecord):
+    """A detector finding in the events.jsonl schema"""
+    
+    __slots__ = ('event_type', 'timestamp', 'station_id', 'severity', 'details')
+    
+    def __init__(self, event_type: str, timestamp: Optional[str] = None, station_id: Optional[str] = None,
+                 severity: str = 'LOW', details: Optional[Dict] = None):
+        self.event_type = intern_code(event_type)
+        self.timestamp = timestamp
+        self.station_id = intern_code(station_id)
+        self.severity = intern_code(severity)
+        self.details = details
@@ -0,0 +1,101 @@
+"""
+Event Broadcaster Module
+Fans new events out to subscribed clients through bounded per-client backlogs
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .event_store import FILTER_COLUMNS
+
+
+class Subscription:
+    """
+    One client's filters and its backlog of matching events
+    
+    The backlog holds at most `max_backlog` events. When the client falls
+    that far behind, the oldest events are dropped and counted instead of
+    making the producer wait.
+    """
+    
+    __slots__ = ('filters', 'backlog', 'dropped', '_condition')
+    
+    def __init__(self, filters: Dict[str, frozenset], max_backlog: int):
+        self.filters = filters
+        self.backlog: deque = deque(maxlen=max_backlog)
+        self.dropped = 0
+        self._condition = threading.Condition()
+    
+    def matches(self, event: Dict) -> bool:
+        """Whether an event passes every filter"""
+        return all(event.get(column) in values for column, values in self.filters.items())
+    
+    def offer(self, item: Tuple[int, Dict]):
+        """Queue an (id, event) pair, dropping the oldest one when the backlog is full"""
+        with self._condition:
+            if len(self.backlog) == self.backlog.maxlen:
+                self.dropped += 1
+            self.backlog.append(item)
+            self._condition.notify()
+    
+    def take(self, timeout: float) -> Tuple[List[Tuple[int, Dict]], int]:
+        """
+        Wait up to `timeout` seconds for events and take all of them
+        Returns the (id, event) pairs and how many were dropped since the last take
+        """
+        with self._condition:
+            if not self.backlog and not self.dropped:
+                self._condition.wait(timeout)
+            items = list(self.backlog)
+            self.backlog.clear()
+            dropped, self.dropped = self.dropped, 0
+        return items, dropped
+
+
+class EventBroadcaster:
+    """
+    Publishes stored events to every subscription whose filters they pass
+    
+    The subscription list is replaced on every change rather than mutated,
+    so publishing reads it without a lock, and offering an event to a
+    subscription never blocks on a slow client.
+    """
+    
+    def __init__(self, max_backlog: int):
+        self.max_backlog = max_backlog
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+    
+    def subscribe(self, **filters: Optional[Sequence[str]]) -> Subscription:
+        """New subscription to events matching the FILTER_COLUMNS filters given"""
+        for column in filters:
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter events on {column}")
+        subscription = Subscription(
+            {column: frozenset(values) for column, values in filters.items() if values},
+            self.max_backlog
+        )
+        with self._lock:
+            self._subscriptions += (subscription,)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        """Stop delivering events to a subscription"""
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+    
+    def publish(self, items: Iterable[Tuple[int, Dict]]):
+        """Offer (id, event) pairs to the subscriptions that match them"""
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        for item in items:
+            for subscription in subscriptions:
+                if subscription.matches(item[1]):
+                    subscription.offer(item)
+    
+    @property
+    def subscriber_count(self) -> int:
+        """Number of current subscriptions"""
+        return len(self._subscriptions)
@@ -0,0 +1,148 @@
+"""
+Event Coalescer Module
+Merges repeats of the same finding into one event before output
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from data_processing.window_table import epoch_ns
+
+from .event import Event
+
+
+# Higher rank wins when repeats of a finding disagree on severity
+SEVERITY_RANK = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2, 'CRITICAL': 3}
+
+
+class _Pending:
+    """A finding waiting out its suppression horizon"""
+    
+    __slots__ = ('event', 'first_ns', 'last_seen', 'last_ns', 'severity', 'count')
+    
+    def __init__(self, event: Dict, time_ns: int):
+        self.event = event
+        self.first_ns = time_ns
+        self.last_seen = event.get('timestamp')
+        self.last_ns = time_ns
+        self.severity = event.get('severity')
+        self.count = 1
+
+
+class EventCoalescer:
+    """
+    Suppresses repeats of an event within a horizon of its first occurrence
+    
+    Events are keyed by event type, station and the identifying detail
+    fields (SKU, EPC, system...). The first event of a key opens an entry;
+    repeats within `horizon_seconds` of it are folded into that entry, which
+    is released as one event carrying first_seen, last_seen and count once
+    the horizon has passed. Entries live in insertion order, which for
+    time-ordered input is also expiry order, so expiry and the `max_keys`
+    bound both evict from the front of the map and events come out in
+    timestamp order. Events without a timestamp pass straight through.
+    """
+    
+    def __init__(self, horizon_seconds: float, max_keys: int, key_fields: Sequence[str]):
+        self.horizon_ns = int(horizon_seconds * 1_000_000_000)
+        self.max_keys = max_keys
+        self.key_fields = tuple(key_fields)
+        self.pending: 'OrderedDict[Tuple, _Pending]' = OrderedDict()
+        self.merged = 0
+        self._now_ns = None
+    
+    def coalesce(self, events: List[Dict]) -> List[Dict]:
+        """Coalesce a whole list of events, in any order"""
+        timed = sorted([e for e in events if e.get('timestamp')], key=lambda e: e.get('timestamp'))
+        untimed = [e for e in events if not e.get('timestamp')]
+        return list(self.stream(timed)) + untimed
+    
+    def stream(self, events: Iterable[Dict]) -> Iterator[Dict]:
+        """Coalesce events arriving in timestamp order, yielding them as they are released"""
+        for event in events:
+            yield from self.push(event)
+        yield from self.drain()
+    
+    # @algorithm TTL Coalescing | Insertion-ordered map with horizon expiry and a size bound
+    def push(self, event: Dict) -> List[Dict]:
+        """Add one event; returns the events released by it"""
+        time_ns = epoch_ns(event.get('timestamp')) if event.get('timestamp') else None
+        if time_ns is None:
+            return [event]
+        
+        if self._now_ns is None or time_ns > self._now_ns:
+            self._now_ns = time_ns
+        released = self._expire(self._now_ns - self.horizon_ns)
+        
+        key = self._key(event)
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = _Pending(event, time_ns)
+            if len(self.pending) > self.max_keys:
+                released.append(self._release(self.pending.popitem(last=False)[1]))
+            return released
+        
+        entry.count += 1
+        self.merged += 1
+        if time_ns >= entry.last_ns:
+            entry.last_seen, entry.last_ns = event.get('timestamp'), time_ns
+        if SEVERITY_RANK.get(event.get('severity'), -1) > SEVERITY_RANK.get(entry.severity, -1):
+            entry.severity = event.get('severity')
+        return released
+    
+    def drain(self) -> List[Dict]:
+        """Release every pending event"""
+        released = [self._release(entry) for entry in self.pending.values()]
+        self.pending.clear()
+        return released
+    
+    def _expire(self, cutoff_ns: int) -> List[Dict]:
+        """Release the entries whose horizon ended before the cutoff"""
+        released = []
+        while self.pending:
+            entry = next(iter(self.pending.values()))
+            if entry.first_ns >= cutoff_ns:
+                break
+            self.pending.popitem(last=False)
+            released.append(self._release(entry))
+        return released
+    
+    def _release(self, entry: _Pending) -> Dict:
+        """The event of an entry, with its repeats folded in when it has any"""
+        event = entry.event
+        if entry.count == 1:
+            return event
+        
+        details = dict(event.get('details') or {})
+        details['occurrences'] = {
+            'first_seen': event.get('timestamp'),
+            'last_seen': entry.last_seen,
+            'count': entry.count
+        }
+        return Event(
+            event_type=event.get('event_type'),
+            timestamp=event.get('timestamp'),
+            station_id=event.get('station_id'),
+            severity=entry.severity,
+            details=details
+        )
+    
+    def _key(self, event: Dict) -> Tuple:
+        """Identity of the finding an event reports"""
+        details = event.get('details') or {}
+        return (event.get('event_type'), event.get('station_id'),
+                tuple(_hashable(details.get(field)) for field in self.key_fields))
+
+
+def _hashable(value: Any) -> Any:
+    """Detail value usable in a key: lists become sorted tuples, dicts their sorted keys"""
+    if isinstance(value, (list, tuple, set)):
+        # Detectors build some lists from sets, so their order carries no meaning
+        return tuple(sorted((_hashable(item) for item in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted(map(str, value)))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
@@ -3,54 +3,341 @@ Event Generation Module
 Generates and exports events in JSONL format
 """
 
+import gzip
+import heapq
 import json
 import logging
+import re
+import shutil
+import time
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
 from datetime import datetime
 
+from .event_summary import EventSummary
+
+try:
+    import zstandard
+except ImportError:  # Optional zstd output
+    zstandard = None
+
+
+# File suffix of each supported output compression
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Partition of events without a timestamp (end-of-run summaries)
+UNTIMED_PARTITION = 'date=none/hour=none'
+
+# Per-partition summary index file
+PARTITION_INDEX = '_summary.json'
+
+
+class EventWriter:
+    """
+    Buffered JSONL sink for events, optionally gzip or zstd compressed
+    
+    Lines are serialized in batches and each batch reaches the file in a
+    single write through a large buffer, so the per-event cost is one
+    json.dumps and a list append.
+    """
+    
+    # Events serialized per write call
+    BATCH_SIZE = 1000
+    
+    # Bytes buffered before the file (or compressor) sees them
+    BUFFER_SIZE = 1 << 20
+    
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        self.path = Path(path)
+        self.count = 0
+        self.bytes = 0
+        self._lines: List[str] = []
+        self._raw = open(self.path, 'wb', buffering=self.BUFFER_SIZE)
+        if compression == 'gzip':
+            self._file = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6)
+        elif compression == 'zstd':
+            self._file = zstandard.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._file = self._raw
+    
+    def write(self, event: Dict):
+        """Queue one formatted event, writing the batch once it is full"""
+        line = json.dumps(event)
+        self._lines.append(line)
+        # json.dumps escapes non-ASCII, so characters are bytes
+        self.bytes += len(line) + 1
+        if len(self._lines) >= self.BATCH_SIZE:
+            self._write_batch()
+    
+    def flush(self):
+        """Push everything written so far through to the file"""
+        self._write_batch()
+        self._file.flush()
+        if self._file is not self._raw:
+            self._raw.flush()
+    
+    def close(self):
+        """Write the last batch and close the file"""
+        self._write_batch()
+        if self._file is not self._raw:
+            self._file.close()
+        self._raw.close()
+    
+    def _write_batch(self):
+        """Serialize the queued lines in one write call"""
+        if self._lines:
+            self._file.write(('\n'.join(self._lines) + '\n').encode('utf-8'))
+            self.count += len(self._lines)
+            self._lines = []
+    
+    def __enter__(self) -> 'EventWriter':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PartitionedEventWriter:
+    """
+    Event sink that splits output into hourly partitions of rolling part files
+    
+    Events go to `date=YYYY-MM-DD/hour=HH/part-N.jsonl` under the root by
+    their own timestamp. A partition moves on to a new part file once the
+    current one holds `max_bytes` of JSON or has been open `max_seconds`, and each
+    partition keeps a `_summary.json` index (its EventSummary counts and
+    parts) rewritten whenever one of its parts closes.
+    Events arrive in timestamp order, so a new hour closes the earlier
+    ones; a late event reopens its partition in a new part. With `append`
+    existing parts and indexes are extended, never overwritten, so a
+    restarted process carries on where the last one stopped; otherwise
+    the root is cleared first and the output replaces the earlier run's.
+    """
+    
+    def __init__(self, root: Path, compression: Optional[str] = None,
+                 max_bytes: int = 64 * 1024 * 1024, max_seconds: float = 3600,
+                 append: bool = True):
+        self.path = Path(root)
+        if not append and self.path.exists():
+            shutil.rmtree(self.path)
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.count = 0
+        self.parts: Dict[str, EventWriter] = {}
+        self._opened: Dict[str, float] = {}
+        self._summaries: Dict[str, EventSummary] = {}
+        self._parts: Dict[str, List[Dict]] = {}
+        self._part_pattern = re.compile(
+            r'part-(\d+)\.jsonl' + re.escape(COMPRESSION_SUFFIXES[compression]) + '$'
+        )
+    
+    def write(self, event: Dict):
+        """Write one formatted event to its partition, rolling the part file over when due"""
+        partition = self._partition(event.get('timestamp'))
+        writer = self.parts.get(partition)
+        if writer is None:
+            writer = self._open(partition)
+        elif writer.bytes >= self.max_bytes or time.monotonic() - self._opened[partition] >= self.max_seconds:
+            self._close(partition)
+            writer = self._open(partition)
+        
+        writer.write(event)
+        self._summaries[partition].add(event)
+        self.count += 1
+    
+    def flush(self):
+        """Push every open part through to its file"""
+        for writer in self.parts.values():
+            writer.flush()
+    
+    def close(self):
+        """Close every open part and write the partition indexes"""
+        for partition in list(self.parts):
+            self._close(partition)
+    
+    def _partition(self, timestamp: Optional[str]) -> str:
+        """Partition directory of an ISO timestamp"""
+        if not timestamp or len(timestamp) < 13:
+            return UNTIMED_PARTITION
+        return f"date={timestamp[:10]}/hour={timestamp[11:13]}"
+    
+    def _open(self, partition: str) -> EventWriter:
+        """Start the next part file of a partition, closing earlier hours"""
+        if partition != UNTIMED_PARTITION:
+            for done in [name for name in self.parts if name != UNTIMED_PARTITION and name < partition]:
+                self._close(done)
+        
+        directory = self.path / partition
+        directory.mkdir(parents=True, exist_ok=True)
+        if partition not in self._summaries:
+            self._load_index(directory, partition)
+        
+        numbers = [int(match.group(1)) for match in map(self._part_pattern.match, (p.name for p in directory.iterdir()))
+                   if match]
+        name = f"part-{max(numbers, default=-1) + 1}.jsonl{COMPRESSION_SUFFIXES[self.compression]}"
+        writer = self.parts[partition] = EventWriter(directory / name, self.compression)
+        self._opened[partition] = time.monotonic()
+        return writer
+    
+    def _close(self, partition: str):
+        """Close a partition's part file and rewrite its index"""
+        writer = self.parts.pop(partition)
+        self._opened.pop(partition)
+        writer.close()
+        
+        self._parts[partition].append(
+            {'file': writer.path.name, 'events': writer.count, 'bytes': writer.path.stat().st_size}
+        )
+        index = self._summaries[partition].to_dict()
+        index.update({'partition': partition, 'parts': self._parts[partition]})
+        with open(writer.path.parent / PARTITION_INDEX, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+    
+    def _load_index(self, directory: Path, partition: str):
+        """Carry on from the index left by an earlier run in this partition, if any"""
+        index = {}
+        path = directory / PARTITION_INDEX
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        self._summaries[partition] = EventSummary.from_dict(index)
+        self._parts[partition] = index.get('parts', [])
+    
+    def __enter__(self) -> 'PartitionedEventWriter':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
 
 class EventGenerator:
     """Generates events.jsonl output file"""
     
-    def __init__(self, output_path: str):
+    def __init__(self, output_path: str, compression: Optional[str] = None,
+                 partition: Optional[Dict] = None):
+        """
+        `partition` switches to time-partitioned output under
+        `output_path/events`; it holds the PartitionedEventWriter rollover
+        limits (max_bytes, max_seconds)
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd output needs the zstandard package")
         self.output_path = Path(output_path)
+        self.compression = compression
+        self.partition = partition
         self.logger = logging.getLogger('sentinel.event_generator')
+        self._live_writer = None
     
     def generate(self, events: List[Dict]) -> str:
         """
         Generate events.jsonl file from detected events
         """
-        # Create output directory if it doesn't exist
-        self.output_path.mkdir(parents=True, exist_ok=True)
-        
-        # Output file path
-        output_file = self.output_path / 'events.jsonl'
+        return self.generate_sorted([events])
+    
+    # @algorithm K-Way Merge | Heap merge of per-detector streams already in timestamp order
+    def generate_sorted(self, streams: Sequence[Iterable[Dict]]) -> str:
+        """
+        Write several event streams as one file in timestamp order
         
-        # Sort events by timestamp
-        sorted_events = sorted(
-            [e for e in events if e.get('timestamp')],
-            key=lambda x: x.get('timestamp', '')
-        )
+        Each stream is expected in timestamp order (detector output over
+        ordered windows is), and a heap merge interleaves them holding one
+        pending event per stream, so cost stays linear. Lists that turn out
+        not to be in order are sorted first. Events without a timestamp are
+        written at the end in stream order; ties keep the stream order.
+        """
+        no_timestamp = []
+        timed = [self._timed(self._ordered(stream), no_timestamp) for stream in streams]
+        merged = heapq.merge(*timed, key=lambda event: event.get('timestamp'))
         
-        # Add events without timestamps at the end
-        no_timestamp = [e for e in events if not e.get('timestamp')]
-        sorted_events.extend(no_timestamp)
+        with self._writer() as writer:
+            for event in merged:
+                writer.write(self._format_event(event))
+            for event in no_timestamp:
+                writer.write(self._format_event(event))
         
-        # Write events to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for event in sorted_events:
-                # Format event
-                formatted_event = self._format_event(event)
-                f.write(json.dumps(formatted_event) + '\n')
+        self.logger.info(f"Generated {writer.count} events to {writer.path}")
+        return str(writer.path)
+    
+    def stream(self, events: Iterable[Dict]) -> str:
+        """
+        Write events to events.jsonl as they arrive
+        Events must arrive in timestamp order; events without a timestamp
+        are held back and written at the end, as generate() does
+        """
+        no_timestamp = []
+        with self._writer() as writer:
+            for event in self._timed(events, no_timestamp):
+                writer.write(self._format_event(event))
+            for event in no_timestamp:
+                writer.write(self._format_event(event))
         
-        self.logger.info(f"Generated {len(events)} events to {output_file}")
-        return str(output_file)
+        self.logger.info(f"Generated {writer.count} events to {writer.path}")
+        return str(writer.path)
+    
+    def open(self) -> str:
+        """
+        Start events.jsonl for events pushed one at a time with write_event()
+        Used by the realtime engine, where events arrive as windows close;
+        partitioned output carries on from the earlier runs' parts
+        """
+        self._live_writer = self._writer(append=True)
+        return str(self._live_writer.path)
+    
+    def write_event(self, event: Dict):
+        """Write one event and flush it so readers see it immediately"""
+        self._live_writer.write(self._format_event(event))
+        self._live_writer.flush()
+    
+    def close(self):
+        """Close the file started by open()"""
+        if self._live_writer is not None:
+            self._live_writer.close()
+            self.logger.info(f"Generated {self._live_writer.count} events to {self._live_writer.path}")
+            self._live_writer = None
+    
+    def _writer(self, append: bool = False):
+        """
+        Open the events file, named for the configured compression, or the
+        partitioned sink; only `append` keeps the partitions of earlier runs
+        """
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        if self.partition is not None:
+            return PartitionedEventWriter(self.output_path / 'events', self.compression,
+                                          append=append, **self.partition)
+        output_file = self.output_path / f"events.jsonl{COMPRESSION_SUFFIXES[self.compression]}"
+        return EventWriter(output_file, self.compression)
+    
+    def _ordered(self, stream: Iterable[Dict]) -> Iterable[Dict]:
+        """A list in timestamp order (sorted when it is not); other iterables as given"""
+        if not isinstance(stream, list):
+            return stream
+        times = [event.get('timestamp') for event in stream if event.get('timestamp')]
+        if all(earlier <= later for earlier, later in zip(times, times[1:])):
+            return stream
+        return sorted(stream, key=lambda event: event.get('timestamp') or '')
+    
+    def _timed(self, events: Iterable[Dict], no_timestamp: List[Dict]) -> Iterator[Dict]:
+        """Events that carry a timestamp; the others are set aside in `no_timestamp`"""
+        for event in events:
+            if event.get('timestamp'):
+                yield event
+            else:
+                no_timestamp.append(event)
+    
+    def format_events(self, events: Iterable[Dict]) -> List[Dict]:
+        """
+        Output dicts for detector events, for consumers other than the
+        JSONL file (such as the dashboard)
+        """
+        return [self._format_event(event) for event in events]
     
     def _format_event(self, event: Dict) -> Dict:
         """
         Format event for output
-        Ensures consistent structure
+        Ensures consistent structure; this is where compact Event records
+        become dicts
         """
         formatted = {
             'event_type': event.get('event_type', 'UNKNOWN'),
@@ -62,28 +349,9 @@ class EventGenerator:
         
         return formatted
     
-    def generate_summary(self, events: List[Dict]) -> Dict:
+    @staticmethod
+    def generate_summary(events: Iterable[Dict]) -> Dict:
         """
         Generate summary statistics for events
         """
-        summary = {
-            'total_events': len(events),
-            'by_type': {},
-            'by_severity': {},
-            'by_station': {}
-        }
-        
-        for event in events:
-            # Count by type
-            event_type = event.get('event_type', 'UNKNOWN')
-            summary['by_type'][event_type] = summary['by_type'].get(event_type, 0) + 1
-            
-            # Count by severity
-            severity = event.get('severity', 'LOW')
-            summary['by_severity'][severity] = summary['by_severity'].get(severity, 0) + 1
-            
-            # Count by station
-            station = event.get('station_id', 'UNKNOWN')
-            summary['by_station'][station] = summary['by_station'].get(station, 0) + 1
-        
-        return summary
+        return EventSummary().add_all(events).to_dict()
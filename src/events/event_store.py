@@ -0,0 +1,202 @@
+"""
+Event Store Module
+Embedded SQLite store of output events with indexed, paginated queries
+"""
+
+import json
+import logging
+import sqlite3
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .event_summary import EventSummary
+
+
+# Columns an event can be filtered on, each with its own index
+FILTER_COLUMNS = ('station_id', 'event_type', 'severity')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    station_id TEXT,
+    event_type TEXT,
+    severity TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS events_station_id ON events (station_id);
+CREATE INDEX IF NOT EXISTS events_event_type ON events (event_type);
+CREATE INDEX IF NOT EXISTS events_severity ON events (severity);
+"""
+
+
+class EventStore:
+    """
+    Output events in a SQLite database in WAL mode
+    
+    Events keep the order they were added in as their row id, which is
+    also the pagination cursor: a page is the next `limit` rows after the
+    cursor that pass the filters. SQLite secondary indexes end in the row
+    id, so a filter on one indexed column walks its index in cursor order
+    without sorting. WAL mode lets readers query while events are added.
+    Connections come from a pool of at most MAX_CONNECTIONS, each lent to
+    one caller at a time, so a threaded server holds a bounded number of
+    them however many request threads it starts. `summary` counts every
+    stored event as it is added.
+    """
+    
+    # Page size when a query does not ask for one
+    DEFAULT_LIMIT = 100
+    
+    # Largest page a query may ask for
+    MAX_LIMIT = 1000
+    
+    # Most recent minutes kept in the per-minute summary counts
+    SUMMARY_MINUTES = 24 * 60
+    
+    # Most connections open at once; further callers wait for a free one
+    MAX_CONNECTIONS = 4
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger('sentinel.event_store')
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        
+        with self._connection() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+        
+        # Events already in the database are counted once, on open
+        self.summary = EventSummary(self.SUMMARY_MINUTES).add_all(self.scan())
+    
+    def add(self, events: Iterable[Dict]) -> List[int]:
+        """
+        Append formatted events in one transaction
+        Returns their row ids, which are also their cursors
+        """
+        events = list(events)
+        with self._connection() as connection, connection:
+            # Taking the write lock up front keeps the ids of one call consecutive
+            connection.execute('BEGIN IMMEDIATE')
+            first_id = connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM events').fetchone()[0]
+            connection.executemany(
+                'INSERT INTO events (id, timestamp, station_id, event_type, severity, details) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(first_id + i, event.get('timestamp'), event.get('station_id'), event.get('event_type'),
+                  event.get('severity'), json.dumps(event.get('details', {})))
+                 for i, event in enumerate(events)]
+            )
+        self.summary.add_all(events)
+        return list(range(first_id, first_id + len(events)))
+    
+    def clear(self):
+        """Remove every event"""
+        with self._connection() as connection, connection:
+            connection.execute('DELETE FROM events')
+        self.summary.clear()
+    
+    def count(self) -> int:
+        """Number of stored events"""
+        with self._connection() as connection:
+            return connection.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+    
+    def query(self, limit: Optional[int] = None, cursor: Optional[int] = None, descending: bool = False,
+              since: Optional[str] = None, until: Optional[str] = None, with_ids: bool = False,
+              **filters: Optional[Sequence[str]]) -> Tuple[List[Dict], Optional[int]]:
+        """
+        One page of events after `cursor`, oldest first unless `descending`
+        Filters take a list of accepted values per FILTER_COLUMNS column;
+        `since` and `until` bound the timestamp (inclusive). Returns the
+        events (with their row id as `id` when `with_ids`) and the cursor of
+        the next page, None on the last page.
+        """
+        limit = min(max(int(limit or self.DEFAULT_LIMIT), 1), self.MAX_LIMIT)
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append('id < ?' if descending else 'id > ?')
+            params.append(int(cursor))
+        for column, values in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter events on {column}")
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp <= ?')
+            params.append(until)
+        
+        sql = 'SELECT id, timestamp, station_id, event_type, severity, details FROM events'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        # One extra row tells whether another page follows
+        sql += f" ORDER BY id {'DESC' if descending else 'ASC'} LIMIT ?"
+        with self._connection() as connection:
+            rows = connection.execute(sql, params + [limit + 1]).fetchall()
+        
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        events = [self._event(row) for row in rows[:limit]]
+        if with_ids:
+            for event, row in zip(events, rows):
+                event['id'] = row[0]
+        return events, next_cursor
+    
+    def scan(self) -> Iterator[Dict]:
+        """Every event, in the order they were added; holds a connection until exhausted or closed"""
+        with self._connection() as connection:
+            for row in connection.execute(
+                    'SELECT id, timestamp, station_id, event_type, severity, details FROM events ORDER BY id'):
+                yield self._event(row)
+    
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+            self._idle = queue.LifoQueue()
+    
+    @property
+    def connection_count(self) -> int:
+        """Number of connections currently open"""
+        return len(self._connections)
+    
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection, opening one while under MAX_CONNECTIONS"""
+        with self._lock:
+            idle = self._idle
+            try:
+                connection = idle.get_nowait()
+            except queue.Empty:
+                connection = None
+                if len(self._connections) < self.MAX_CONNECTIONS:
+                    connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+                    # WAL keeps the database consistent without a sync on every commit
+                    connection.execute('PRAGMA synchronous=NORMAL')
+                    self._connections.append(connection)
+        if connection is None:
+            connection = idle.get()
+        try:
+            yield connection
+        finally:
+            idle.put(connection)
+    
+    def _event(self, row: tuple) -> Dict:
+        """Output dict of a stored row"""
+        return {
+            'event_type': row[3],
+            'timestamp': row[1],
+            'station_id': row[2],
+            'severity': row[4],
+            'details': json.loads(row[5]) if row[5] else {}
+        }
@@ -0,0 +1,118 @@
+"""
+Event Summary Module
+Event counters kept up to date as events are added, shared by every summary consumer
+"""
+
+import secrets
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class EventSummary:
+    """
+    Incremental summary of output events
+    
+    Counts by event type, severity, station and minute, plus the time range
+    covered, are updated as each event is added, so reading the summary
+    costs the same however many events it covers. `version` changes with
+    every added event and, with a token unique to the instance, makes the
+    `etag` that lets a reader tell whether anything changed.
+    """
+    
+    def __init__(self, max_minutes: Optional[int] = None):
+        # Oldest minute buckets are dropped past this many (None keeps all)
+        self.max_minutes = max_minutes
+        self.version = 0
+        self._token = secrets.token_hex(4)
+        self._lock = threading.Lock()
+        self._reset()
+    
+    @classmethod
+    def from_dict(cls, summary: Dict, max_minutes: Optional[int] = None) -> 'EventSummary':
+        """Rebuild the counters of a summary written out by to_dict()"""
+        restored = cls(max_minutes)
+        restored.total = summary.get('total_events', 0)
+        for name in ('by_type', 'by_severity', 'by_station', 'by_minute'):
+            getattr(restored, name).update(summary.get(name, {}))
+        restored.first_timestamp = summary.get('first_timestamp')
+        restored.last_timestamp = summary.get('last_timestamp')
+        return restored
+    
+    def add(self, event: Dict):
+        """Count one event"""
+        event_type = event.get('event_type', 'UNKNOWN')
+        severity = event.get('severity', 'LOW')
+        station = event.get('station_id', 'UNKNOWN')
+        timestamp = event.get('timestamp')
+        
+        with self._lock:
+            self.total += 1
+            self.version += 1
+            self.by_type[event_type] = self.by_type.get(event_type, 0) + 1
+            self.by_severity[severity] = self.by_severity.get(severity, 0) + 1
+            self.by_station[station] = self.by_station.get(station, 0) + 1
+            
+            if timestamp:
+                self._count_minute(timestamp[:16])
+                
+                if self.first_timestamp is None or timestamp < self.first_timestamp:
+                    self.first_timestamp = timestamp
+                if self.last_timestamp is None or timestamp > self.last_timestamp:
+                    self.last_timestamp = timestamp
+    
+    def add_all(self, events: Iterable[Dict]) -> 'EventSummary':
+        """Count every event of an iterable"""
+        for event in events:
+            self.add(event)
+        return self
+    
+    def clear(self):
+        """Forget every event counted so far"""
+        with self._lock:
+            self._reset()
+            self.version += 1
+    
+    @property
+    def etag(self) -> str:
+        """Tag that changes whenever the summary does"""
+        return f"{self._token}-{self.version}"
+    
+    def to_dict(self) -> Dict:
+        """Plain dict of the counters, safe to serialize while events are being added"""
+        with self._lock:
+            return {
+                'total_events': self.total,
+                'by_type': dict(self.by_type),
+                'by_severity': dict(self.by_severity),
+                'by_station': dict(self.by_station),
+                'by_minute': dict(self.by_minute),
+                'first_timestamp': self.first_timestamp,
+                'last_timestamp': self.last_timestamp
+            }
+    
+    def _count_minute(self, minute: str):
+        """
+        Count an event in its minute bucket, keeping the newest max_minutes
+        Events can arrive out of order, so the bucket dropped is the
+        earliest minute, and a minute older than every kept one is not
+        counted once the cap is reached
+        """
+        if minute in self.by_minute:
+            self.by_minute[minute] += 1
+            return
+        if self.max_minutes is not None and len(self.by_minute) >= self.max_minutes:
+            oldest = min(self.by_minute)
+            if minute < oldest:
+                return
+            del self.by_minute[oldest]
+        self.by_minute[minute] = 1
+    
+    def _reset(self):
+        """Empty counters"""
+        self.total = 0
+        self.by_type: Dict[str, int] = {}
+        self.by_severity: Dict[str, int] = {}
+        self.by_station: Dict[str, int] = {}
+        self.by_minute: Dict[str, int] = {}
+        self.first_timestamp: Optional[str] = None
+        self.last_timestamp: Optional[str] = None
@@ -4,18 +4,19 @@ Retail Analytics & Optimization Platform
 """
 
 import argparse
+import asyncio
 import sys
 import logging
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 
 # Import core modules
+from data_processing.catalog import CatalogService
 from data_processing.data_loader import DataLoader
 from data_processing.data_synchronizer import DataSynchronizer
-from analytics.anomaly_detector import AnomalyDetector
-from analytics.queue_optimizer import QueueOptimizer
-from analytics.inventory_tracker import InventoryTracker
-from analytics.theft_detector import TheftDetector
+from analytics.dispatcher import create_default_dispatcher
+from events.event_coalescer import EventCoalescer
 from events.event_generator import EventGenerator
 from utils.logger import setup_logger
 from utils.config import Config
@@ -45,11 +46,68 @@ def parse_arguments():
         default='test',
         help='Execution mode'
     )
+    parser.add_argument(
+        '--window-policy',
+        type=str,
+        choices=['tumbling', 'hopping', 'session', 'timestamp'],
+        default=None,
+        help='How records are grouped into station windows (default: Config.WINDOW_POLICY)'
+    )
     parser.add_argument(
         '--dashboard',
         action='store_true',
         help='Launch dashboard'
     )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream records through the pipeline with flat memory use'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of processes for per-station analytics'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=None,
+        help='Columnar cache folder for parsed data (default: a folder per input under ~/.cache/sentinel)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always re-parse input files'
+    )
+    parser.add_argument(
+        '--no-coalesce',
+        action='store_true',
+        help='Write every detected event instead of merging repeats'
+    )
+    parser.add_argument(
+        '--compress',
+        choices=['gzip', 'zstd'],
+        default=None,
+        help='Compress events.jsonl (zstd needs the zstandard package)'
+    )
+    parser.add_argument(
+        '--partitioned',
+        action='store_true',
+        help='Write events/date=YYYY-MM-DD/hour=HH/part-N.jsonl partitions instead of one events.jsonl'
+    )
+    parser.add_argument(
+        '--listen',
+        type=str,
+        default=None,
+        help='Realtime mode: read records from HOST:PORT or unix:PATH instead of tailing files'
+    )
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=None,
+        help='Realtime mode: stop after this many seconds (default: run until interrupted)'
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -59,6 +117,112 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def create_synchronizer(args, config) -> DataSynchronizer:
+    """Build the synchronizer for the configured window policy"""
+    return DataSynchronizer(
+        config.TIME_WINDOW_SECONDS,
+        policy=args.window_policy or config.WINDOW_POLICY,
+        stride_seconds=config.WINDOW_STRIDE_SECONDS,
+        gap_seconds=config.SESSION_GAP_SECONDS
+    )
+
+
+def create_coalescer(args, config) -> Optional[EventCoalescer]:
+    """Build the stage that merges repeated events, unless it is turned off"""
+    if args.no_coalesce or config.COALESCE_HORIZON_SECONDS <= 0:
+        return None
+    return EventCoalescer(
+        config.COALESCE_HORIZON_SECONDS,
+        config.COALESCE_MAX_KEYS,
+        config.COALESCE_KEY_FIELDS
+    )
+
+
+def create_event_generator(args, config) -> EventGenerator:
+    """Build the output stage, partitioned by hour when requested"""
+    partition = None
+    if args.partitioned:
+        partition = {'max_bytes': config.PARTITION_MAX_BYTES, 'max_seconds': config.PARTITION_MAX_SECONDS}
+    return EventGenerator(args.output, compression=args.compress, partition=partition)
+
+
+def run_streaming(args, config, logger) -> Tuple[str, int]:
+    """Run the pipeline in streaming mode, returning output file and event count"""
+    logger.info("\n[STREAM] Streaming records through the pipeline...")
+    data_loader = DataLoader(args.input)
+    synchronizer = create_synchronizer(args, config)
+    windows = synchronizer.stream(data_loader.stream_all())
+    dispatcher = create_default_dispatcher(config, data_loader.load_catalog())
+    counts = {}
+    events = dispatcher.stream(windows, counts)
+    coalescer = create_coalescer(args, config)
+    if coalescer:
+        events = coalescer.stream(events)
+    
+    event_generator = create_event_generator(args, config)
+    output_file = event_generator.stream(events)
+    
+    log_detector_counts(logger, counts)
+    merged = coalescer.merged if coalescer else 0
+    if merged:
+        logger.info(f"✓ Merged {merged} repeated events")
+    logger.info(f"✓ Events written to: {output_file}")
+    
+    return output_file, sum(counts.values()) - merged
+
+
+def run_realtime(args, config, logger) -> Tuple[str, int]:
+    """Run the realtime engine, returning output file and event count"""
+    from realtime.engine import RealtimeEngine
+    
+    source = args.listen or args.input
+    logger.info(f"\n[REALTIME] Ingesting live sensor records from {source}...")
+    # The catalog CSVs are read from --input even when listening on a socket
+    dispatcher = create_default_dispatcher(config, DataLoader(args.input).load_catalog())
+    event_generator = create_event_generator(args, config)
+    output_file = event_generator.open()
+    sink = event_generator.write_event
+    
+    if args.dashboard:
+        # Events also go to the dashboard store and its /api/stream clients
+        from dashboard.app import start_dashboard
+        publish = start_dashboard(str(Path(args.output) / 'events.db'))
+        
+        def sink(event: Dict):
+            event_generator.write_event(event)
+            publish(event_generator.format_events([event]))
+    
+    engine = RealtimeEngine(
+        dispatcher,
+        sink,
+        window_seconds=config.TIME_WINDOW_SECONDS,
+        latency_budget_ms=config.REALTIME_LATENCY_BUDGET_MS,
+        poll_interval=config.REALTIME_POLL_INTERVAL_SECONDS
+    )
+    try:
+        asyncio.run(engine.run(
+            data_path=None if args.listen else args.input,
+            listen=args.listen,
+            duration=args.duration
+        ))
+    except KeyboardInterrupt:
+        logger.info("Realtime ingestion interrupted")
+    finally:
+        event_generator.close()
+    
+    report = engine.report()
+    latency = report['latency']
+    logger.info(f"✓ Processed {report['records']} records in {report['windows']} windows "
+                f"({report['late_records']} late, {report['invalid_records']} invalid)")
+    logger.info(f"  Latency p50={latency.get('p50_ms')} ms p99={latency.get('p99_ms')} ms "
+                f"max={latency['max_ms']} ms (budget {latency['budget_ms']} ms)")
+    if latency['over_budget']:
+        logger.warning(f"  {latency['over_budget']} windows exceeded the latency budget")
+    logger.info(f"✓ Events written to: {output_file}")
+    
+    return output_file, report['events']
+
+
 def main():
     """Main execution function"""
     # Parse arguments
@@ -81,71 +245,68 @@ def main():
         # Initialize configuration
         config = Config()
         
+        if args.mode == 'realtime':
+            output_file, event_count = run_realtime(args, config, logger)
+            log_summary(logger, event_count, output_file)
+            return 0
+        
+        if args.stream:
+            if args.dashboard:
+                logger.warning("Dashboard is not available in streaming mode")
+            if args.workers > 1:
+                logger.warning("--workers is ignored in streaming mode")
+            output_file, event_count = run_streaming(args, config, logger)
+            log_summary(logger, event_count, output_file)
+            return 0
+        
         # Step 1: Load Data
         logger.info("\n[STEP 1] Loading data from sources...")
-        data_loader = DataLoader(args.input)
-        raw_data = data_loader.load_all()
+        cache_dir = None if args.no_cache else (args.cache_dir or str(DataLoader.default_cache_dir(args.input)))
+        data_loader = DataLoader(args.input, cache_dir=cache_dir)
+        raw_data = data_loader.load_all(columnar=True)
         logger.info(f"✓ Loaded {len(raw_data)} data sources")
         
         # Step 2: Synchronize and correlate data
         logger.info("\n[STEP 2] Synchronizing and correlating data...")
-        synchronizer = DataSynchronizer()
+        synchronizer = create_synchronizer(args, config)
         synchronized_data = synchronizer.process(raw_data)
         logger.info(f"✓ Synchronized {len(synchronized_data)} time windows")
         
         # Step 3: Run Analytics
         logger.info("\n[STEP 3] Running analytics engines...")
         
-        # Initialize detectors
-        theft_detector = TheftDetector(config)
-        anomaly_detector = AnomalyDetector(config)
-        queue_optimizer = QueueOptimizer(config)
-        inventory_tracker = InventoryTracker(config)
+        # Initialize detectors and run them in a single pass over the windows
+        logger.info("  - Detecting theft, anomalies, queue and inventory issues...")
+        catalog = CatalogService(raw_data['products'], raw_data['customers'])
+        dispatcher = create_default_dispatcher(config, catalog)
+        results = dispatcher.run(synchronized_data, workers=args.workers, table=synchronizer.table)
         
         # Detect events
-        events = []
-        
-        logger.info("  - Detecting theft incidents...")
-        theft_events = theft_detector.detect(synchronized_data)
-        events.extend(theft_events)
-        logger.info(f"    Found {len(theft_events)} potential theft incidents")
-        
-        logger.info("  - Detecting anomalies...")
-        anomaly_events = anomaly_detector.detect(synchronized_data)
-        events.extend(anomaly_events)
-        logger.info(f"    Found {len(anomaly_events)} anomalies")
-        
-        logger.info("  - Optimizing queue management...")
-        queue_events = queue_optimizer.analyze(synchronized_data)
-        events.extend(queue_events)
-        logger.info(f"    Generated {len(queue_events)} queue insights")
-        
-        logger.info("  - Tracking inventory...")
-        inventory_events = inventory_tracker.track(synchronized_data)
-        events.extend(inventory_events)
-        logger.info(f"    Found {len(inventory_events)} inventory issues")
+        streams = [results[name] for name in dispatcher.names]
+        events = [event for found in streams for event in found]
+        log_detector_counts(logger, {name: len(found) for name, found in results.items()})
         
         # Step 4: Generate output
         logger.info("\n[STEP 4] Generating event output...")
-        event_generator = EventGenerator(args.output)
-        output_file = event_generator.generate(events)
+        coalescer = create_coalescer(args, config)
+        if coalescer:
+            events = coalescer.coalesce(events)
+            streams = [events]
+            logger.info(f"✓ Merged {coalescer.merged} repeated events")
+        # Per-detector results are each in window order, so they are merged rather than re-sorted
+        event_generator = create_event_generator(args, config)
+        output_file = event_generator.generate_sorted(streams)
         logger.info(f"✓ Events written to: {output_file}")
         
         # Step 5: Launch dashboard (optional)
         if args.dashboard:
             logger.info("\n[STEP 5] Launching dashboard...")
             from dashboard.app import launch_dashboard
-            launch_dashboard(events, synchronized_data)
+            launch_dashboard(event_generator.format_events(events), synchronized_data,
+                             str(Path(args.output) / 'events.db'))
         
         # Summary
-        logger.info("\n" + "=" * 60)
-        logger.info("EXECUTION SUMMARY")
-        logger.info("=" * 60)
-        logger.info(f"Total Events Detected: {len(events)}")
-        logger.info(f"Output File: {output_file}")
-        logger.info(f"End Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.info("=" * 60)
-        logger.info("✓ Processing completed successfully!")
+        log_summary(logger, len(events), output_file)
         
         return 0
         
@@ -154,5 +315,25 @@ def main():
         return 1
 
 
+def log_detector_counts(logger, counts: Dict[str, int]):
+    """Log the number of events found by each detector"""
+    logger.info(f"    Found {counts.get('theft', 0)} potential theft incidents")
+    logger.info(f"    Found {counts.get('anomaly', 0)} anomalies")
+    logger.info(f"    Generated {counts.get('queue', 0)} queue insights")
+    logger.info(f"    Found {counts.get('inventory', 0)} inventory issues")
+
+
+def log_summary(logger, event_count: int, output_file: str):
+    """Log the execution summary"""
+    logger.info("\n" + "=" * 60)
+    logger.info("EXECUTION SUMMARY")
+    logger.info("=" * 60)
+    logger.info(f"Total Events Detected: {event_count}")
+    logger.info(f"Output File: {output_file}")
+    logger.info(f"End Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info("=" * 60)
+    logger.info("✓ Processing completed successfully!")
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,8 @@
+"""
+Realtime Package
+Asyncio ingestion engine for live sensor streams
+"""
+
+from .engine import LatencyTracker, RealtimeEngine
+
+__all__ = ['LatencyTracker', 'RealtimeEngine']
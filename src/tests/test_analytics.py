@@ -2,6 +2,8 @@
 Unit Tests for Analytics Module
 """
 
+import json
+import pandas as pd
 import unittest
 import sys
 from pathlib import Path
@@ -13,9 +15,50 @@ from analytics.theft_detector import TheftDetector
 from analytics.anomaly_detector import AnomalyDetector
 from analytics.queue_optimizer import QueueOptimizer
 from analytics.inventory_tracker import InventoryTracker
+from analytics.dispatcher import DetectorDispatcher, create_default_dispatcher
+from analytics.epc_tracker import EpcTracker
+from analytics.online_stats import P2Quantile, Welford
+from data_processing.catalog import CatalogService
+from events.event import Event
 from utils.config import Config
 
 
+def make_window(timestamp, station_id='SCC1', **events):
+    """Build a synchronized window with the given source events"""
+    window = {
+        'timestamp': timestamp,
+        'window_start': timestamp,
+        'window_end': timestamp,
+        'station_id': station_id,
+        'rfid_events': [],
+        'queue_events': [],
+        'pos_events': [],
+        'recognition_events': [],
+        'inventory_snapshot': {}
+    }
+    window.update(events)
+    return window
+
+
+def make_sample_windows():
+    """Windows covering theft, anomaly, queue and inventory cases"""
+    rfid = {'status': 'Active', 'data': {'epc': 'E1', 'location': 'IN_SCAN_AREA', 'sku': 'PRD_F_01'}}
+    pos = {'status': 'Active', 'data': {'customer_id': 'C001', 'sku': 'PRD_F_02', 'price': 100.0, 'weight_g': 0}}
+    recognition = {'status': 'Active', 'data': {'predicted_product': 'PRD_F_03', 'accuracy': 0.95}}
+    busy_queue = {'status': 'Active', 'data': {'customer_count': 12, 'average_dwell_time': 240.0}}
+    crash = {'status': 'System Crash'}
+    error = {'status': 'Read Error'}
+    snapshot = {'timestamp': '2025-08-13T16:00:00', 'data': {'PRD_F_02': 10}}
+    
+    return [
+        make_window('2025-08-13T16:00:01', rfid_events=[rfid], pos_events=[pos],
+                    recognition_events=[recognition], inventory_snapshot=snapshot),
+        make_window('2025-08-13T16:00:01', 'SCC2', queue_events=[busy_queue, error],
+                    rfid_events=[error], recognition_events=[crash]),
+        make_window('2025-08-13T16:00:02', pos_events=[crash, pos], queue_events=[busy_queue]),
+    ]
+
+
 class TestTheftDetector(unittest.TestCase):
     """Test TheftDetector functionality"""
     
@@ -32,6 +75,155 @@ class TestTheftDetector(unittest.TestCase):
         result = self.detector.detect([])
         self.assertIsInstance(result, list)
         self.assertEqual(len(result), 0)
+    
+    def test_detect_batch_matches_update(self):
+        """Test the vectorized pass emits the per-window events in order"""
+        windows = make_sample_windows()
+        shared = {'status': 'Active', 'data': {'location': 'IN_SCAN_AREA', 'sku': 'PRD_F_02'}}
+        scanned = {'status': 'Active', 'data': {'sku': 'PRD_F_03', 'weight_g': 250}}
+        windows.append(make_window('2025-08-13T16:00:03', rfid_events=[shared], pos_events=[scanned],
+                                   recognition_events=windows[0]['recognition_events']))
+        windows.append(make_window('2025-08-13T16:00:04', rfid_events=[shared]))
+        # Several switches in one window come out in the same order on both paths
+        recognized = [{'status': 'Active', 'data': {'predicted_product': sku, 'accuracy': 0.95}}
+                      for sku in ('PRD_F_09', 'PRD_F_04', 'PRD_F_07')]
+        windows.append(make_window('2025-08-13T16:00:05', pos_events=[scanned], recognition_events=recognized))
+        
+        batch = self.detector.detect_batch(windows)
+        
+        expected = {}
+        for position, window in enumerate(windows):
+            found = TheftDetector(self.config).update(window)
+            if found:
+                expected[position] = found
+        self.assertEqual(batch, expected)
+        self.assertEqual([e['event_type'] for e in batch[0]],
+                         ['SCAN_AVOIDANCE', 'BARCODE_SWITCHING', 'WEIGHT_DISCREPANCY'])
+        self.assertEqual(batch[5][0]['details']['potential_switches'], ['PRD_F_04', 'PRD_F_07', 'PRD_F_09'])
+        self.assertEqual(self.detector.detect_batch([]), {})
+    
+    def test_scan_avoidance_once_per_item(self):
+        """Test a tag seen unscanned in overlapping windows is reported once per visit, when it closes"""
+        def read(second, epc='E1'):
+            return {'timestamp': f"2025-08-13T16:{second // 60:02d}:{second % 60:02d}", 'status': 'Active',
+                    'data': {'epc': epc, 'location': 'IN_SCAN_AREA', 'sku': 'PRD_F_01'}}
+        
+        first, second, other = read(1), read(3), read(3, 'E2')
+        windows = [
+            make_window('2025-08-13T16:00:01', rfid_events=[first, second]),
+            make_window('2025-08-13T16:00:03', rfid_events=[second, other]),
+            # Back after more than the TTL: a new visit of the same item
+            make_window('2025-08-13T16:01:00', rfid_events=[read(60)]),
+        ]
+        
+        events = self.detector.detect(windows)
+        
+        self.assertEqual([(e['timestamp'], e['details']['epc'], e['details']['first_seen'],
+                           e['details']['last_seen']) for e in events], [
+            ('2025-08-13T16:01:00', 'E1', '2025-08-13T16:00:01', '2025-08-13T16:00:03'),
+            ('2025-08-13T16:01:00', 'E2', '2025-08-13T16:00:03', '2025-08-13T16:00:03'),
+            # Still in the scan area when the stream ends: stamped with its last read
+            ('2025-08-13T16:01:00', 'E1', '2025-08-13T16:01:00', '2025-08-13T16:01:00'),
+        ])
+        detector = TheftDetector(self.config)
+        batch = detector.detect_batch(windows)
+        self.assertEqual([e for position in sorted(batch) for e in batch[position]] + detector.flush(), events)
+        self.assertEqual(self.detector.tags.active_count(), 0)
+    
+    def test_flushed_visit_has_its_last_read_as_timestamp(self):
+        """Test an item still in the scan area at the end is reported at its last read on both paths"""
+        def read(second):
+            return {'timestamp': f"2025-08-13T16:00:{second:02d}", 'status': 'Active',
+                    'data': {'epc': 'E1', 'location': 'IN_SCAN_AREA', 'sku': 'PRD_F_01'}}
+        windows = [make_window('2025-08-13T16:00:00', rfid_events=[read(1), read(4)]),
+                   make_window('2025-08-13T16:00:05')]
+        
+        events = self.detector.detect(windows)
+        detector = TheftDetector(self.config)
+        detector.detect_batch(windows)
+        
+        self.assertEqual([(e['timestamp'], e['details']['first_seen']) for e in events],
+                         [('2025-08-13T16:00:04', '2025-08-13T16:00:01')])
+        self.assertEqual(detector.flush(), events)
+    
+    def test_scan_in_another_window_clears_the_visit(self):
+        """Test a POS scan matches reads of the same visit that fall in other windows"""
+        def read(second):
+            return {'timestamp': f"2025-08-13T08:00:{second:02d}", 'status': 'Active',
+                    'data': {'epc': 'E1', 'location': 'IN_SCAN_AREA', 'sku': 'PRD_F_01'}}
+        scan = {'timestamp': '2025-08-13T08:00:01', 'status': 'Active', 'data': {'sku': 'PRD_F_01', 'weight_g': 150}}
+        
+        windows = [
+            make_window('2025-08-13T08:00:00', rfid_events=[read(0), read(3)], pos_events=[scan]),
+            make_window('2025-08-13T08:00:05', rfid_events=[read(6), read(9)]),
+            make_window('2025-08-13T08:01:00'),
+        ]
+        
+        self.assertEqual(self.detector.detect(windows), [])
+        detector = TheftDetector(self.config)
+        self.assertEqual(detector.detect_batch(windows), {})
+        self.assertEqual(detector.flush(), [])
+        
+        # The same reads without the scan are reported once the tag goes quiet
+        windows[0]['pos_events'] = []
+        events = TheftDetector(self.config).detect(windows)
+        self.assertEqual([(e['timestamp'], e['details']['first_seen'], e['details']['last_seen']) for e in events],
+                         [('2025-08-13T08:01:00', '2025-08-13T08:00:00', '2025-08-13T08:00:09')])
+    
+    def test_weight_and_price_checked_against_catalog(self):
+        """Test POS lines outside the catalog tolerances are flagged on both paths"""
+        catalog = CatalogService(pd.DataFrame([
+            {'SKU': 'PRD_F_01', 'barcode': 4790015610019, 'weight': 150, 'price': 280},
+            {'SKU': 'PRD_F_02', 'barcode': 4790015610026, 'weight': 400, 'price': 540},
+        ]))
+        def line(sku, weight, price, barcode=None):
+            return {'status': 'Active', 'data': {'sku': sku, 'barcode': barcode, 'weight_g': weight, 'price': price}}
+        
+        windows = [
+            make_window('2025-08-13T16:00:01', pos_events=[line('PRD_F_01', 152, 280), line('PRD_F_02', 400, 540)]),
+            make_window('2025-08-13T16:00:02', pos_events=[line('PRD_F_01', 150, 180), line('PRD_F_02', 250, 540)]),
+            # Unknown SKU resolved through its barcode
+            make_window('2025-08-13T16:00:03', pos_events=[line('UNKNOWN', 150, 540, '4790015610026')]),
+        ]
+        detector = TheftDetector(self.config, catalog)
+        
+        events = detector.detect(windows)
+        
+        self.assertEqual([(e['event_type'], e['timestamp'], e['details']['issue']) for e in events], [
+            ('WEIGHT_DISCREPANCY', '2025-08-13T16:00:02', 'Weight outside tolerance'),
+            ('PRICE_DISCREPANCY', '2025-08-13T16:00:02', 'Price outside tolerance'),
+            ('WEIGHT_DISCREPANCY', '2025-08-13T16:00:03', 'Weight outside tolerance'),
+        ])
+        self.assertEqual((events[0]['details']['expected_weight'], events[0]['details']['actual_weight']), (400, 250))
+        self.assertEqual(events[1]['details']['expected_price'], 280)
+        batch = detector.detect_batch(windows)
+        self.assertEqual([e for position in sorted(batch) for e in batch[position]], events)
+
+
+class TestEpcTracker(unittest.TestCase):
+    """Test EpcTracker functionality"""
+    
+    def test_reads_extend_a_visit_until_the_ttl(self):
+        """Test repeated reads share a visit, scans match it and quiet tags are closed"""
+        tracker = EpcTracker(ttl_seconds=10)
+        def read(second, epc, sku='PRD_F_01'):
+            return {'timestamp': f"2025-08-13T16:00:{second:02d}", 'data': {'epc': epc, 'sku': sku}}
+        def at(second):
+            return pd.Timestamp(f"2025-08-13T16:00:{second:02d}").value
+        
+        tracker.observe('SCC1', [read(1, 'E1'), read(2, 'E2', 'PRD_F_02')])
+        tracker.observe('SCC1', [read(1, 'E1'), read(9, 'E1')])
+        visit = tracker.tags['SCC1']['E1']
+        self.assertEqual((visit.entered, visit.last_seen_ns - visit.entered_ns), ('2025-08-13T16:00:01', 8 * 10 ** 9))
+        
+        tracker.observe('SCC1', [], [(at(4), 'PRD_F_01')])
+        self.assertEqual([(v.epc, v.matched) for v in tracker.tags['SCC1'].values()], [('E1', True), ('E2', False)])
+        
+        closed = tracker.expire('SCC1', at(15))
+        self.assertEqual([v.epc for v in closed], ['E2'])
+        self.assertEqual(list(tracker.tags['SCC1']), ['E1'])
+        self.assertEqual([(station, v.epc) for station, v in tracker.close_all()], [('SCC1', 'E1')])
+        self.assertEqual((tracker.active_count(), tracker.exited), (0, 2))
 
 
 class TestAnomalyDetector(unittest.TestCase):
@@ -44,6 +236,88 @@ class TestAnomalyDetector(unittest.TestCase):
     def test_detector_initialization(self):
         """Test detector can be initialized"""
         self.assertIsNotNone(self.detector)
+    
+    def test_unusual_pattern_against_station_baseline(self):
+        """Test a spike is flagged only after warmup and only at its own station"""
+        sale = {'status': 'Active', 'data': {'sku': 'PRD_F_01'}}
+        def window(second, sales, station='SCC1'):
+            return make_window(f"2025-08-13T16:{second // 60:02d}:{second % 60:02d}", station,
+                               pos_events=[sale] * sales)
+        
+        normal = [window(i * 5, 1 + i % 2) for i in range(self.config.ANOMALY_WARMUP_WINDOWS)]
+        spike = window(300, 12)
+        
+        self.assertEqual(self.detector.detect([spike] + normal), [])
+        events = self.detector.detect([spike, window(305, 12, 'SCC2')])
+        
+        self.assertEqual([(e['event_type'], e['station_id']) for e in events], [('UNUSUAL_PATTERN', 'SCC1')])
+        deviation = events[0]['details']['metrics']['transactions_per_minute']
+        self.assertEqual(deviation['value'], 12 * 60 / self.config.TIME_WINDOW_SECONDS)
+        self.assertGreater(deviation['z_score'], self.config.ANOMALY_Z_THRESHOLD)
+    
+    def test_crash_readings_merge_into_one_outage(self):
+        """Test overlapping windows of crash readings report one outage per system"""
+        def reading(second, status):
+            return {'timestamp': f"2025-08-13T16:00:{second:02d}", 'status': status}
+        
+        crashes = [reading(second, 'System Crash') for second in (1, 3, 5, 7)]
+        windows = [
+            make_window('2025-08-13T16:00:01', pos_events=crashes[:3]),
+            make_window('2025-08-13T16:00:03', pos_events=crashes[1:], queue_events=[reading(3, 'System Crash')]),
+            make_window('2025-08-13T16:00:08', pos_events=[crashes[3], reading(8, 'Active')]),
+        ]
+        
+        events = self.detector.detect(windows)
+        
+        self.assertEqual([(e['timestamp'], e['details']['system'], e['details']['start'], e['details']['end'],
+                           e['details']['crash_readings'], e['details']['ongoing']) for e in events], [
+            ('2025-08-13T16:00:08', 'POS', '2025-08-13T16:00:01', '2025-08-13T16:00:07', 4, False),
+            ('2025-08-13T16:00:03', 'Queue', '2025-08-13T16:00:03', '2025-08-13T16:00:03', 1, True),
+        ])
+        self.assertEqual(events[0]['details']['duration_seconds'], 6.0)
+        self.assertEqual(self.detector.outages.open_count(), 0)
+    
+    def test_read_errors_merge_into_one_run(self):
+        """Test repeated read errors report one run per system, lone errors none"""
+        def reading(second, status):
+            return {'timestamp': f"2025-08-13T16:00:{second:02d}", 'status': status}
+        
+        errors = [reading(second, 'Read Error') for second in (1, 2, 3)]
+        windows = [
+            make_window('2025-08-13T16:00:01', rfid_events=errors[:2], queue_events=[reading(1, 'Read Error')]),
+            make_window('2025-08-13T16:00:02', rfid_events=errors[1:], queue_events=[reading(2, 'Active')]),
+            make_window('2025-08-13T16:00:03', pos_events=[reading(3, 'Read Error'), reading(4, 'Read Error')]),
+        ]
+        
+        events = self.detector.detect(windows)
+        
+        self.assertEqual([(e['event_type'], e['timestamp'], e['details']['system'], e['details']['start'],
+                           e['details']['end'], e['details']['error_count'], e['details']['ongoing'])
+                          for e in events], [
+            ('SCANNING_ERROR', '2025-08-13T16:00:01', 'RFID', '2025-08-13T16:00:01', '2025-08-13T16:00:03', 3, True),
+            ('SCANNING_ERROR', '2025-08-13T16:00:03', 'POS', '2025-08-13T16:00:03', '2025-08-13T16:00:04', 2, True),
+        ])
+        self.assertEqual(self.detector.earliest_pending(), None)
+
+
+class TestOnlineStats(unittest.TestCase):
+    """Test the constant-memory running statistics"""
+    
+    def test_estimates_track_exact_statistics(self):
+        """Test Welford moments and P² quantiles against exact values"""
+        values = [(i * 7919) % 1000 for i in range(5000)]
+        moments, median, upper = Welford(), P2Quantile(0.5), P2Quantile(0.95)
+        for value in values:
+            moments.add(value)
+            median.add(value)
+            upper.add(value)
+        
+        mean = sum(values) / len(values)
+        std = (sum((value - mean) ** 2 for value in values) / (len(values) - 1)) ** 0.5
+        self.assertAlmostEqual(moments.mean, mean)
+        self.assertAlmostEqual(moments.std(), std)
+        self.assertAlmostEqual(median.value(), sorted(values)[2500], delta=10)
+        self.assertAlmostEqual(upper.value(), sorted(values)[4750], delta=10)
 
 
 class TestQueueOptimizer(unittest.TestCase):
@@ -56,6 +330,20 @@ class TestQueueOptimizer(unittest.TestCase):
     def test_optimizer_initialization(self):
         """Test optimizer can be initialized"""
         self.assertIsNotNone(self.optimizer)
+    
+    def test_queue_summary_is_per_station(self):
+        """Test the running summary keeps bounded totals per station"""
+        reading = {'timestamp': 1, 'status': 'Active',
+                   'data': {'customer_count': 4, 'average_dwell_time': 30.0}}
+        later = {'timestamp': 6, 'status': 'Active',
+                 'data': {'customer_count': 8, 'average_dwell_time': 50.0}}
+        
+        self.optimizer.update(make_window('1', queue_events=[reading]))
+        self.optimizer.update(make_window('2', queue_events=[reading, later]))
+        
+        self.assertEqual(dict(self.optimizer.queue_summary), {
+            'SCC1': {'readings': 2, 'total_customers': 12, 'total_dwell_time': 80.0, 'max_customers': 8}
+        })
 
 
 class TestInventoryTracker(unittest.TestCase):
@@ -68,6 +356,86 @@ class TestInventoryTracker(unittest.TestCase):
     def test_tracker_initialization(self):
         """Test tracker can be initialized"""
         self.assertIsNotNone(self.tracker)
+    
+    def test_overlapping_windows_count_each_sale_once(self):
+        """Test incremental state counts a sale once however many windows see it"""
+        sale = {'timestamp': 2, 'status': 'Active', 'data': {'sku': 'PRD_F_01'}}
+        later_sale = {'timestamp': 4, 'status': 'Active', 'data': {'sku': 'PRD_F_01'}}
+        snapshot = {'timestamp': 0, 'data': {'PRD_F_01': 10}}
+        
+        self.tracker.update(make_window('1', pos_events=[sale], inventory_snapshot=snapshot))
+        self.tracker.update(make_window('2', pos_events=[sale, later_sale], inventory_snapshot=snapshot))
+        self.tracker.update(make_window('2', 'SCC2', pos_events=[sale], inventory_snapshot=snapshot))
+        
+        state = self.tracker.inventory['PRD_F_01']
+        self.assertEqual(state['sold'], 3)
+        self.assertEqual(state['actual'], 10)
+        self.assertEqual(state['last_sale'], {'timestamp': '2', 'station': 'SCC2'})
+
+
+class TestDetectorDispatcher(unittest.TestCase):
+    """Test DetectorDispatcher functionality"""
+    
+    def test_run_matches_individual_detectors(self):
+        """Test the fused single pass reports the same events as separate passes"""
+        config = Config()
+        windows = make_sample_windows()
+        
+        results = create_default_dispatcher(config).run(windows)
+        
+        self.assertEqual(results['theft'], TheftDetector(config).detect(windows))
+        self.assertEqual(results['anomaly'], AnomalyDetector(config).detect(windows))
+        self.assertEqual(results['queue'], QueueOptimizer(config).analyze(windows))
+        self.assertEqual(results['inventory'], InventoryTracker(config).track(windows))
+        self.assertGreater(len(results['theft']), 0)
+        self.assertGreater(len(results['anomaly']), 0)
+    
+    def test_stream_matches_run_order(self):
+        """Test streamed events come out in the batch timestamp order"""
+        config = Config()
+        windows = make_sample_windows()
+        
+        results = create_default_dispatcher(config).run(windows)
+        batch = sorted(
+            [e for name in results for e in results[name]],
+            key=lambda e: e.get('timestamp') or '~'
+        )
+        counts = {}
+        streamed = list(create_default_dispatcher(config).stream(windows, counts))
+        
+        self.assertEqual(streamed, batch)
+        self.assertEqual(sum(counts.values()), len(batch))
+    
+    def test_parallel_run_matches_serial(self):
+        """Test station-sharded runs merge back into the single-process output"""
+        config = Config()
+        windows = make_sample_windows() * 3
+        
+        serial = create_default_dispatcher(config).run(windows)
+        parallel = create_default_dispatcher(config).run(windows, workers=2)
+        
+        self.assertEqual(json.dumps(parallel, default=Event.to_dict),
+                         json.dumps(serial, default=Event.to_dict))
+    
+    def test_register_custom_detector(self):
+        """Test registered detectors share one view per window"""
+        views = []
+        
+        class RecordingDetector:
+            def update(self, window, view):
+                views.append(view)
+                return []
+            
+            def flush(self):
+                return [{'event_type': 'DONE'}]
+        
+        dispatcher = DetectorDispatcher()
+        dispatcher.register('recording', RecordingDetector())
+        results = dispatcher.run(make_sample_windows())
+        
+        self.assertEqual(len(views), 3)
+        self.assertEqual(len(views[1].with_status('queue_events', 'Read Error')), 1)
+        self.assertEqual(results['recording'], [{'event_type': 'DONE'}])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,76 @@
+"""
+Unit Tests for Benchmarks Module
+"""
+
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_data import SyntheticStoreGenerator
+from benchmarks.runner import BenchmarkRunner
+
+
+class TestSyntheticStoreGenerator(unittest.TestCase):
+    """Test SyntheticStoreGenerator functionality"""
+    
+    def test_generate_is_seeded(self):
+        """Test the same seed produces identical files"""
+        with tempfile.TemporaryDirectory() as tmp:
+            first = Path(tmp, 'first')
+            second = Path(tmp, 'second')
+            counts = SyntheticStoreGenerator(seed=7, stations=3).generate(str(first), 500)
+            SyntheticStoreGenerator(seed=7, stations=3).generate(str(second), 500)
+            
+            self.assertGreaterEqual(sum(counts.values()), 500)
+            for filename in SyntheticStoreGenerator.SOURCE_FILES.values():
+                self.assertEqual(
+                    Path(first, filename).read_text(encoding='utf-8'),
+                    Path(second, filename).read_text(encoding='utf-8')
+                )
+            self.assertTrue(Path(first, 'products_list.csv').exists())
+    
+    def test_generated_files_are_time_ordered(self):
+        """Test every source is written in timestamp order"""
+        with tempfile.TemporaryDirectory() as tmp:
+            SyntheticStoreGenerator(seed=1).generate(tmp, 300)
+            for filename in SyntheticStoreGenerator.SOURCE_FILES.values():
+                lines = Path(tmp, filename).read_text(encoding='utf-8').splitlines()
+                timestamps = [line.split('"timestamp": "')[1][:19] for line in lines]
+                self.assertEqual(timestamps, sorted(timestamps))
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+    """Test BenchmarkRunner functionality"""
+    
+    def test_report_covers_every_stage(self):
+        """Test the report times load, synchronize, each detector and output"""
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = str(Path(tmp, 'data'))
+            SyntheticStoreGenerator(seed=3, stations=2).generate(data_path, 300)
+            report = BenchmarkRunner(data_path, str(Path(tmp, 'output'))).run()
+        
+        for stage in ['load', 'synchronize', 'detect_total', 'detect_theft', 'detect_anomaly',
+                      'detect_queue', 'detect_inventory', 'coalesce', 'output']:
+            self.assertIn(stage, report['stages'])
+        self.assertGreaterEqual(report['records'], 300)
+        self.assertGreater(report['windows'], 0)
+    
+    def test_coalesce_stage_can_be_skipped(self):
+        """Test --no-coalesce drops the stage and writes every detection"""
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = str(Path(tmp, 'data'))
+            SyntheticStoreGenerator(seed=3, stations=2).generate(data_path, 300)
+            coalesced = BenchmarkRunner(data_path, str(Path(tmp, 'output'))).run()
+            raw = BenchmarkRunner(data_path, str(Path(tmp, 'output')), coalesce=False).run()
+        
+        self.assertNotIn('coalesce', raw['stages'])
+        self.assertEqual(raw['merged_events'], 0)
+        self.assertEqual(raw['events'], coalesced['events'] + coalesced['merged_events'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,16 +2,123 @@
 Unit Tests for Data Processing Module
 """
 
+import json
+import os
+import tempfile
+import pandas as pd
 import unittest
 import sys
 from pathlib import Path
+from unittest import mock
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from analytics.dispatcher import create_default_dispatcher
 from data_processing.data_loader import DataLoader
 from data_processing.data_synchronizer import DataSynchronizer
 from data_processing.data_validator import DataValidator
+from data_processing.catalog import CatalogService
+from data_processing.column_cache import ColumnCache
+from data_processing.records import SensorRecord, Window
+from events.event_coalescer import EventCoalescer
+from events.event_generator import EventGenerator
+from utils.config import Config
+
+
+def make_sample_raw_data():
+    """Build a small multi-station dataset with unsorted and overlapping reads"""
+    raw_data = {'rfid': [], 'queue': [], 'pos': [], 'product_recognition': [], 'inventory': []}
+    stations = ['SCC1', 'SCC2', 'RC1']
+    
+    for i in range(40):
+        second = (i * 7) % 23
+        station = stations[i % len(stations)]
+        timestamp = f"2025-08-13T16:00:{second:02d}"
+        raw_data['rfid'].append({
+            'timestamp': timestamp, 'station_id': station, 'status': 'Active',
+            'data': {'epc': f"E{i:04d}", 'location': 'IN_SCAN_AREA', 'sku': f"PRD_F_{i % 5:02d}"}
+        })
+        if i % 3 == 0:
+            raw_data['pos'].append({
+                'timestamp': timestamp, 'station_id': station, 'status': 'Active',
+                'data': {'customer_id': 'C001', 'sku': f"PRD_F_{i % 4:02d}", 'price': 100.0, 'weight_g': 150.0}
+            })
+        if i % 4 == 0:
+            raw_data['queue'].append({
+                'timestamp': timestamp, 'station_id': station,
+                'status': 'Read Error' if i % 8 == 0 else 'Active',
+                'data': {'customer_count': i % 9, 'average_dwell_time': 30.0 + i}
+            })
+        if i % 5 == 0:
+            raw_data['product_recognition'].append({
+                'timestamp': timestamp, 'station_id': station, 'status': 'Active',
+                'data': {'predicted_product': f"PRD_F_{i % 6:02d}", 'accuracy': 0.9}
+            })
+    
+    for minute in (0, 1):
+        raw_data['inventory'].append({
+            'timestamp': f"2025-08-13T16:0{minute}:10",
+            'data': {'PRD_F_00': 100 - minute, 'PRD_F_01': 80}
+        })
+    
+    return raw_data
+
+
+def make_coalescer(config):
+    """Coalescer with the configured horizon and keys"""
+    return EventCoalescer(config.COALESCE_HORIZON_SECONDS, config.COALESCE_MAX_KEYS, config.COALESCE_KEY_FIELDS)
+
+
+def normalize(value):
+    """Make window structures comparable (NaN never equals itself)"""
+    if hasattr(value, 'to_dict') and not isinstance(value, pd.DataFrame):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def scan_windows(sync, raw_data):
+    """
+    Reference windowing that scans every source once per window, to check
+    the indexed engine against: one window per distinct record timestamp
+    and active station, with the latest inventory snapshot at its start
+    """
+    frames = {source: sync._to_dataframe(raw_data.get(source, []))
+              for source in ('rfid', 'queue', 'pos', 'product_recognition')}
+    inventory = sync._to_dataframe(raw_data.get('inventory', []))
+    timestamps = sorted({t for df in frames.values() if not df.empty for t in df['timestamp']})
+    stations = sorted({s for df in frames.values() if not df.empty for s in df['station_id']})
+    
+    def within(df, station, start, end):
+        if df.empty:
+            return []
+        mask = (df['station_id'] == station) & (df['timestamp'] >= start) & (df['timestamp'] < end)
+        return df[mask].to_dict('records')
+    
+    windows = []
+    for timestamp in timestamps:
+        end = timestamp + sync.time_window
+        recent = inventory[inventory['timestamp'] <= timestamp] if not inventory.empty else inventory
+        snapshot = recent.sort_values('timestamp').iloc[-1].to_dict() if not recent.empty else {}
+        for station in stations:
+            windows.append({
+                'timestamp': timestamp.isoformat(),
+                'window_start': timestamp.isoformat(),
+                'window_end': end.isoformat(),
+                'station_id': station,
+                'rfid_events': within(frames['rfid'], station, timestamp, end),
+                'queue_events': within(frames['queue'], station, timestamp, end),
+                'pos_events': within(frames['pos'], station, timestamp, end),
+                'recognition_events': within(frames['product_recognition'], station, timestamp, end),
+                'inventory_snapshot': snapshot
+            })
+    return windows
 
 
 class TestDataLoader(unittest.TestCase):
@@ -31,6 +138,167 @@ class TestDataLoader(unittest.TestCase):
         # This will pass even if file doesn't exist (returns empty list)
         records = loader.load_jsonl('test.jsonl')
         self.assertIsInstance(records, list)
+    
+    def test_load_jsonl_columnar(self):
+        """Test bulk JSONL loading flattens data fields and counts bad lines"""
+        with tempfile.TemporaryDirectory() as tmp:
+            lines = [
+                '{"timestamp": "2025-08-13T16:00:01", "station_id": "SCC1", "status": "Active", '
+                '"data": {"sku": "PRD_F_01", "price": 280.0}}',
+                '{not json',
+                '',
+                '{"timestamp": "2025-08-13T16:00:02", "station_id": "SCC2", "status": "Read Error"}',
+            ]
+            Path(tmp, 'pos.jsonl').write_text('\n'.join(lines), encoding='utf-8')
+            
+            loader = DataLoader(tmp)
+            loader.CHUNK_SIZE = 16  # Force records to straddle chunk boundaries
+            df = loader.load_jsonl_columnar('pos.jsonl')
+        
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df['data.sku'].iloc[0], 'PRD_F_01')
+        self.assertTrue(df['data.sku'].isna().iloc[1])
+        self.assertEqual(df['data'].iloc[0], {'sku': 'PRD_F_01', 'price': 280.0})
+        self.assertEqual(loader.skipped_lines, {'pos.jsonl': 1})
+    
+    def test_load_jsonl_time_range(self):
+        """Test range reads decode only the records inside [start, end)"""
+        raw_data = make_sample_raw_data()
+        records = raw_data['rfid']
+        with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as cache_home:
+            with open(Path(tmp, 'rfid.jsonl'), 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(record) + '\n' for record in records)
+            
+            with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home}):
+                loader = DataLoader(tmp)
+                selected = loader.load_jsonl('rfid.jsonl', start='2025-08-13T16:00:05', end='2025-08-13T16:00:10')
+                reloaded = DataLoader(tmp).load_jsonl('rfid.jsonl', start='2025-08-13T16:00:05')
+                index_dir = DataLoader.default_cache_dir(tmp)
+            self.assertTrue(Path(index_dir, 'rfid.jsonl.idx.npz').exists())
+            self.assertEqual(Path(index_dir).parent.parent, Path(cache_home))
+            self.assertEqual(sorted(path.name for path in Path(tmp).iterdir()), ['rfid.jsonl'])
+        
+        expected = [r for r in records if '2025-08-13T16:00:05' <= r['timestamp'] < '2025-08-13T16:00:10']
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(selected, expected)
+        self.assertEqual(reloaded, [r for r in records if r['timestamp'] >= '2025-08-13T16:00:05'])
+    
+    def test_unwritable_index_dir_only_warns(self):
+        """Test a line index that cannot be saved is still used, leaving nothing behind"""
+        records = make_sample_raw_data()['rfid']
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(Path(tmp, 'rfid.jsonl'), 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(record) + '\n' for record in records)
+            Path(tmp, 'cache').write_text('not a folder', encoding='utf-8')
+            
+            loader = DataLoader(tmp, cache_dir=str(Path(tmp, 'cache')))
+            with self.assertLogs('sentinel.line_index', 'WARNING'):
+                selected = loader.load_jsonl('rfid.jsonl', start='2025-08-13T16:00:05')
+            files = sorted(path.name for path in Path(tmp).iterdir())
+        
+        self.assertEqual(selected, [r for r in records if r['timestamp'] >= '2025-08-13T16:00:05'])
+        self.assertEqual(files, ['cache', 'rfid.jsonl'])
+    
+    def test_columnar_cache_round_trip(self):
+        """Test cached sources reload unchanged and are refreshed when the file changes"""
+        raw_data = make_sample_raw_data()
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp, 'rfid.jsonl')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(record) + '\n' for record in raw_data['rfid'])
+                f.write('{broken\n')
+            cache_dir = str(Path(tmp, 'cache'))
+            
+            parsed = DataLoader(tmp, cache_dir=cache_dir).load_jsonl_columnar('rfid.jsonl')
+            loader = DataLoader(tmp, cache_dir=cache_dir)
+            cached = loader.load_jsonl_columnar('rfid.jsonl')
+            
+            self.assertEqual(str(cached['timestamp'].dtype), 'datetime64[ns]')
+            self.assertEqual(loader.skipped_lines, {'rfid.jsonl': 1})
+            sync = DataSynchronizer()
+            self.assertEqual(
+                normalize(sync.process({'rfid': cached})),
+                normalize(sync.process({'rfid': parsed}))
+            )
+            
+            with open(source, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(raw_data['rfid'][0]) + '\n')
+            refreshed = DataLoader(tmp, cache_dir=cache_dir).load_jsonl_columnar('rfid.jsonl')
+            self.assertEqual(len(refreshed), len(parsed) + 1)
+    
+    def test_column_cache_stores_nested_and_zoned_columns_without_pickle(self):
+        """Test dict and tz-aware columns round-trip and an unwritable cache is skipped"""
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(['2025-08-13T16:00:00', '2025-08-13T16:00:05']).tz_localize('Asia/Colombo'),
+            'data': [{'sku': 'PRD_F_01', 'price': 280.0, 'tags': ['a']}, None],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp, 'pos.jsonl')
+            source.write_text('{}\n', encoding='utf-8')
+            cache = ColumnCache(str(Path(tmp, 'cache')))
+            cache.store(source, df)
+            
+            loaded = cache.load(source)
+            self.assertEqual(list(loaded['data']), list(df['data']))
+            self.assertEqual(list(loaded['timestamp']), list(df['timestamp']))
+            self.assertEqual([path.suffix for path in Path(tmp, 'cache').rglob('*.pkl')], [])
+            
+            Path(tmp, 'blocked').write_text('', encoding='utf-8')
+            blocked = ColumnCache(str(Path(tmp, 'blocked')))
+            with self.assertLogs('sentinel.column_cache', 'WARNING'):
+                blocked.store(source, df)
+            self.assertIsNone(blocked.load(source))
+    
+    def test_columnar_load_builds_same_windows(self):
+        """Test windows built from columnar sources match those from records"""
+        raw_data = make_sample_raw_data()
+        with tempfile.TemporaryDirectory() as tmp:
+            for key, records in raw_data.items():
+                with open(Path(tmp, f"{key}.jsonl"), 'w', encoding='utf-8') as f:
+                    f.writelines(json.dumps(record) + '\n' for record in records)
+            loader = DataLoader(tmp)
+            columnar = {key: loader.load_jsonl_columnar(f"{key}.jsonl") for key in raw_data}
+        
+        sync = DataSynchronizer()
+        self.assertEqual(normalize(sync.process(columnar)), normalize(sync.process(raw_data)))
+
+
+class TestCatalogService(unittest.TestCase):
+    """Test CatalogService functionality"""
+    
+    def setUp(self):
+        products = pd.DataFrame([
+            {'SKU': 'PRD_F_01', 'product_name': 'Marie', 'EPC_range': 'E2801160600000000000000001-E2801160600000000000000100',
+             'barcode': 4790015610019, 'weight': 150, 'price': 280},
+            {'SKU': 'PRD_F_02', 'product_name': 'Cream Cracker', 'EPC_range': 'E2801160600000000000000101-E2801160600000000000000200',
+             'barcode': 4790015950624, 'weight': 190, 'price': 200},
+        ])
+        customers = pd.DataFrame([{'Customer_ID': 'C001', 'Name': 'Amith Perera'}])
+        self.catalog = CatalogService(products, customers)
+    
+    def test_lookup_by_sku_and_barcode(self):
+        """Test direct lookups by SKU and by barcode text or number"""
+        self.assertEqual(self.catalog.get_product('PRD_F_02')['weight'], 190)
+        self.assertEqual(self.catalog.get_product_by_barcode('4790015610019')['SKU'], 'PRD_F_01')
+        self.assertEqual(self.catalog.get_product_by_barcode(4790015950624)['SKU'], 'PRD_F_02')
+        self.assertIsNone(self.catalog.get_product('PRD_X_99'))
+    
+    def test_lookup_by_epc(self):
+        """Test RFID tags resolve through the EPC range index"""
+        self.assertEqual(self.catalog.sku_for_epc('E2801160600000000000000001'), 'PRD_F_01')
+        self.assertEqual(self.catalog.sku_for_epc('E2801160600000000000000150'), 'PRD_F_02')
+        self.assertIsNone(self.catalog.sku_for_epc('E2801160600000000000000300'))
+        self.assertIsNone(self.catalog.sku_for_epc('not-an-epc'))
+    
+    def test_loader_lookups_use_catalog(self):
+        """Test DataLoader lookups still return plain dicts"""
+        loader = DataLoader('.')
+        products = pd.DataFrame([{'SKU': 'PRD_F_01', 'weight': 150}])
+        customers = pd.DataFrame([{'Customer_ID': 'C001', 'Name': 'Amith Perera'}])
+        
+        self.assertEqual(loader.get_product_info('PRD_F_01', products), {'SKU': 'PRD_F_01', 'weight': 150})
+        self.assertEqual(loader.get_product_info('PRD_F_09', products), {})
+        self.assertEqual(loader.get_customer_info('C001', customers)['Name'], 'Amith Perera')
 
 
 class TestDataSynchronizer(unittest.TestCase):
@@ -46,6 +314,178 @@ class TestDataSynchronizer(unittest.TestCase):
         sync = DataSynchronizer()
         result = sync.process({})
         self.assertIsInstance(result, list)
+    
+    def test_process_matches_scan_implementation(self):
+        """Test indexed windowing produces the same windows as the full scan"""
+        sync = DataSynchronizer()
+        raw_data = make_sample_raw_data()
+        
+        indexed = sync.process(raw_data)
+        scanned = scan_windows(sync, raw_data)
+        
+        self.assertGreater(len(indexed), 0)
+        self.assertEqual(normalize(indexed), normalize(scanned))
+    
+    def test_windows_share_inventory_snapshot(self):
+        """Test windows reference one snapshot dict instead of copies"""
+        sync = DataSynchronizer()
+        windows = sync.process(make_sample_raw_data())
+        
+        before = [w for w in windows if w['timestamp'] < '2025-08-13T16:00:10']
+        after = [w for w in windows if w['timestamp'] >= '2025-08-13T16:00:10']
+        
+        self.assertTrue(all(w['inventory_snapshot'] == {} for w in before))
+        self.assertTrue(all(w['inventory_snapshot'] is after[0]['inventory_snapshot'] for w in after))
+        self.assertEqual(after[0]['inventory_snapshot']['data']['PRD_F_00'], 100)
+    
+    def test_stream_matches_batch_windows(self):
+        """Test streamed windows equal the batch windows for the same station and start"""
+        sync = DataSynchronizer()
+        raw_data = make_sample_raw_data()
+        sorted_data = {
+            key: sorted(records, key=lambda r: r['timestamp'])
+            for key, records in raw_data.items()
+        }
+        
+        batch = {(w['timestamp'], w['station_id']): w for w in sync.process(sorted_data)}
+        streamed = list(sync.stream({key: iter(records) for key, records in sorted_data.items()}))
+        
+        self.assertEqual(
+            sorted({w['timestamp'] for w in streamed}),
+            sorted({timestamp for timestamp, _ in batch})
+        )
+        for window in streamed:
+            expected = batch[(window['timestamp'], window['station_id'])]
+            self.assertEqual(normalize(window), normalize(expected))
+
+    
+    def test_tumbling_windows_only_for_active_stations(self):
+        """Test tumbling windows hold each record once and skip idle stations"""
+        sync = DataSynchronizer(policy='tumbling')
+        raw_data = make_sample_raw_data()
+        raw_data['rfid'].append({'timestamp': '2025-08-13T16:00:41', 'station_id': 'SCC9', 'status': 'Active'})
+        windows = sync.process(raw_data)
+        
+        sensor_records = sum(len(raw_data[source]) for _, source in DataSynchronizer.SOURCES)
+        self.assertEqual(sum(len(w[key]) for w in windows for key, _ in DataSynchronizer.SOURCES),
+                         sensor_records)
+        self.assertEqual([(w['window_start'], w['window_end']) for w in windows if w['station_id'] == 'SCC9'],
+                         [('2025-08-13T16:00:40', '2025-08-13T16:00:45')])
+        self.assertLess(len(windows), len(DataSynchronizer().process(raw_data)))
+    
+    def test_hopping_and_session_windows(self):
+        """Test hopping windows overlap by the stride and sessions split on gaps"""
+        raw_data = {'rfid': [
+            {'timestamp': f"2025-08-13T16:00:{second:02d}", 'station_id': 'SCC1', 'status': 'Active'}
+            for second in (1, 3, 20)
+        ]}
+        
+        hopping = DataSynchronizer(policy='hopping', stride_seconds=2).process(raw_data)
+        self.assertEqual([w['window_start'][-2:] for w in hopping], ['58', '00', '02', '16', '18', '20'])
+        self.assertEqual([len(w['rfid_events']) for w in hopping], [1, 2, 1, 1, 1, 1])
+        
+        sessions = DataSynchronizer(policy='session', gap_seconds=10).process(raw_data)
+        self.assertEqual([(w['window_start'][-2:], w['window_end'][-2:]) for w in sessions],
+                         [('01', '13'), ('20', '30')])
+        self.assertEqual([len(w['rfid_events']) for w in sessions], [2, 1])
+    
+    def test_policy_stream_matches_batch(self):
+        """Test every window policy streams the same windows as its batch run"""
+        raw_data = make_sample_raw_data()
+        sorted_data = {
+            key: sorted(records, key=lambda r: r['timestamp'])
+            for key, records in raw_data.items()
+        }
+        
+        for policy in ('tumbling', 'hopping', 'session'):
+            sync = DataSynchronizer(policy=policy, stride_seconds=2, gap_seconds=3)
+            batch = sync.process(sorted_data)
+            streamed = list(sync.stream({key: iter(records) for key, records in sorted_data.items()}))
+            self.assertEqual(normalize(streamed), normalize(batch), policy)
+    
+    def test_policy_stream_output_matches_batch(self):
+        """Test every window policy streams the same event file as its batch run"""
+        config = Config()
+        raw_data = make_sample_raw_data()
+        sorted_data = {
+            key: sorted(records, key=lambda r: r['timestamp'])
+            for key, records in raw_data.items()
+        }
+        
+        for policy in ('timestamp', 'tumbling', 'hopping', 'session'):
+            with tempfile.TemporaryDirectory() as tmp:
+                sync = DataSynchronizer(policy=policy, stride_seconds=2, gap_seconds=3)
+                dispatcher = create_default_dispatcher(config)
+                results = dispatcher.run(sync.process(sorted_data), table=sync.table)
+                events = make_coalescer(config).coalesce(
+                    [event for name in dispatcher.names for event in results[name]])
+                batch = EventGenerator(Path(tmp, 'batch')).generate_sorted([events])
+                
+                sync = DataSynchronizer(policy=policy, stride_seconds=2, gap_seconds=3)
+                windows = sync.stream({key: iter(records) for key, records in sorted_data.items()})
+                events = create_default_dispatcher(config).stream(windows, {})
+                streamed = EventGenerator(Path(tmp, 'stream')).stream(
+                    make_coalescer(config).stream(events))
+                
+                self.assertGreater(len(Path(batch).read_text().splitlines()), 0, policy)
+                self.assertEqual(Path(streamed).read_text(), Path(batch).read_text(), policy)
+    
+    def test_window_table_matches_windows(self):
+        """Test the columnar membership lists every window's records and payloads"""
+        raw_data = make_sample_raw_data()
+        with tempfile.TemporaryDirectory() as tmp:
+            for key, records in raw_data.items():
+                with open(Path(tmp, f"{key}.jsonl"), 'w', encoding='utf-8') as f:
+                    f.writelines(json.dumps(record) + '\n' for record in records)
+            loader = DataLoader(tmp)
+            columnar = {key: loader.load_jsonl_columnar(f"{key}.jsonl") for key in raw_data}
+        
+        for policy in ('timestamp', 'tumbling'):
+            for data in (raw_data, columnar):
+                sync = DataSynchronizer(policy=policy)
+                windows = sync.process(data)
+                for key in ('rfid_events', 'pos_events'):
+                    window_ids = sync.table.window_ids(key)
+                    skus = sync.table.column(key, 'sku')
+                    for position, window in enumerate(windows):
+                        pairs = (window_ids == position).nonzero()[0]
+                        self.assertEqual([sync.table.record(key, pair) for pair in pairs], window[key])
+                        self.assertEqual(skus[pairs].tolist(), [r['data']['sku'] for r in window[key]])
+
+
+class TestRecords(unittest.TestCase):
+    """Test compact SensorRecord and Window types"""
+    
+    def test_sensor_records_from_frame(self):
+        """Test frame rows become records with shared codes and no NaN placeholders"""
+        df = pd.DataFrame([
+            {'timestamp': '2025-08-13T16:00:01', 'station_id': 'SCC1', 'status': 'Active',
+             'data': {'sku': 'PRD_F_01'}},
+            {'timestamp': '2025-08-13T16:00:02', 'station_id': 'SCC1', 'status': 'Read Error'},
+        ])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        first, second = SensorRecord.from_frame(df)
+        
+        self.assertIs(first.station_id, second.station_id)
+        self.assertEqual(first['data'].get('sku'), 'PRD_F_01')
+        self.assertIsNone(second.get('data'))
+        self.assertEqual(second.to_dict(), {
+            'timestamp': pd.Timestamp('2025-08-13T16:00:02'), 'station_id': 'SCC1',
+            'status': 'Read Error', 'data': None
+        })
+        self.assertFalse(hasattr(first, '__dict__'))
+    
+    def test_window_reads_like_a_dict(self):
+        """Test windows support the dict access used by detectors"""
+        record = SensorRecord('2025-08-13T16:00:01', 'SCC1', 'Active', {'sku': 'PRD_F_01'})
+        window = Window('2025-08-13T16:00:00', '2025-08-13T16:00:00', '2025-08-13T16:00:05', 'SCC1',
+                        rfid_events=[record])
+        
+        self.assertEqual(window['station_id'], 'SCC1')
+        self.assertEqual(window.get('pos_events', None), [])
+        self.assertIsNone(window.get('unknown'))
+        self.assertEqual(window.to_dict()['rfid_events'], [record.to_dict()])
+        self.assertEqual(window, window.to_dict())
 
 
 class TestDataValidator(unittest.TestCase):
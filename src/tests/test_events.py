@@ -0,0 +1,266 @@
+"""
+Unit Tests for Events Module
+"""
+
+import gzip
+import json
+import tempfile
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from events.event import Event
+from events.event_broadcaster import EventBroadcaster
+from events.event_coalescer import EventCoalescer
+from events.event_generator import EventGenerator
+from events.event_store import EventStore
+from events.event_summary import EventSummary
+from utils.config import Config
+
+
+def make_event(second, event_type='LONG_WAIT_TIME', station_id='SCC1', severity='HIGH', **details):
+    """Event at the given second past 16:00"""
+    return Event(event_type, f"2025-08-13T16:{second // 60:02d}:{second % 60:02d}", station_id, severity, details)
+
+
+class TestEventBroadcaster(unittest.TestCase):
+    """Test EventBroadcaster functionality"""
+    
+    def test_filtered_delivery_with_bounded_backlog(self):
+        """Test subscribers get matching events only and a slow one drops its oldest"""
+        broadcaster = EventBroadcaster(max_backlog=3)
+        urgent = broadcaster.subscribe(station_id=['SCC1'], severity=['CRITICAL'])
+        everything = broadcaster.subscribe()
+        
+        broadcaster.publish(enumerate([
+            make_event(0), make_event(1, severity='CRITICAL'), make_event(2, station_id='SCC2', severity='CRITICAL'),
+            make_event(3), make_event(4, severity='CRITICAL')
+        ], start=1))
+        
+        items, dropped = urgent.take(0)
+        self.assertEqual(([event_id for event_id, _ in items], dropped), ([2, 5], 0))
+        items, dropped = everything.take(0)
+        self.assertEqual(([event_id for event_id, _ in items], dropped), ([3, 4, 5], 2))
+        
+        broadcaster.unsubscribe(urgent)
+        self.assertEqual(broadcaster.subscriber_count, 1)
+        self.assertRaises(ValueError, broadcaster.subscribe, details=['x'])
+
+
+class TestEventCoalescer(unittest.TestCase):
+    """Test EventCoalescer functionality"""
+    
+    def setUp(self):
+        self.config = Config()
+        self.coalescer = EventCoalescer(30, 100, self.config.COALESCE_KEY_FIELDS)
+    
+    def test_repeats_within_horizon_merge(self):
+        """Test repeats of a finding fold into the first event until the horizon passes"""
+        events = [
+            make_event(0, sku='PRD_F_01'),
+            make_event(5, sku='PRD_F_02'),
+            make_event(10, sku='PRD_F_01', severity='CRITICAL'),
+            make_event(20, 'LONG_WAIT_TIME', 'SCC2', sku='PRD_F_01'),
+            make_event(25, sku='PRD_F_01'),
+            make_event(45, sku='PRD_F_01'),
+            Event('INVENTORY_SHRINKAGE', None, 'ALL', 'HIGH', {}),
+        ]
+        
+        coalesced = self.coalescer.coalesce(events[::-1])
+        
+        self.assertEqual([(e['timestamp'], e['station_id'], e['details'].get('sku')) for e in coalesced], [
+            ('2025-08-13T16:00:00', 'SCC1', 'PRD_F_01'),
+            ('2025-08-13T16:00:05', 'SCC1', 'PRD_F_02'),
+            ('2025-08-13T16:00:20', 'SCC2', 'PRD_F_01'),
+            ('2025-08-13T16:00:45', 'SCC1', 'PRD_F_01'),
+            (None, 'ALL', None),
+        ])
+        self.assertEqual(coalesced[0]['details']['occurrences'], {
+            'first_seen': '2025-08-13T16:00:00', 'last_seen': '2025-08-13T16:00:25', 'count': 3
+        })
+        self.assertEqual(coalesced[0]['severity'], 'CRITICAL')
+        self.assertNotIn('occurrences', coalesced[1]['details'])
+        self.assertEqual(self.coalescer.merged, 2)
+    
+    def test_separate_outages_stay_apart(self):
+        """Test two outages of one system within the horizon keep their own intervals"""
+        def outage(second, start, end):
+            return make_event(second, 'SYSTEM_CRASH', severity='CRITICAL', system='POS',
+                              start=f"2025-08-13T16:00:{start:02d}", end=f"2025-08-13T16:00:{end:02d}")
+        events = [outage(8, 1, 7), outage(20, 12, 18), outage(20, 12, 18)]
+        
+        coalesced = self.coalescer.coalesce(events)
+        
+        self.assertEqual([(e['details']['start'], e['details']['end']) for e in coalesced],
+                         [('2025-08-13T16:00:01', '2025-08-13T16:00:07'), ('2025-08-13T16:00:12', '2025-08-13T16:00:18')])
+        self.assertEqual(coalesced[1]['details']['occurrences']['count'], 2)
+    
+    def test_stream_is_bounded_and_ordered(self):
+        """Test the oldest entry is released early once the key bound is reached"""
+        coalescer = EventCoalescer(30, 2, self.config.COALESCE_KEY_FIELDS)
+        events = [make_event(second, epc=f"E{second}") for second in range(3)] + [make_event(3, epc='E0')]
+        
+        released = [coalescer.push(event) for event in events]
+        
+        self.assertEqual([[e['details']['epc'] for e in found] for found in released], [[], [], ['E0'], ['E1']])
+        self.assertEqual(len(coalescer.pending), 2)
+        self.assertEqual([e['details']['epc'] for e in coalescer.drain()], ['E2', 'E0'])
+
+
+class TestEventGenerator(unittest.TestCase):
+    """Test EventGenerator functionality"""
+    
+    def test_sorted_streams_merge_into_compressed_file(self):
+        """Test per-detector streams are merged in timestamp order into a gzip file"""
+        theft = [make_event(0, 'SCANNER_AVOIDANCE'), make_event(30, 'SCANNER_AVOIDANCE')]
+        queue = [make_event(10), make_event(30), Event('INVENTORY_SHRINKAGE', None, 'ALL', 'HIGH', {})]
+        # Out of order, as session windows produce
+        anomaly = [make_event(40, 'UNUSUAL_PATTERN'), make_event(20, 'UNUSUAL_PATTERN')]
+        
+        with tempfile.TemporaryDirectory() as output:
+            output_file = EventGenerator(output, compression='gzip').generate_sorted([theft, queue, anomaly])
+            with gzip.open(output_file, 'rt', encoding='utf-8') as f:
+                written = [json.loads(line) for line in f]
+        
+        self.assertTrue(output_file.endswith('events.jsonl.gz'))
+        self.assertEqual([(e['timestamp'], e['event_type']) for e in written], [
+            ('2025-08-13T16:00:00', 'SCANNER_AVOIDANCE'),
+            ('2025-08-13T16:00:10', 'LONG_WAIT_TIME'),
+            ('2025-08-13T16:00:20', 'UNUSUAL_PATTERN'),
+            ('2025-08-13T16:00:30', 'SCANNER_AVOIDANCE'),
+            ('2025-08-13T16:00:30', 'LONG_WAIT_TIME'),
+            ('2025-08-13T16:00:40', 'UNUSUAL_PATTERN'),
+            (None, 'INVENTORY_SHRINKAGE'),
+        ])
+    
+    def test_partitioned_output_rolls_over_and_indexes(self):
+        """Test events land in hourly partitions with size rollover and a summary index"""
+        events = [Event('LONG_WAIT_TIME', f"2025-08-13T{16 + minute // 60}:{minute % 60:02d}:00", 'SCC1', 'HIGH', {})
+                  for minute in range(0, 120, 10)]
+        events.append(Event('INVENTORY_SHRINKAGE', None, 'ALL', 'HIGH', {}))
+        
+        with tempfile.TemporaryDirectory() as output:
+            generator = EventGenerator(output, partition={'max_bytes': 200, 'max_seconds': 3600})
+            root = Path(generator.generate(events))
+            files = sorted(str(path.relative_to(root)) for path in root.rglob('*'))
+            with open(root / 'date=2025-08-13' / 'hour=17' / '_summary.json', encoding='utf-8') as f:
+                index = json.load(f)
+        
+        self.assertIn('date=2025-08-13/hour=16/part-2.jsonl', files)
+        self.assertNotIn('date=2025-08-13/hour=16/part-3.jsonl', files)
+        self.assertIn('date=none/hour=none/part-0.jsonl', files)
+        self.assertEqual(index['total_events'], 6)
+        self.assertEqual(index['by_type'], {'LONG_WAIT_TIME': 6})
+        self.assertEqual((index['first_timestamp'], index['last_timestamp']),
+                         ('2025-08-13T17:00:00', '2025-08-13T17:50:00'))
+        self.assertEqual([part['events'] for part in index['parts']], [2, 2, 2])
+    
+    def test_partitioned_rerun_replaces_and_live_output_appends(self):
+        """Test a batch rerun replaces the partitions while the live writer extends them"""
+        events = [make_event(second) for second in (0, 10, 20)]
+        
+        with tempfile.TemporaryDirectory() as output:
+            generator = EventGenerator(output, partition={'max_bytes': 1 << 20, 'max_seconds': 3600})
+            generator.generate(events)
+            root = Path(generator.generate(events))
+            files = sorted(str(path.relative_to(root)) for path in root.rglob('*.jsonl'))
+            with open(root / 'date=2025-08-13' / 'hour=16' / '_summary.json', encoding='utf-8') as f:
+                rerun = json.load(f)
+            
+            generator.open()
+            for event in events:
+                generator.write_event(event)
+            generator.close()
+            with open(root / 'date=2025-08-13' / 'hour=16' / '_summary.json', encoding='utf-8') as f:
+                live = json.load(f)
+        
+        self.assertEqual(files, ['date=2025-08-13/hour=16/part-0.jsonl'])
+        self.assertEqual(rerun['total_events'], 3)
+        self.assertEqual(live['total_events'], 6)
+        self.assertEqual([part['file'] for part in live['parts']], ['part-0.jsonl', 'part-1.jsonl'])
+
+
+class TestEventSummary(unittest.TestCase):
+    """Test EventSummary functionality"""
+    
+    def test_counts_follow_added_events(self):
+        """Test counters, minute buckets and the ETag follow each added event"""
+        summary = EventSummary(max_minutes=2)
+        etag = summary.etag
+        summary.add_all([make_event(0), make_event(30, severity='CRITICAL'), make_event(70, station_id='SCC2'),
+                         make_event(130), Event('INVENTORY_SHRINKAGE', None, 'ALL', 'HIGH', {})])
+        
+        counts = summary.to_dict()
+        self.assertNotEqual(summary.etag, etag)
+        self.assertEqual(counts['total_events'], 5)
+        self.assertEqual(counts['by_severity'], {'HIGH': 4, 'CRITICAL': 1})
+        self.assertEqual(counts['by_station'], {'SCC1': 3, 'SCC2': 1, 'ALL': 1})
+        self.assertEqual(counts['by_minute'], {'2025-08-13T16:01': 1, '2025-08-13T16:02': 1})
+        self.assertEqual((counts['first_timestamp'], counts['last_timestamp']),
+                         ('2025-08-13T16:00:00', '2025-08-13T16:02:10'))
+        self.assertEqual(EventSummary.from_dict(counts).to_dict(), counts)
+        self.assertEqual(EventGenerator.generate_summary([make_event(0)])['by_type'], {'LONG_WAIT_TIME': 1})
+    
+    def test_out_of_order_minutes_keep_the_newest(self):
+        """Test the earliest minute is evicted and late minutes older than the kept ones are not counted"""
+        summary = EventSummary(max_minutes=2).add_all([make_event(120), make_event(60), make_event(180)])
+        self.assertEqual(summary.to_dict()['by_minute'], {'2025-08-13T16:02': 1, '2025-08-13T16:03': 1})
+        
+        summary.add_all([make_event(0), make_event(125)])
+        self.assertEqual(summary.to_dict()['by_minute'], {'2025-08-13T16:02': 2, '2025-08-13T16:03': 1})
+        self.assertEqual(summary.total, 5)
+
+
+class TestEventStore(unittest.TestCase):
+    """Test EventStore functionality"""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = EventStore(str(Path(self.directory.name) / 'events.db'))
+        self.store.add(EventGenerator(self.directory.name).format_events(
+            make_event(second, station_id=f"SCC{second % 2 + 1}", severity='HIGH' if second % 3 else 'LOW')
+            for second in range(10)
+        ))
+    
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+    
+    def test_filtered_pages_follow_cursor(self):
+        """Test filtered queries page through matching events with a cursor"""
+        pages, cursor = [], None
+        while True:
+            events, cursor = self.store.query(limit=2, cursor=cursor, station_id=['SCC1'], severity=['HIGH'])
+            pages.append([e['timestamp'][-2:] for e in events])
+            if cursor is None:
+                break
+        
+        self.assertEqual(pages, [['02', '04'], ['08']])
+        self.assertEqual(self.store.count(), 10)
+        self.assertEqual(self.store.summary.to_dict()['by_station'], {'SCC1': 5, 'SCC2': 5})
+        
+        events, cursor = self.store.query(limit=3, descending=True, since='2025-08-13T16:00:05')
+        self.assertEqual([e['timestamp'][-2:] for e in events], ['09', '08', '07'])
+        self.assertEqual(self.store.query(cursor=cursor, descending=True, since='2025-08-13T16:00:05')[0][-1]['timestamp'],
+                         '2025-08-13T16:00:05')
+        self.assertRaises(ValueError, self.store.query, details=['x'])
+    
+    def test_threads_share_a_bounded_pool(self):
+        """Test queries from many short-lived threads reuse at most MAX_CONNECTIONS connections"""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.store.count())) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results, [10] * 50)
+        self.assertLessEqual(self.store.connection_count, EventStore.MAX_CONNECTIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
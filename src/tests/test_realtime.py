@@ -0,0 +1,155 @@
+"""
+Unit Tests for Realtime Module
+"""
+
+import asyncio
+import json
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analytics.dispatcher import DetectorDispatcher, create_default_dispatcher
+from realtime.engine import LatencyTracker, RealtimeEngine
+from utils.config import Config
+
+
+class RecordingDetector:
+    """Detector that keeps every window it is given"""
+    
+    def __init__(self):
+        self.windows = []
+    
+    def update(self, window, view=None):
+        self.windows.append(window)
+        return []
+    
+    def flush(self):
+        return [{'event_type': 'FLUSHED'}]
+
+
+def make_engine(**kwargs):
+    """Engine with a recording detector and a list sink"""
+    detector = RecordingDetector()
+    dispatcher = DetectorDispatcher()
+    dispatcher.register('recording', detector)
+    events = []
+    options = dict(poll_interval=0.01, idle_close_seconds=0.2)
+    options.update(kwargs)
+    return RealtimeEngine(dispatcher, events.append, **options), detector, events
+
+
+def write_jsonl(path: Path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+class TestRealtimeEngine(unittest.TestCase):
+    """Test RealtimeEngine functionality"""
+    
+    def test_tails_files_into_station_windows(self):
+        """Test tailed records land in aligned per-station windows"""
+        with tempfile.TemporaryDirectory() as tmp:
+            write_jsonl(Path(tmp, 'rfid_readings.jsonl'), [
+                {'timestamp': '2025-08-13T16:00:01', 'station_id': 'SCC1', 'status': 'Active'},
+                {'timestamp': '2025-08-13T16:00:06', 'station_id': 'SCC1', 'status': 'Active'},
+            ])
+            write_jsonl(Path(tmp, 'pos_transactions.jsonl'), [
+                {'timestamp': '2025-08-13T16:00:03', 'station_id': 'SCC2', 'status': 'Active'},
+            ])
+            write_jsonl(Path(tmp, 'inventory_snapshots.jsonl'), [
+                {'timestamp': '2025-08-13T16:00:00', 'data': {'PRD_F_01': 5}},
+            ])
+            
+            engine, detector, events = make_engine()
+            report = asyncio.run(engine.run(tmp, duration=1.0))
+        
+        windows = [(w['window_start'], w['station_id']) for w in detector.windows]
+        self.assertEqual(windows, [
+            ('2025-08-13T16:00:00', 'SCC1'),
+            ('2025-08-13T16:00:00', 'SCC2'),
+            ('2025-08-13T16:00:05', 'SCC1'),
+        ])
+        self.assertEqual(len(detector.windows[0]['rfid_events']), 1)
+        self.assertEqual(len(detector.windows[1]['pos_events']), 1)
+        self.assertEqual(detector.windows[0]['inventory_snapshot']['data'], {'PRD_F_01': 5})
+        self.assertEqual(report['records'], 4)
+        self.assertEqual(report['latency']['windows'], 3)
+        self.assertEqual(events, [{'event_type': 'FLUSHED'}])
+    
+    def test_windows_wait_for_the_slowest_input(self):
+        """Test a window closes only after every active input passes its end"""
+        engine, detector, _ = make_engine()
+        engine.register_input('rfid')
+        engine.register_input('pos')
+        
+        engine.ingest('rfid', {'timestamp': '2025-08-13T16:00:01', 'station_id': 'SCC1'}, 'rfid')
+        engine.ingest('rfid', {'timestamp': '2025-08-13T16:00:09', 'station_id': 'SCC1'}, 'rfid')
+        self.assertEqual(engine._closed.qsize(), 0)
+        
+        engine.ingest('pos', {'timestamp': '2025-08-13T16:00:04', 'station_id': 'SCC1'}, 'pos')
+        self.assertEqual(engine._closed.qsize(), 0)
+        engine.ingest('pos', {'timestamp': '2025-08-13T16:00:05', 'station_id': 'SCC1'}, 'pos')
+        self.assertEqual(engine._closed.qsize(), 1)
+        
+        _, window = engine._closed.get_nowait()
+        self.assertEqual(len(window['rfid_events']), 1)
+        self.assertEqual(len(window['pos_events']), 1)
+        
+        # The first window has closed, so a record for it is late
+        self.assertFalse(engine.ingest('pos', {'timestamp': '2025-08-13T16:00:02', 'station_id': 'SCC1'}, 'pos'))
+        self.assertEqual(engine.stats['late_records'], 1)
+    
+    def test_socket_input(self):
+        """Test records sent over a Unix socket are windowed and detected"""
+        async def scenario(path):
+            engine = RealtimeEngine(create_default_dispatcher(Config()), events.append,
+                                    poll_interval=0.01, idle_close_seconds=0.1)
+            task = asyncio.create_task(engine.run(listen=f"unix:{path}"))
+            while not Path(path).exists():
+                await asyncio.sleep(0.01)
+            
+            _, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'{"source": "rfid", "timestamp": "2025-08-13T16:00:01", "station_id": "SCC1", '
+                         b'"status": "Active", "data": {"epc": "E1", "location": "IN_SCAN_AREA", '
+                         b'"sku": "PRD_F_01"}}\n')
+            writer.write(b'not json\n')
+            await writer.drain()
+            writer.close()
+            
+            while engine.stats['windows'] < 1:
+                await asyncio.sleep(0.01)
+            engine.stop()
+            return await task
+        
+        events = []
+        with tempfile.TemporaryDirectory() as tmp:
+            report = asyncio.run(scenario(str(Path(tmp, 'sensors.sock'))))
+        
+        self.assertEqual(report['records'], 1)
+        self.assertEqual(report['invalid_records'], 1)
+        self.assertEqual([e['event_type'] for e in events], ['SCAN_AVOIDANCE'])
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Test LatencyTracker functionality"""
+    
+    def test_report(self):
+        """Test percentiles and budget violations"""
+        tracker = LatencyTracker(budget_ms=10, max_samples=100)
+        for ms in range(1, 21):
+            tracker.record(ms / 1000)
+        
+        report = tracker.report()
+        self.assertEqual(report['windows'], 20)
+        self.assertEqual(report['over_budget'], 10)
+        self.assertAlmostEqual(report['max_ms'], 20)
+        self.assertAlmostEqual(report['p50_ms'], 10.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
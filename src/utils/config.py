@@ -11,10 +11,28 @@ class Config:
     
     # Data Processing
     TIME_WINDOW_SECONDS = 5
+    WINDOW_POLICY = 'tumbling'  # tumbling, hopping, session or timestamp
+    WINDOW_STRIDE_SECONDS = 1  # hopping windows
+    SESSION_GAP_SECONDS = 5  # session windows
+    
+    # Realtime Mode
+    REALTIME_LATENCY_BUDGET_MS = 250  # window close to event push
+    REALTIME_POLL_INTERVAL_SECONDS = 0.05
     
     # Theft Detection
     WEIGHT_TOLERANCE = 0.05  # 5%
-    RECOGNITION_CONFIDENCE_THRESHOLD = 0.8
+    PRICE_TOLERANCE = 0.01  # 1%
+    RECOGNITION_CONFIDENCE_THRESHOLD = 0.8  # only recognitions above this accuracy can flag a switch
+    RFID_TAG_TTL_SECONDS = 30  # unseen this long, a tag has left the scan area
+    
+    # Anomaly Detection
+    OUTAGE_MERGE_GAP_SECONDS = 10  # crash (or read error) readings this close belong to one outage
+    SCANNING_ERROR_MIN_READINGS = 2  # read errors a run needs before it is reported
+    ANOMALY_Z_THRESHOLD = 3.0
+    ANOMALY_WARMUP_WINDOWS = 30  # observations of a metric before it can deviate
+    ANOMALY_EWMA_ALPHA = 0.1
+    ANOMALY_QUANTILES = (0.05, 0.95)
+    ANOMALY_QUANTILE_SPAN = 500  # observations per rolling quantile sketch
     
     # Queue Management
     MAX_DWELL_TIME_SECONDS = 180  # 3 minutes
@@ -26,6 +44,15 @@ class Config:
     INVENTORY_UPDATE_INTERVAL = 600  # 10 minutes
     SHRINKAGE_THRESHOLD = 0.02  # 2%
     
+    # Event Output
+    COALESCE_HORIZON_SECONDS = 30  # repeats this soon after the first event are merged into it
+    COALESCE_MAX_KEYS = 10000
+    # Outages and tag visits carry their own start, so separate ones never merge
+    COALESCE_KEY_FIELDS = ('epc', 'sku', 'system', 'start', 'first_seen', 'issue', 'unscanned_skus',
+                           'potential_switches', 'metrics')
+    PARTITION_MAX_BYTES = 64 * 1024 * 1024  # a partition starts a new part file past this size
+    PARTITION_MAX_SECONDS = 3600  # ...or once its part file has been open this long
+    
     # Stations
     SELF_CHECKOUT_STATIONS = ['SCC1', 'SCC2', 'SCC3', 'SCC4']
     REGULAR_CHECKOUT_STATIONS = ['RC1']
@@ -41,8 +68,10 @@ class Config:
     EVENT_SCAN_AVOIDANCE = 'SCAN_AVOIDANCE'
     EVENT_BARCODE_SWITCHING = 'BARCODE_SWITCHING'
     EVENT_WEIGHT_DISCREPANCY = 'WEIGHT_DISCREPANCY'
+    EVENT_PRICE_DISCREPANCY = 'PRICE_DISCREPANCY'
     EVENT_SYSTEM_CRASH = 'SYSTEM_CRASH'
     EVENT_SCANNING_ERROR = 'SCANNING_ERROR'
+    EVENT_UNUSUAL_PATTERN = 'UNUSUAL_PATTERN'
     EVENT_LONG_WAIT_TIME = 'LONG_WAIT_TIME'
     EVENT_STATION_ALLOCATION = 'STATION_ALLOCATION'
     EVENT_INVENTORY_DISCREPANCY = 'INVENTORY_DISCREPANCY'
@@ -0,0 +1,80 @@
+"""
+Records Module
+Compact __slots__ base for records that still read like dicts
+"""
+
+import sys
+from typing import Any, Dict, Iterator
+
+
+def intern_code(value: Any) -> Any:
+    """Share one string object for repeated codes (stations, SKUs, statuses)"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class SlotRecord:
+    """
+    Base for fixed-field records stored in __slots__ instead of a dict
+    
+    Subclasses list their fields in __slots__. Records support the dict
+    reads the detectors use (record['key'], record.get('key')) and compare
+    equal to the dict they stand for; to_dict() converts them for output.
+    """
+    
+    __slots__ = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._fields
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Field value, or default for an unknown field"""
+        return getattr(self, key) if key in self._fields else default
+    
+    def keys(self):
+        """Field names in declaration order"""
+        return self.__slots__
+    
+    def items(self):
+        """(field, value) pairs in declaration order"""
+        return [(key, getattr(self, key)) for key in self.__slots__]
+    
+    def to_dict(self) -> Dict:
+        """Plain dict copy of the record"""
+        return {key: getattr(self, key) for key in self.__slots__}
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SlotRecord):
+            return type(self) is type(other) and self.items() == other.items()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __getstate__(self):
+        return self.items()
+    
+    def __setstate__(self, state):
+        for key, value in state:
+            setattr(self, key, value)
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{key}={value!r}" for key, value in self.items())
+        return f"{type(self).__name__}({fields})"